@@ -1,12 +1,13 @@
 from django.contrib import admin
-from .models import Table, Booking
+from .models import (
+    Table, Booking, BookingArchive, SlotCapacity, WaitlistEntry)
 
 
 @admin.register(Table)
 class TableAdmin(admin.ModelAdmin):
-    list_display = ('number', 'capacity')
+    list_display = ('number', 'capacity', 'combination_group')
     search_fields = ('number',)
-    list_filter = ('capacity',)  # Added list_filter
+    list_filter = ('capacity', 'combination_group')  # Added list_filter
 
 
 @admin.register(Booking)
@@ -22,3 +23,40 @@ class BookingAdmin(admin.ModelAdmin):
     raw_id_fields = ('user', 'table',)
     # These fields are auto-managed
     readonly_fields = ('created_at', 'updated_at')
+
+
+@admin.register(BookingArchive)
+class BookingArchiveAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'table_number', 'booking_date',
+                    'booking_time', 'number_of_guests', 'status',
+                    'archived_at')
+    list_filter = ('status', 'booking_date')
+    search_fields = ('user__username', 'table_number', 'notes')
+    date_hierarchy = 'booking_date'
+    raw_id_fields = ('user',)
+    # Written by the archive_bookings command, kept as archived
+    readonly_fields = ('id', 'user', 'table_number', 'table_capacity',
+                       'combined_table_numbers', 'booking_date',
+                       'booking_time', 'number_of_guests', 'notes',
+                       'status', 'created_at', 'updated_at', 'archived_at')
+
+
+@admin.register(SlotCapacity)
+class SlotCapacityAdmin(admin.ModelAdmin):
+    list_display = ('slot_date', 'slot_time', 'remaining_seats',
+                    'remaining_tables', 'updated_at')
+    date_hierarchy = 'slot_date'
+    # Maintained from booking changes, rebuild with rebuild_slot_capacity
+    readonly_fields = ('slot_date', 'slot_time', 'remaining_seats',
+                       'remaining_tables', 'updated_at')
+
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'booking_date', 'booking_time',
+                    'number_of_guests', 'status', 'booking', 'created_at')
+    list_filter = ('status', 'booking_date')
+    search_fields = ('user__username', 'notes')
+    date_hierarchy = 'booking_date'
+    raw_id_fields = ('user', 'booking')
+    readonly_fields = ('created_at', 'updated_at')
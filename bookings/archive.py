@@ -0,0 +1,126 @@
+# Archival of old bookings. Bookings dated before the archive horizon
+# (BOOKINGS_ARCHIVE_AFTER_DAYS) are copied to BookingArchive and deleted
+# from the Booking table in small batches, so the live table only holds
+# recent history and upcoming bookings. A user's booking history reads
+# both tables (see queries.user_booking_history).
+
+# Standard library imports
+import time
+from collections import defaultdict
+from datetime import timedelta
+
+# Django imports
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# Local application imports
+from . import search
+from .models import Booking, BookingArchive, SlotCapacity, WaitlistEntry
+
+# Bookings (parties) archived per transaction
+ARCHIVE_BATCH_SIZE = 500
+
+
+def archive_cutoff(today=None):
+    """Return the first booking date that is kept in the live table."""
+    today = today or timezone.localdate()
+    return today - timedelta(days=settings.BOOKINGS_ARCHIVE_AFTER_DAYS)
+
+
+def archived_copy(booking, extras):
+    """Return the BookingArchive row of a party booking."""
+    return BookingArchive(
+        id=booking.pk,
+        user_id=booking.user_id,
+        table_number=booking.table.number,
+        table_capacity=booking.table.capacity,
+        combined_table_numbers=sorted(extra.table.number for extra in extras),
+        booking_date=booking.booking_date,
+        booking_time=booking.booking_time,
+        number_of_guests=booking.number_of_guests,
+        notes=booking.notes,
+        status=booking.status,
+        created_at=booking.created_at,
+        updated_at=booking.updated_at,
+    )
+
+
+def archivable_bookings(cutoff):
+    """
+    Party bookings dated before ``cutoff``, in (booking_date, id) order.
+    The extra tables of a combination are archived with their party.
+    """
+    return Booking.objects.filter(
+        booking_date__lt=cutoff, combined_with=None
+    ).select_related('table').order_by('booking_date', 'pk')
+
+
+def archive_batch(cutoff, after=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Archive the next batch of bookings dated before ``cutoff``, after the
+    ``(booking_date, id)`` keyset cursor ``after``. Returns the number of
+    bookings archived and the cursor to continue from (None when none were
+    left).
+    """
+    parties = archivable_bookings(cutoff)
+    if after is not None:
+        booking_date, pk = after
+        parties = parties.filter(
+            Q(booking_date__gt=booking_date)
+            | Q(booking_date=booking_date, pk__gt=pk))
+
+    with transaction.atomic():
+        # Rows being edited right now are left for the next run
+        rows = list(parties.select_for_update(
+            skip_locked=True, of=('self',))[:batch_size])
+        if not rows:
+            return 0, None
+        extras = defaultdict(list)
+        for extra in Booking.objects.filter(
+                combined_with__in=rows).select_related('table'):
+            extras[extra.combined_with_id].append(extra)
+
+        BookingArchive.objects.bulk_create([
+            archived_copy(row, extras[row.pk]) for row in rows
+        ])
+
+        # Deleted with one statement rather than through the ORM, which
+        # would send the Booking signals for each row. Their work concerns
+        # current and future dates, which archived bookings never are.
+        booking_ids = [row.pk for row in rows] + [
+            extra.pk for party in extras.values() for extra in party]
+        WaitlistEntry.objects.filter(
+            booking_id__in=booking_ids).update(booking=None)
+        search.unindex_bookings(booking_ids)
+        placeholders = ', '.join(['%s'] * len(booking_ids))
+        with connection.cursor() as cursor:
+            # The date bound limits the delete to the old partitions
+            cursor.execute(
+                f'DELETE FROM {Booking._meta.db_table} '
+                f'WHERE id IN ({placeholders}) AND booking_date < %s',
+                [*booking_ids, cutoff])
+    return len(rows), (rows[-1].booking_date, rows[-1].pk)
+
+
+def archive_old_bookings(cutoff=None, batch_size=ARCHIVE_BATCH_SIZE,
+                         pause=0):
+    """
+    Archive every booking dated before ``cutoff`` (default the archive
+    horizon), ``batch_size`` parties at a time, sleeping ``pause`` seconds
+    between batches, then drop the slot capacity rows of those dates.
+    Yields the number archived by each batch.
+    """
+    cutoff = cutoff or archive_cutoff()
+    after = None
+    while True:
+        archived, after = archive_batch(cutoff, after, batch_size)
+        if after is None:
+            break
+        yield archived
+        if archived < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+    SlotCapacity.objects.filter(slot_date__lt=cutoff).delete()
@@ -0,0 +1,308 @@
+# Async versions of the read-heavy availability and booking list views,
+# served instead of the sync ones when BOOKINGS_ASYNC_VIEWS is on (the
+# default under asgi.py). Database reads use the async ORM so a worker can
+# keep serving other requests while queries are in flight.
+
+# Standard library imports
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+# Third-party imports
+from asgiref.sync import sync_to_async
+
+# Django imports
+from django.contrib import messages
+from django.contrib.auth.views import redirect_to_login
+from django.http import (
+    HttpResponseForbidden,
+    HttpResponseNotAllowed,
+    JsonResponse,
+    StreamingHttpResponse,
+)
+from django.shortcuts import render
+from django.urls import reverse
+from django.utils import timezone
+
+# Local application imports
+from . import availability_cache, slot_capacity
+from .availability import afind_seating
+from .conditional import (
+    conditional_view,
+    my_bookings_validators,
+    payload_conditional_view,
+)
+from .dashboard import dashboard_stats
+from .export import export_response
+from .forms import (
+    AvailabilityCalendarForm,
+    AvailabilityForm,
+    AvailabilityGridForm,
+    BookingExportForm,
+)
+from .live_updates import change_notifier
+from .models import Booking, Table
+from .occupancy import aload_days, current_slot_key, occupancy_index
+from .queries import (
+    merge_history,
+    user_archived_bookings,
+    user_past_bookings,
+    user_upcoming_bookings,
+    user_waitlist_entries,
+)
+from .views import calendar_summary, grid_payload, seating_message
+
+# A dashboard stream is closed after this many seconds and the browser
+# reconnects, so streams of clients that went away do not linger
+STREAM_SECONDS = 300
+
+# Seconds between keep-alive comments on an idle stream
+STREAM_KEEPALIVE = 15
+
+# Templates read the session and user lazily, which the async ORM cannot
+# do, so pages are rendered in a worker thread once their data is loaded
+arender = sync_to_async(render)
+
+
+@sync_to_async
+def authenticated_user(request):
+    """Return the request's user if logged in, else None."""
+    return request.user if request.user.is_authenticated else None
+
+
+async def check_availability(request):
+    """
+    Async version of ``views.check_availability``.
+    """
+    available_tables = []
+
+    if request.method == 'POST':
+        form = AvailabilityForm(request.POST)
+        if form.is_valid():
+            check_date = form.cleaned_data['check_date']
+            check_time = form.cleaned_data['check_time']
+            num_guests = form.cleaned_data['num_guests']
+
+            async def free_tables():
+                return await afind_seating(
+                    check_date, check_time, num_guests)
+
+            if occupancy_index.enabled:
+                available_tables = await occupancy_index.afree_tables(
+                    check_date, check_time, num_guests)
+            else:
+                # Index off: cached like the sync view
+                available_tables = await availability_cache.aget_or_compute(
+                    [check_date],
+                    f"tables:{check_date}:{check_time:%H:%M}:{num_guests}",
+                    free_tables)
+
+            if not available_tables:
+                messages.warning(
+                    request,
+                    "No tables are available at"
+                    " the selected time.")
+            else:
+                messages.success(
+                    request, seating_message(available_tables, num_guests))
+        else:
+            messages.error(
+                request, "Please correct the errors to check availability.")
+    else:
+        form = AvailabilityForm()
+
+    return await arender(request, 'bookings/check_availability.html', {
+        'form': form,
+        'available_tables': available_tables
+    })
+
+
+@payload_conditional_view
+async def availability_grid(request):
+    """
+    Async version of ``views.availability_grid``.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    form = AvailabilityGridForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    check_date = form.cleaned_data['check_date']
+    num_guests = form.cleaned_data['num_guests']
+
+    async def compute():
+        return await slot_capacity.afree_table_counts(check_date, num_guests)
+
+    counts = await availability_cache.aget_or_compute(
+        [check_date],
+        f"grid:{check_date}:{num_guests}:{current_slot_key()}",
+        compute)
+    if counts is None:
+        # The rows are not built or cannot count combinations
+        counts = await occupancy_index.afree_table_counts(
+            check_date, num_guests)
+
+    return JsonResponse(grid_payload(check_date, num_guests, counts))
+
+
+@payload_conditional_view
+async def availability_calendar(request):
+    """
+    Async version of ``views.availability_calendar``.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    form = AvailabilityCalendarForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    start_date = form.cleaned_data['check_date']
+    num_guests = form.cleaned_data['num_guests']
+    days = form.cleaned_data['days']
+
+    end_date = start_date + timedelta(days=days - 1)
+
+    async def summarise():
+        tables = [table async for table in Table.objects.all()]
+        return calendar_summary(
+            await aload_days(start_date, end_date), tables, num_guests)
+
+    data = await availability_cache.aget_or_compute(
+        [start_date + timedelta(days=offset) for offset in range(days)],
+        f"calendar:{start_date}:{days}:{num_guests}:{current_slot_key()}",
+        summarise)
+
+    return JsonResponse(data)
+
+
+@conditional_view(my_bookings_validators)
+async def my_bookings(request):
+    """
+    Async version of ``views.my_bookings``.
+    """
+    user = await authenticated_user(request)
+    if user is None:
+        return redirect_to_login(request.get_full_path())
+
+    now = timezone.now()
+    # The template reads each booking's table, so join it up front
+    upcoming_bookings = [
+        booking async for booking in user_upcoming_bookings(
+            user, now.date()).select_related('table')
+    ]
+    past_bookings = merge_history(
+        [booking async for booking in user_past_bookings(
+            user, now).select_related('table')],
+        [booking async for booking in user_archived_bookings(user)],
+    )
+    waitlist_entries = [
+        entry async for entry in user_waitlist_entries(user, now.date())
+    ]
+
+    return await arender(request, 'bookings/my_bookings.html', {
+        'upcoming_bookings': upcoming_bookings,
+        'past_bookings': past_bookings,
+        'waitlist_entries': waitlist_entries,
+    })
+
+
+async def staff_booking_export(request):
+    """
+    Async version of ``views.staff_booking_export``. The rows are read
+    through the async ORM, since an ASGI server would buffer a sync
+    iterator in full before sending any of it.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    user = await authenticated_user(request)
+    if user is None or not user.is_staff:
+        return redirect_to_login(
+            request.get_full_path(), reverse('admin:login'))
+
+    form = BookingExportForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    # Building the query may look up tables and the search index
+    return await sync_to_async(export_response)(
+        form.cleaned_data, use_async=True)
+
+
+def server_sent_event(event, data):
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def booking_rows(changes):
+    """
+    Return the dashboard rows of a batch of changes, read in one query;
+    deleted bookings are reported from the change itself.
+    """
+    bookings = {
+        booking.pk: booking async for booking in
+        Booking.objects.select_related('user', 'table').filter(
+            pk__in=[change['id'] for change in changes])
+    }
+    rows = []
+    for change in changes:
+        booking = bookings.get(change['id'])
+        row = dict(change)
+        if booking is not None:
+            row.update(
+                status=booking.status,
+                username=booking.user.username,
+                table=booking.table.number,
+            )
+        rows.append(row)
+    return rows
+
+
+async def dashboard_events():
+    """
+    Yield the dashboard counts, then each batch of booking changes
+    followed by the refreshed counts, until the stream's time is up.
+    """
+    queue = change_notifier.subscribe()
+    deadline = time.monotonic() + STREAM_SECONDS
+    try:
+        # Ask the browser to reconnect promptly when the stream ends
+        yield "retry: 1000\n\n"
+        yield server_sent_event('counts', await sync_to_async(
+            dashboard_stats)(timezone.now().date()))
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                change = await asyncio.wait_for(
+                    queue.get(), min(remaining, STREAM_KEEPALIVE))
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            # Coalesce a burst of changes into one counts refresh
+            changes = [change]
+            while not queue.empty():
+                changes.append(queue.get_nowait())
+            for row in await booking_rows(changes):
+                yield server_sent_event('booking', row)
+            # Recomputed rather than read back from the cache, which may
+            # not have been cleared yet when the change came from NOTIFY
+            yield server_sent_event('counts', await sync_to_async(
+                dashboard_stats)(timezone.now().date(), fresh=True))
+    finally:
+        change_notifier.unsubscribe(queue)
+
+
+async def staff_dashboard_stream(request):
+    """
+    Stream the staff dashboard's counts and booking changes as server-sent
+    events, pushed as bookings change instead of reloading the page.
+    """
+    user = await authenticated_user(request)
+    if user is None or not user.is_staff:
+        return HttpResponseForbidden()
+
+    response = StreamingHttpResponse(
+        dashboard_events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop proxies such as nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,272 @@
+# Standard library imports
+import threading
+from contextlib import contextmanager
+from datetime import time
+
+# Django imports
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+# Local application imports
+from .combinations import cheapest_combination
+from .models import Booking, Table
+
+# Service hours (inclusive) shared by all booking and availability views
+OPENING_TIME = time(9, 0)
+CLOSING_TIME = time(22, 0)
+
+# Tables tried before giving up when concurrent bookings keep winning
+ALLOCATION_ATTEMPTS = 5
+
+# Namespace of the PostgreSQL advisory locks taken per booking date
+DATE_LOCK_NAMESPACE = 1042
+
+# Locks standing in for the advisory locks on other backends, a fixed
+# pool shared out by date so it does not grow with the dates booked.
+# Re-entrant: promoting the waitlist allocates while an allocation that
+# freed the slot still holds its date's lock.
+DATE_LOCK_POOL_SIZE = 64
+_date_locks = [threading.RLock() for _ in range(DATE_LOCK_POOL_SIZE)]
+
+
+def overlapping_bookings(starts_at, ends_at):
+    """
+    Return the active bookings whose held period overlaps the half-open
+    range ``[starts_at, ends_at)``. The extra lower bound on ``starts_at``
+    keeps the lookup a narrow range scan of the active booking index, and
+    the matching bound on ``booking_date`` limits it to the partitions of
+    those dates on PostgreSQL (see bookings.partitions).
+    """
+    return Booking.objects.filter(
+        status__in=Booking.ACTIVE_STATUSES,
+        booking_date__range=(
+            timezone.localdate(starts_at - Booking.DURATION),
+            timezone.localdate(ends_at)),
+        starts_at__gt=starts_at - Booking.DURATION,
+        starts_at__lt=ends_at,
+        ends_at__gt=starts_at,
+    )
+
+
+def find_available_tables(booking_date, booking_time, number_of_guests,
+                          exclude_booking=None):
+    """
+    Return the tables that can seat the party and have no active booking
+    overlapping the requested period, smallest (best fitting) table first.
+
+    The queryset evaluates as a single query: conflicting bookings are
+    removed with a NOT EXISTS anti-join instead of separate id lookups.
+    Pass ``exclude_booking`` when editing so the booking does not
+    conflict with itself.
+    """
+    conflicts = overlapping_bookings(
+        *Booking.time_range(booking_date, booking_time)
+    ).filter(table=OuterRef('pk'))
+    if exclude_booking is not None:
+        conflicts = conflicts.exclude(pk=exclude_booking.pk)
+
+    return Table.objects.filter(
+        ~Exists(conflicts),
+        capacity__gte=number_of_guests,
+    ).order_by('capacity', 'number')
+
+
+def find_available_table(booking_date, booking_time, number_of_guests,
+                         exclude_booking=None):
+    """
+    Return the best fitting free table for the slot, or None if every
+    suitable table is taken.
+    """
+    return find_available_tables(
+        booking_date, booking_time, number_of_guests,
+        exclude_booking=exclude_booking,
+    ).first()
+
+
+def find_seating(booking_date, booking_time, number_of_guests):
+    """
+    Return the free tables that seat the party on their own, smallest
+    first, or else the cheapest free combination of tables that
+    ``allocate_tables`` would book, largest first, as a list.
+    """
+    tables = list(find_available_tables(
+        booking_date, booking_time, number_of_guests))
+    if tables:
+        return tables
+    free_tables = find_available_tables(
+        booking_date, booking_time, 1).exclude(combination_group='')
+    return cheapest_combination(list(free_tables), number_of_guests) or []
+
+
+async def afind_seating(booking_date, booking_time, number_of_guests):
+    """Async version of ``find_seating`` using the async ORM."""
+    tables = [
+        table async for table in find_available_tables(
+            booking_date, booking_time, number_of_guests)
+    ]
+    if tables:
+        return tables
+    free_tables = find_available_tables(
+        booking_date, booking_time, 1).exclude(combination_group='')
+    return cheapest_combination(
+        [table async for table in free_tables], number_of_guests) or []
+
+
+def allocate_table(booking):
+    """
+    Assign the best fitting free table to ``booking`` and save it.
+
+    Each attempt runs in its own transaction and locks the candidate table
+    row with ``SELECT ... FOR UPDATE SKIP LOCKED``, so concurrent requests
+    for the same slot fall through to the next free table instead of
+    racing for the same one. When every fitting table is locked, which
+    may be by allocations for other times, the best one is waited for
+    instead of reporting none free. If a save still hits the unique
+    constraint, that table is skipped and the next one is tried. Each
+    attempt holds
+    the date's ``date_lock``, so a re-pack of the date is waited for.
+
+    Returns the assigned table, or None if no table could be allocated.
+    An existing booking (when editing) never conflicts with itself.
+    """
+    exclude_booking = booking if booking.pk else None
+    original_table_id = booking.table_id
+    skipped_table_ids = []
+    for _ in range(ALLOCATION_ATTEMPTS):
+        try:
+            with date_lock(booking.booking_date):
+                candidates = find_available_tables(
+                    booking.booking_date,
+                    booking.booking_time,
+                    booking.number_of_guests,
+                    exclude_booking=exclude_booking,
+                ).exclude(pk__in=skipped_table_ids)
+                table = candidates.select_for_update(skip_locked=True).first()
+                if table is None and _skips_locked_rows():
+                    table = candidates.select_for_update().first()
+                if table is None:
+                    break
+                booking.table = table
+                booking.save()
+                return table
+        except IntegrityError:
+            # Another booking took this table first
+            skipped_table_ids.append(table.pk)
+
+    booking.table_id = original_table_id
+    return None
+
+
+def allocate_tables(booking):
+    """
+    Seat ``booking`` at the best fitting single table or, when no single
+    table seats the party, at the cheapest free combination of tables
+    from one combination group, and save it.
+
+    The booking holds the largest table of a combination; every other
+    table is held by an extra booking linked through ``combined_with``,
+    so the database constraints guard each table like any other booking.
+    Extra tables from an earlier allocation (when editing) are released
+    first and restored if nothing fits.
+
+    Returns the list of assigned tables, or None if nothing fits.
+    """
+    with transaction.atomic():
+        if booking.pk:
+            for extra in booking.combined_tables.all():
+                extra.delete()
+
+        table = allocate_table(booking)
+        if table is not None:
+            return [table]
+
+        tables = allocate_combination(booking)
+        if tables is None:
+            # Bring back the extra tables released above
+            transaction.set_rollback(True)
+        return tables
+
+
+def allocate_combination(booking):
+    """
+    Save ``booking`` at the cheapest free combination of tables, locking
+    the free tables of the slot like ``allocate_table`` does, and waiting
+    for locked ones when the unlocked ones do not seat the party. Returns
+    the tables, largest first, or None if no combination seats the party.
+    """
+    exclude_booking = booking if booking.pk else None
+    original_pk, original_table_id = booking.pk, booking.table_id
+    for _ in range(ALLOCATION_ATTEMPTS):
+        try:
+            with date_lock(booking.booking_date):
+                free_tables = find_available_tables(
+                    booking.booking_date,
+                    booking.booking_time,
+                    1,
+                    exclude_booking=exclude_booking,
+                ).exclude(combination_group='')
+                tables = cheapest_combination(
+                    list(free_tables.select_for_update(skip_locked=True)),
+                    booking.number_of_guests)
+                if tables is None and _skips_locked_rows():
+                    # In id order, so two waiting allocations cannot
+                    # deadlock on each other's tables
+                    tables = cheapest_combination(
+                        list(free_tables.select_for_update().order_by('pk')),
+                        booking.number_of_guests)
+                if tables is None:
+                    break
+                booking.table = tables[0]
+                booking.save()
+                for table in tables[1:]:
+                    Booking.objects.create(
+                        user_id=booking.user_id,
+                        table=table,
+                        booking_date=booking.booking_date,
+                        booking_time=booking.booking_time,
+                        number_of_guests=0,
+                        status=booking.status,
+                        combined_with=booking,
+                    )
+                return tables
+        except IntegrityError:
+            # Another booking took one of the tables; the rollback also
+            # undid the insert of a new booking
+            booking.pk = original_pk
+
+    booking.table_id = original_table_id
+    return None
+
+
+def _skips_locked_rows():
+    """
+    Return whether ``select_for_update(skip_locked=True)`` may have
+    passed over tables, so waiting for them could still find one.
+    """
+    return connection.features.has_select_for_update_skip_locked
+
+
+@contextmanager
+def date_lock(booking_date, exclusive=False):
+    """
+    Run the block in a transaction holding ``booking_date`` against a
+    re-pack. Allocations share the lock and still run side by side,
+    relying on row locks; ``repack_date`` takes it exclusively, so it
+    waits for them and they wait for it. On PostgreSQL this is an
+    advisory lock released at commit, seen by every process. Elsewhere
+    it is a per-process lock, which also serialises allocation on
+    backends without row locks.
+    """
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            function = ('pg_advisory_xact_lock' if exclusive
+                        else 'pg_advisory_xact_lock_shared')
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT {function}(%s, %s)',
+                    [DATE_LOCK_NAMESPACE, booking_date.toordinal()])
+            yield
+        else:
+            with _date_locks[booking_date.toordinal() % DATE_LOCK_POOL_SIZE]:
+                yield
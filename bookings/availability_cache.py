@@ -0,0 +1,126 @@
+# Standard library imports
+import hashlib
+import uuid
+
+# Django imports
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+# Version token covering every cached answer (bumped when tables change)
+TABLES_VERSION_KEY = 'availability-version:tables'
+
+
+def _date_version_key(booking_date):
+    return f'availability-version:{booking_date.isoformat()}'
+
+
+def _versions(keys):
+    """Return the current version token of each key, creating missing ones."""
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+async def _aversions(keys):
+    """Async version of ``_versions``."""
+    versions = await cache.aget_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        await cache.aset_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def get_or_compute(dates, key, compute):
+    """
+    Return the cached answer for ``key`` or compute and cache it.
+
+    ``dates`` are the booking dates the answer depends on. The cache key
+    embeds the current version token of each of those dates, so bumping a
+    date's version (see ``invalidate_dates``) makes every answer that read
+    it unreachable while answers for other dates stay cached. Only cache
+    answers read from the database: the occupancy index may itself be up
+    to ``BOOKINGS_OCCUPANCY_TTL`` behind.
+    """
+    ttl = settings.BOOKINGS_AVAILABILITY_CACHE_TTL
+    if not ttl:
+        return compute()
+
+    cache_key = _cache_key(key, _versions(_version_keys(dates)))
+    result = cache.get(cache_key)
+    if result is None:
+        result = compute()
+        cache.set(cache_key, result, ttl)
+    return result
+
+
+async def aget_or_compute(dates, key, compute):
+    """
+    Async version of ``get_or_compute``; ``compute`` is a coroutine
+    function and the cache is used through its async API.
+    """
+    ttl = settings.BOOKINGS_AVAILABILITY_CACHE_TTL
+    if not ttl:
+        return await compute()
+
+    cache_key = _cache_key(key, await _aversions(_version_keys(dates)))
+    result = await cache.aget(cache_key)
+    if result is None:
+        result = await compute()
+        await cache.aset(cache_key, result, ttl)
+    return result
+
+
+def _version_keys(dates):
+    return [TABLES_VERSION_KEY, *(_date_version_key(d) for d in dates)]
+
+
+def _cache_key(key, versions):
+    digest = hashlib.md5(
+        ':'.join(versions).encode(), usedforsecurity=False).hexdigest()
+    return f'availability:{key}:{digest}'
+
+
+def invalidate_dates(dates):
+    """
+    Drop cached availability answers that depend on any of the dates, once
+    the current transaction commits. Bumping earlier would let a reader
+    cache the uncommitted state's predecessor under the new version.
+    """
+    dates = set(dates)
+    transaction.on_commit(lambda: cache.set_many(
+        {_date_version_key(d): uuid.uuid4().hex for d in dates}, None))
+
+
+def tables_version():
+    """Return the token that changes whenever the tables change."""
+    return _versions([TABLES_VERSION_KEY])[0]
+
+
+def invalidate_all():
+    """
+    Drop every cached availability answer (after table changes) once the
+    current transaction commits.
+    """
+    transaction.on_commit(
+        lambda: cache.set(TABLES_VERSION_KEY, uuid.uuid4().hex, None))
+
+
+def affected_dates(booking):
+    """
+    Return the dates whose availability a booking touches: its current
+    date, the date it was loaded with (when an edit moved it) and the next
+    day if its held period runs past midnight.
+    """
+    dates = {booking.booking_date}
+    original_date = getattr(booking, '_original_booking_date', None)
+    if original_date is not None:
+        dates.add(original_date)
+    if booking.ends_at is not None:
+        dates.add(timezone.localtime(booking.ends_at).date())
+    return dates
@@ -0,0 +1,80 @@
+# Bulk status changes, for the staff booking list and the completion
+# sweeper. Bookings are moved with one UPDATE rather than a save() each,
+# so the work the Booking signals would have done per save is done here
+# once for the whole batch. The search index holds no status, so it is
+# left alone.
+
+# Django imports
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# Local application imports
+from . import availability_cache, dashboard, slot_capacity
+from .live_updates import booking_change, change_notifier
+from .models import Booking
+from .occupancy import occupancy_index
+from .signals import held_slot
+from .waitlist import promote_waitlist
+
+
+def apply_status(bookings, new_status):
+    """
+    Move the bookings of a queryset that can make the move (see
+    ``Booking.BULK_STATUS_TRANSITIONS``) to ``new_status``, together with
+    the extra tables of their combinations. Returns the number of
+    bookings moved, extra tables not counted.
+
+    The rows are locked and read once, then written with a single
+    ``UPDATE ... WHERE id IN (...)`` that also bumps ``updated_at``,
+    followed by the signals' work (see ``status_changed``).
+    """
+    allowed = Booking.BULK_STATUS_TRANSITIONS[new_status]
+    with transaction.atomic():
+        party_ids = list(
+            bookings.filter(combined_with=None, status__in=allowed)
+            .order_by().select_for_update(of=('self',))
+            .values_list('pk', flat=True))
+        if not party_ids:
+            return 0
+        rows = list(Booking.objects.filter(
+            Q(pk__in=party_ids) | Q(combined_with_id__in=party_ids)))
+
+        updated_at = timezone.now()
+        Booking.objects.filter(pk__in=[row.pk for row in rows]).update(
+            status=new_status, updated_at=updated_at)
+        for row in rows:
+            row.status, row.updated_at = new_status, updated_at
+        status_changed(rows)
+    return len(party_ids)
+
+
+def status_changed(rows):
+    """
+    Do the work of the Booking signals, once, for bookings whose new
+    status was written without save() (``QuerySet.update()`` or
+    ``bulk_update()``). ``rows`` are the bookings as loaded, with the new
+    status set. Call inside the transaction that wrote them.
+    """
+    dates = set()
+    released = []
+    changes = []
+    for row in rows:
+        dates |= availability_cache.affected_dates(row)
+        # The slot the booking held when it was loaded (see signals)
+        held = held_slot(row)
+        changes.append((row.pk, row._original_held_slot, held))
+        if row._original_held_slot is not None and held is None:
+            released.append(row._original_held_slot)
+        row._original_held_slot = held
+        occupancy_index.booking_saved(row)
+
+    slot_capacity.apply_changes(changes)
+    availability_cache.invalidate_dates(dates)
+    dashboard.invalidate()
+    for slot in released:
+        promote_waitlist(*slot)
+    change_notifier.publish_many([
+        booking_change(row, 'updated')
+        for row in rows if row.combined_with_id is None
+    ])
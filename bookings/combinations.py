@@ -0,0 +1,73 @@
+# Standard library imports
+from functools import lru_cache
+from itertools import groupby
+
+# Most tables pushed together for one party
+COMBINATION_MAX_TABLES = 4
+
+
+def cheapest_combination(free_tables, number_of_guests,
+                         max_tables=COMBINATION_MAX_TABLES):
+    """
+    Return the cheapest set of free tables from a single combination group
+    that seats the party, largest table first, or None if none does.
+
+    Tables without a group never combine. The answer depends only on the
+    free tables and the party size, so it is memoised on that occupancy
+    state and repeat lookups for the same slot cost a dictionary hit.
+    """
+    state = tuple(sorted(
+        (table.combination_group, table.capacity, table.number, table.pk)
+        for table in free_tables if table.combination_group
+    ))
+    pks = _solve(state, number_of_guests, max_tables)
+    if pks is None:
+        return None
+    by_pk = {table.pk: table for table in free_tables}
+    return sorted((by_pk[pk] for pk in pks),
+                  key=lambda table: (-table.capacity, table.number))
+
+
+@lru_cache(maxsize=1024)
+def _solve(state, number_of_guests, max_tables):
+    best = best_cost = None
+    for _, group in groupby(state, key=lambda entry: entry[0]):
+        group = [entry[1:] for entry in group]
+        found = _solve_group(group, number_of_guests, max_tables)
+        if found is None:
+            continue
+        count, seats, numbers, pks = found
+        cost = (count, seats - number_of_guests, numbers)
+        if best_cost is None or cost < best_cost:
+            best, best_cost = pks, cost
+    return best
+
+
+def _solve_group(tables, number_of_guests, max_tables):
+    """
+    0/1 knapsack over seat totals. ``reach[seats]`` keeps the cheapest
+    (table count, table numbers, pks) reaching exactly that many seats.
+    A cheapest combination never exceeds the party by a whole table, so
+    totals are bounded by the party size plus the largest capacity.
+    """
+    limit = number_of_guests + max(capacity for capacity, _, _ in tables)
+    reach = {0: (0, (), ())}
+    for capacity, number, pk in tables:
+        for seats, (count, numbers, pks) in sorted(
+                reach.items(), reverse=True):
+            total = seats + capacity
+            if total >= limit or count == max_tables:
+                continue
+            candidate = (count + 1, tuple(sorted(numbers + (number,))),
+                         pks + (pk,))
+            if total not in reach or candidate[:2] < reach[total][:2]:
+                reach[total] = candidate
+
+    best = None
+    for seats, (count, numbers, pks) in reach.items():
+        if seats < number_of_guests:
+            continue
+        found = (count, seats, list(numbers), pks)
+        if best is None or (count, seats, list(numbers)) < best[:3]:
+            best = found
+    return best
@@ -0,0 +1,75 @@
+# Sweeper moving confirmed bookings whose time is over to "completed", so
+# the active-booking queries stop reading them. It works in small batches,
+# each its own short transaction that skips rows locked by a concurrent
+# edit, so it can run every few minutes during service.
+
+# Standard library imports
+import time
+
+# Django imports
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+# Local application imports
+from .bulk_status import status_changed
+from .models import Booking
+
+# Bookings completed per transaction
+COMPLETION_BATCH_SIZE = 200
+
+
+def past_confirmed_bookings(cutoff):
+    """
+    Confirmed bookings that ended by ``cutoff``, in (ends_at, id) order
+    as served by the booking_confirmed_ends_idx index.
+    """
+    return Booking.objects.filter(
+        status='confirmed', ends_at__lte=cutoff
+    ).order_by('ends_at', 'pk')
+
+
+def complete_batch(cutoff, after=None, batch_size=COMPLETION_BATCH_SIZE):
+    """
+    Complete the next batch of past confirmed bookings after the
+    ``(ends_at, id)`` keyset cursor ``after``. Returns the number completed
+    and the cursor to continue from (None when none were left).
+    """
+    bookings = past_confirmed_bookings(cutoff)
+    if after is not None:
+        ends_at, pk = after
+        bookings = bookings.filter(
+            Q(ends_at__gt=ends_at) | Q(ends_at=ends_at, pk__gt=pk))
+
+    with transaction.atomic():
+        # Rows being edited right now are left for the next run
+        rows = list(bookings.select_for_update(
+            skip_locked=True, of=('self',))[:batch_size])
+        if not rows:
+            return 0, None
+        updated_at = timezone.now()
+        for row in rows:
+            row.status, row.updated_at = 'completed', updated_at
+        Booking.objects.bulk_update(rows, ['status', 'updated_at'])
+        status_changed(rows)
+    return len(rows), (rows[-1].ends_at, rows[-1].pk)
+
+
+def complete_past_bookings(cutoff=None, batch_size=COMPLETION_BATCH_SIZE,
+                           pause=0):
+    """
+    Complete every confirmed booking that ended by ``cutoff`` (default
+    now), ``batch_size`` at a time, sleeping ``pause`` seconds between
+    batches. Yields the number completed by each batch.
+    """
+    cutoff = cutoff or timezone.now()
+    after = None
+    while True:
+        completed, after = complete_batch(cutoff, after, batch_size)
+        if after is None:
+            return
+        yield completed
+        if completed < batch_size:
+            return
+        if pause:
+            time.sleep(pause)
@@ -0,0 +1,138 @@
+# Conditional GET (ETag) for the availability and booking list views. The
+# booking list reads the database directly, so its tag comes from cheap
+# aggregates over the user's rows and an unchanged page gets a 304 before
+# any template is rendered. Availability answers come from per-process
+# sources (the occupancy index, the availability cache) that can lag the
+# database, so their tag is a hash of the body actually served. No
+# Last-Modified is sent: deleted bookings and table edits leave no
+# timestamp behind, so a date alone would answer If-Modified-Since with a
+# wrong 304.
+
+# Standard library imports
+import hashlib
+from functools import wraps
+
+# Third-party imports
+from asgiref.sync import iscoroutinefunction, sync_to_async
+
+# Django imports
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+
+# Local application imports
+from .models import Booking, WaitlistEntry
+from .occupancy import current_slot_key
+
+
+def slice_state(queryset):
+    """Return ``(row count, latest updated_at)`` of a queryset."""
+    state = queryset.aggregate(count=Count('pk'), latest=Max('updated_at'))
+    return state['count'], state['latest']
+
+
+def my_bookings_validators(request):
+    """
+    ETag parts for ``my_bookings``: the user's bookings and waitlist
+    entries, plus the current slot since bookings move from upcoming to
+    past as time goes by. The page embeds a CSRF token, so the tag also
+    changes when the CSRF cookie does (e.g. after logging in again).
+    """
+    if not request.user.is_authenticated:
+        return None
+    bookings = slice_state(Booking.objects.filter(user=request.user))
+    entries = slice_state(WaitlistEntry.objects.filter(user=request.user))
+    return [
+        request.user.pk,
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME),
+        bookings,
+        entries,
+        current_slot_key(),
+    ]
+
+
+def _evaluate(validators, request, *args, **kwargs):
+    """Return the ETag, or None."""
+    # A page with one-off messages waiting must be rendered to show them
+    if len(get_messages(request)):
+        return None
+    parts = validators(request, *args, **kwargs)
+    if parts is None:
+        return None
+    digest = hashlib.md5(
+        repr(parts).encode(), usedforsecurity=False).hexdigest()
+    return quote_etag(digest)
+
+
+def _add_etag(request, response, etag):
+    if request.method in ('GET', 'HEAD') and etag:
+        response.headers.setdefault('ETag', etag)
+    return response
+
+
+def conditional_view(validators):
+    """
+    Like Django's ``condition`` decorator with only an ETag, which comes
+    from a ``validators(request, *args, **kwargs)`` call returning the
+    parts to hash or None to skip. Async views are supported (the
+    validators then run in a worker thread).
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                etag = await sync_to_async(_evaluate)(
+                    validators, request, *args, **kwargs)
+                response = get_conditional_response(request, etag=etag)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _add_etag(request, response, etag)
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            etag = _evaluate(validators, request, *args, **kwargs)
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _add_etag(request, response, etag)
+        return wrapper
+    return decorator
+
+
+def _payload_response(request, response):
+    # Only complete, successful bodies are tagged
+    if (request.method not in ('GET', 'HEAD') or response.status_code != 200
+            or response.streaming):
+        return response
+    digest = hashlib.md5(
+        response.content, usedforsecurity=False).hexdigest()
+    response.headers['ETag'] = quote_etag(digest)
+    return get_conditional_response(
+        request, etag=response.headers['ETag'], response=response)
+
+
+def payload_conditional_view(view):
+    """
+    Conditional GET for views whose body may come from a per-process
+    source: the view always runs and the ETag is a hash of its body, so
+    a 304 is only sent when the client holds exactly what would be
+    served. Async views are supported.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            response = await view(request, *args, **kwargs)
+            return _payload_response(request, response)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        return _payload_response(request, view(request, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,117 @@
+# Staff dashboard statistics, computed with one conditional-aggregation
+# query over the bookings from today onward and cached for a short time.
+# Booking and table changes drop the cached copy once they commit; the TTL
+# bounds how stale a copy cached by another worker process can get.
+
+# Django imports
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, IntegerField, Q, Subquery, Sum, Value
+from django.utils import timezone
+
+# Local application imports
+from .availability import CLOSING_TIME, OPENING_TIME
+from .models import Booking, Table
+from .queries import dashboard_bookings
+
+
+class TableTotal(Subquery):
+    """
+    Scalar subquery totalling a Table expression. It is flagged as an
+    aggregate so it can share an ``aggregate()`` call, and therefore a
+    single query, with the booking counts.
+    """
+    contains_aggregate = True
+
+    def __init__(self, expression):
+        super().__init__(
+            Table.objects.order_by().annotate(
+                everything=Value(1)
+            ).values('everything').annotate(
+                total=Sum(expression)
+            ).values('total'),
+            output_field=IntegerField(),
+        )
+
+
+def service_hours():
+    """Return the hours in which bookings can start."""
+    return range(OPENING_TIME.hour, CLOSING_TIME.hour + 1)
+
+
+def percentage(part, whole):
+    return round(100 * part / whole, 1) if whole else 0.0
+
+
+def compute_stats(today):
+    """
+    Return the dashboard statistics as of the given date from one query:
+    upcoming active and confirmed-today counts, table and seat totals,
+    today's covers (guests of bookings that are not cancelled) by starting
+    hour, and seat utilization, i.e. covers over available seat-hours.
+    """
+    seated_today = Q(booking_date=today) & ~Q(status='cancelled')
+    row = dashboard_bookings(today).aggregate(
+        upcoming_active_bookings_count=Count(
+            'pk', filter=Q(status__in=Booking.ACTIVE_STATUSES)),
+        confirmed_today_count=Count(
+            'pk', filter=Q(booking_date=today, status='confirmed')),
+        total_tables=TableTotal(Value(1)),
+        total_seats=TableTotal('capacity'),
+        **{
+            f'covers_{hour}': Sum(
+                'number_of_guests',
+                filter=seated_today & Q(booking_time__hour=hour))
+            for hour in service_hours()
+        },
+    )
+
+    total_seats = row['total_seats'] or 0
+    covers_per_hour = [
+        {
+            'hour': f'{hour:02d}:00',
+            'covers': row[f'covers_{hour}'] or 0,
+            'utilization': percentage(
+                row[f'covers_{hour}'] or 0, total_seats),
+        }
+        for hour in service_hours()
+    ]
+    covers_today = sum(hour['covers'] for hour in covers_per_hour)
+    return {
+        'upcoming_active_bookings_count':
+            row['upcoming_active_bookings_count'],
+        'confirmed_today_count': row['confirmed_today_count'],
+        'total_tables': row['total_tables'] or 0,
+        'total_seats': total_seats,
+        'covers_today': covers_today,
+        'covers_per_hour': covers_per_hour,
+        'seat_utilization': percentage(
+            covers_today, total_seats * len(covers_per_hour)),
+    }
+
+
+def _cache_key(today):
+    return f'dashboard-stats:{today.isoformat()}'
+
+
+def dashboard_stats(today, fresh=False):
+    """
+    Return the dashboard statistics as of the given date, from the cache
+    unless ``fresh`` is set. Fresh statistics replace the cached copy.
+    """
+    ttl = settings.BOOKINGS_DASHBOARD_CACHE_TTL
+    if not ttl:
+        return compute_stats(today)
+
+    stats = None if fresh else cache.get(_cache_key(today))
+    if stats is None:
+        stats = compute_stats(today)
+        cache.set(_cache_key(today), stats, ttl)
+    return stats
+
+
+def invalidate():
+    """Drop the cached statistics once the current transaction commits."""
+    transaction.on_commit(
+        lambda: cache.delete(_cache_key(timezone.now().date())))
@@ -3,12 +3,14 @@ from datetime import date, time, timedelta, datetime
 
 # Third-party imports
 from django import forms
+from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 
 # Local application imports
-from .models import Booking, Table
+from .availability import find_available_tables
+from .models import Booking, Table, WaitlistEntry
 
 
 class CustomUserCreationForm(UserCreationForm):
@@ -91,6 +93,15 @@ class BookingForm(forms.ModelForm):
         return cleaned_data
 
 
+class WaitlistForm(BookingForm):
+    """
+    Form for joining the waitlist for a full time slot, with the same
+    fields and validation as a booking.
+    """
+    class Meta(BookingForm.Meta):
+        model = WaitlistEntry
+
+
 class AvailabilityForm(forms.Form):
     """
     Form for checking table availability based on date, time, and guest count.
@@ -147,6 +158,47 @@ class AvailabilityForm(forms.Form):
         return cleaned_data
 
 
+class AvailabilityGridForm(AvailabilityForm):
+    """
+    Availability form for a whole service day: date and guest count only.
+    """
+    check_time = None
+
+    def clean(self):
+        """
+        Ensures the selected date is not in the past.
+        """
+        cleaned_data = super().clean()
+        check_date = cleaned_data.get('check_date')
+
+        if check_date and check_date < timezone.localdate():
+            raise forms.ValidationError(
+                "You cannot check availability for a past date.")
+
+        return cleaned_data
+
+
+class AvailabilityCalendarForm(AvailabilityGridForm):
+    """
+    Availability form for a range of days starting at the selected date.
+    """
+    days = forms.IntegerField(
+        label='Number of Days',
+        min_value=1,
+        max_value=settings.BOOKINGS_CALENDAR_MAX_DAYS,
+        required=False,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
+        initial=30
+    )
+
+    def clean_days(self):
+        """
+        Defaults the range to the initial number of days when omitted.
+        """
+        days = self.cleaned_data.get('days')
+        return days or self.fields['days'].initial
+
+
 class BookingStatusUpdateForm(forms.ModelForm):
     """
     Form for staff to update the status and notes of a booking.
@@ -168,11 +220,133 @@ class BookingStatusUpdateForm(forms.ModelForm):
             'notes': 'Staff Notes (Internal)',
         }
 
+    def clean_status(self):
+        """
+        Re-activating a cancelled or completed booking needs its tables
+        to still be free: another booking may have taken the slot since.
+        """
+        status = self.cleaned_data['status']
+        booking = self.instance
+        if (booking.pk is None
+                or status not in Booking.ACTIVE_STATUSES
+                or booking.status in Booking.ACTIVE_STATUSES):
+            return status
+
+        table_ids = {booking.table_id, *booking.combined_tables.values_list(
+            'table_id', flat=True)}
+        free = set(find_available_tables(
+            booking.booking_date, booking.booking_time, 1,
+            exclude_booking=booking,
+        ).filter(pk__in=table_ids).values_list('pk', flat=True))
+        taken = Table.objects.filter(
+            pk__in=table_ids - free).order_by('number')
+        if taken:
+            raise forms.ValidationError(
+                "Table(s) %(tables)s have been booked for this time since; "
+                "the booking cannot be made %(status)s again.",
+                params={
+                    'tables': ', '.join(str(t.number) for t in taken),
+                    'status': status,
+                })
+        return status
+
+
+class BookingFilterForm(forms.Form):
+    """
+    The staff booking list filters: keyword, status and booking date.
+    """
+    q = forms.CharField(required=False)
+    status = forms.ChoiceField(
+        choices=[('', 'All')] + list(Booking.BOOKING_STATUS_CHOICES),
+        required=False)
+    date = forms.DateField(required=False)
+
+
+class BookingExportForm(BookingFilterForm):
+    """
+    Form for the staff booking export: the booking list filters plus a
+    date range and the output format.
+    """
+    format = forms.ChoiceField(
+        choices=[('csv', 'CSV'), ('json', 'JSON')], required=False)
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+
+    def clean_format(self):
+        """
+        Defaults the format to CSV when omitted.
+        """
+        return self.cleaned_data.get('format') or 'csv'
+
+    def clean(self):
+        """
+        Ensures the date range does not end before it starts.
+        """
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+
+        if date_from and date_to and date_from > date_to:
+            raise forms.ValidationError(
+                "The end of the date range cannot be before its start.")
+
+        return cleaned_data
+
+
+class BookingBulkStatusForm(BookingFilterForm):
+    """
+    Form for staff to move many bookings to a new status at once: the
+    selected bookings, or every booking matching the list filters that
+    can make the move.
+    """
+    new_status = forms.ChoiceField(
+        choices=[
+            ('confirmed', 'Confirm'),
+            ('cancelled', 'Cancel'),
+            ('completed', 'Mark completed'),
+        ],
+        label='Action'
+    )
+    bookings = forms.ModelMultipleChoiceField(
+        # Extra tables of a combination follow their party's booking
+        queryset=Booking.objects.filter(combined_with=None),
+        required=False
+    )
+    all_matching = forms.BooleanField(required=False)
+
+    def clean(self):
+        """
+        Ensures bookings were selected and that each selected booking can
+        move to the new status.
+        """
+        cleaned_data = super().clean()
+        new_status = cleaned_data.get('new_status')
+        bookings = cleaned_data.get('bookings')
+
+        if cleaned_data.get('all_matching') or not new_status:
+            return cleaned_data
+        if not bookings:
+            raise forms.ValidationError("Select at least one booking.")
+
+        allowed = Booking.BULK_STATUS_TRANSITIONS[new_status]
+        refused = [
+            booking for booking in bookings if booking.status not in allowed
+        ]
+        if refused:
+            raise forms.ValidationError(
+                "These bookings cannot be marked %(status)s: %(ids)s.",
+                params={
+                    'status': new_status,
+                    'ids': ', '.join(f'#{booking.pk}' for booking in refused),
+                })
+
+        return cleaned_data
+
 
 class TableForm(forms.ModelForm):
     """
     Form for staff to create or update table
-    details including number and capacity.
+    details including number, capacity and combination group.
     """
     number = forms.IntegerField(
         min_value=1,
@@ -184,7 +358,14 @@ class TableForm(forms.ModelForm):
         widget=forms.NumberInput(attrs={'class': 'form-control', 'min': 1}),
         label='Seating Capacity'
     )
+    combination_group = forms.CharField(
+        max_length=20,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control'}),
+        label='Combination Group',
+        help_text='Tables with the same group can be joined for large parties.'
+    )
 
     class Meta:
         model = Table
-        fields = ['number', 'capacity']
+        fields = ['number', 'capacity', 'combination_group']
@@ -0,0 +1,158 @@
+# Booking change notifications for the live staff dashboard. A change is
+# published from the Booking signals and delivered to every open dashboard
+# stream once its transaction commits. On PostgreSQL changes go through
+# NOTIFY so streams served by other worker processes hear about them too;
+# elsewhere they only reach streams in the same process.
+
+# Standard library imports
+import asyncio
+import json
+import logging
+import select
+import threading
+
+# Django imports
+from django.db import connection, transaction
+
+# Channel used for NOTIFY / LISTEN on PostgreSQL
+CHANNEL = 'booking_changes'
+
+# Changes buffered per stream before further ones are dropped
+SUBSCRIBER_BUFFER = 100
+
+# Seconds the listener waits per poll, and before reconnecting on errors
+LISTEN_TIMEOUT = 5
+
+logger = logging.getLogger(__name__)
+
+
+def booking_change(booking, action):
+    """Describe a saved or deleted booking for the dashboard streams."""
+    return {
+        'action': action,
+        'id': booking.pk,
+        'status': booking.status,
+        'booking_date': booking.booking_date.isoformat(),
+        'booking_time': booking.booking_time.strftime('%H:%M'),
+        'number_of_guests': booking.number_of_guests,
+    }
+
+
+class ChangeNotifier:
+    """
+    Per-process fan-out of booking changes to asyncio queues, one per open
+    dashboard stream. On PostgreSQL a listener thread, started with the
+    first subscriber, relays NOTIFY payloads from every process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._listener = None
+
+    @property
+    def uses_notify(self):
+        return connection.vendor == 'postgresql'
+
+    def subscribe(self):
+        """Return a queue that receives every change from now on."""
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        if self.uses_notify:
+            self._start_listener()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def publish(self, change):
+        """
+        Send a change to the subscribers once the current transaction
+        commits; nothing is sent if it rolls back.
+        """
+        self.publish_many([change])
+
+    def publish_many(self, changes):
+        """``publish`` for a batch of changes, in one round trip."""
+        if not changes:
+            return
+        if self.uses_notify:
+            # NOTIFY is itself held back until the transaction commits
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT pg_notify(%s, change) FROM unnest(%s) AS change',
+                    [CHANNEL, [json.dumps(change) for change in changes]])
+        else:
+            def deliver_all():
+                for change in changes:
+                    self.deliver(change)
+            transaction.on_commit(deliver_all)
+
+    def deliver(self, change):
+        """Hand a change to every subscriber of this process."""
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._put, queue, change)
+            except RuntimeError:
+                # The stream's event loop has gone away
+                self.unsubscribe(queue)
+
+    @staticmethod
+    def _put(queue, change):
+        # A stream this far behind refreshes its counts on the next change
+        if not queue.full():
+            queue.put_nowait(change)
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener is not None:
+                return
+            stop = threading.Event()
+            thread = threading.Thread(
+                target=self._listen, args=(stop,),
+                name='booking-change-listener', daemon=True)
+            self._listener = (thread, stop)
+        thread.start()
+
+    def stop_listener(self):
+        """
+        Stop the NOTIFY listener and close its connection, waiting up to
+        one poll for it. The next subscriber starts a new one.
+        """
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is None:
+            return
+        thread, stop = listener
+        stop.set()
+        thread.join(LISTEN_TIMEOUT + 1)
+
+    def _listen(self, stop):
+        # A dedicated connection, since Django's are bound to their thread
+        while not stop.is_set():
+            listener = None
+            try:
+                listener = connection.get_new_connection(
+                    connection.get_connection_params())
+                listener.autocommit = True
+                with listener.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                while not stop.is_set():
+                    select.select([listener], [], [], LISTEN_TIMEOUT)
+                    listener.poll()
+                    while listener.notifies:
+                        notify = listener.notifies.pop(0)
+                        self.deliver(json.loads(notify.payload))
+            except Exception:
+                logger.exception("Booking change listener failed")
+                stop.wait(LISTEN_TIMEOUT)
+            finally:
+                if listener is not None:
+                    listener.close()
+
+
+change_notifier = ChangeNotifier()
@@ -0,0 +1,45 @@
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Local application imports
+from bookings.archive import (
+    ARCHIVE_BATCH_SIZE,
+    archive_cutoff,
+    archive_old_bookings,
+)
+
+
+class Command(BaseCommand):
+    """
+    Move bookings older than the archive horizon (settings
+    BOOKINGS_ARCHIVE_AFTER_DAYS) to the BookingArchive table.
+
+    Meant to run daily (cron, Heroku Scheduler): each batch is a short
+    transaction of its own and bookings locked by a concurrent edit are
+    left for the next run.
+    """
+    help = "Archive bookings older than the archive horizon, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=ARCHIVE_BATCH_SIZE,
+            help="Bookings archived per transaction.")
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help="Seconds to wait between batches.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        cutoff = archive_cutoff()
+        archived = batches = 0
+        for count in archive_old_bookings(
+                cutoff, batch_size=options['batch_size'],
+                pause=options['pause']):
+            archived += count
+            batches += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} booking(s) dated before {cutoff} "
+            f"in {batches} batch(es)."))
@@ -0,0 +1,207 @@
+# Standard library imports
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from http.cookiejar import CookieJar
+from pathlib import Path
+from urllib.error import URLError
+from urllib.parse import urlencode
+from urllib.request import (
+    HTTPCookieProcessor, HTTPRedirectHandler, Request, build_opener)
+
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from django.utils import timezone
+
+
+def process_tree_rss(pid):
+    """
+    Return the resident memory in MB of a process and its children (a
+    gunicorn master and its workers), read from /proc. None elsewhere.
+    """
+    proc = Path('/proc')
+    if not (proc / str(pid)).exists():
+        return None
+
+    rss_kb, children = {}, {}
+    for status in proc.glob('[0-9]*/status'):
+        try:
+            fields = dict(
+                line.split(':', 1)
+                for line in status.read_text().splitlines())
+        except (OSError, ValueError):
+            continue
+        process, parent = int(fields['Pid']), int(fields['PPid'])
+        rss_kb[process] = int(fields.get('VmRSS', '0 kB').split()[0])
+        children.setdefault(parent, []).append(process)
+
+    total_kb, pending = 0, [pid]
+    while pending:
+        process = pending.pop()
+        total_kb += rss_kb.get(process, 0)
+        pending.extend(children.get(process, ()))
+    return total_kb / 1024
+
+
+class NoRedirects(HTTPRedirectHandler):
+    """Surface redirects as errors instead of following them."""
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def log_in(base_url, username, password):
+    """
+    Sign in through the login page and return the session cookies as a
+    Cookie header, plus the CSRF token for later POSTs.
+    """
+    jar = CookieJar()
+    opener = build_opener(HTTPCookieProcessor(jar))
+    login_url = base_url + reverse('login')
+    opener.open(login_url, timeout=30).read()
+    csrf_token = next(
+        (cookie.value for cookie in jar if cookie.name == 'csrftoken'), '')
+    opener.open(Request(
+        login_url,
+        data=urlencode({
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': csrf_token,
+        }).encode(),
+        headers={'Referer': login_url},
+    ), timeout=30).read()
+
+    cookies = {cookie.name: cookie.value for cookie in jar}
+    if 'sessionid' not in cookies:
+        raise CommandError(f"Could not log in as {username}.")
+    cookie_header = '; '.join(
+        f"{name}={value}" for name, value in cookies.items())
+    return cookie_header, cookies['csrftoken']
+
+
+class Command(BaseCommand):
+    """
+    Load-test the availability endpoints of a running server.
+
+    The JSON grid and calendar endpoints are always included. With
+    --username and --password the command also signs in and mixes in the
+    HTML check_availability form (POSTed) and my_bookings pages.
+
+    Start the app under each profile with the same number of workers, e.g.
+    ``gunicorn restaurant_booking_project.wsgi -w 2`` and then
+    ``gunicorn restaurant_booking_project.asgi:application -w 2
+    -k uvicorn.workers.UvicornWorker``, and run this command against each.
+    Requests per second, latency percentiles and (with --pid) the server's
+    resident memory are reported so the two can be compared at a fixed
+    worker count and memory budget.
+    """
+    help = "Benchmark availability endpoint throughput of a running server."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default='http://127.0.0.1:8000',
+            help="Base URL of the running server.")
+        parser.add_argument(
+            '--concurrency', type=int, default=50,
+            help="Requests in flight at once.")
+        parser.add_argument(
+            '--requests', type=int, default=2000,
+            help="Total requests to send.")
+        parser.add_argument(
+            '--guests', type=int, default=2,
+            help="Party size to query availability for.")
+        parser.add_argument(
+            '--pid', type=int,
+            help="Server master process id, to report its memory (Linux).")
+        parser.add_argument(
+            '--username',
+            help="Account to sign in as for the HTML pages.")
+        parser.add_argument(
+            '--password',
+            help="Password of the --username account.")
+
+    def handle(self, *args, **options):
+        base_url = options['url'].rstrip('/')
+        total = options['requests']
+        if total < 1 or options['concurrency'] < 1:
+            raise CommandError(
+                "--requests and --concurrency must be at least 1.")
+
+        if bool(options['username']) != bool(options['password']):
+            raise CommandError(
+                "--username and --password must be given together.")
+        headers, csrf_token = {}, None
+        if options['username']:
+            try:
+                cookie_header, csrf_token = log_in(
+                    base_url, options['username'], options['password'])
+            except (URLError, OSError) as error:
+                raise CommandError(f"Could not log in: {error}")
+            headers['Cookie'] = cookie_header
+
+        # Spread requests over the coming week so caching is exercised
+        # the way real traffic would. Each entry is a path and, for the
+        # form, its POST body.
+        today = timezone.localdate()
+        requests = []
+        for offset in range(1, 8):
+            day = (today + timedelta(days=offset)).isoformat()
+            query = f"check_date={day}&num_guests={options['guests']}"
+            requests.append((f"{reverse('availability_grid')}?{query}", None))
+            requests.append(
+                (f"{reverse('availability_calendar')}?{query}&days=7", None))
+            if csrf_token:
+                requests.append((reverse('check_availability'), urlencode({
+                    'check_date': day,
+                    'check_time': '19:00',
+                    'num_guests': options['guests'],
+                    'csrfmiddlewaretoken': csrf_token,
+                }).encode()))
+                requests.append((reverse('my_bookings'), None))
+
+        # Redirects are not followed, so a lost session shows up as an
+        # error rather than as a fast login page
+        opener = build_opener(NoRedirects)
+
+        def fetch(number):
+            path, data = requests[number % len(requests)]
+            request = Request(
+                base_url + path, data=data,
+                headers={**headers, 'Referer': base_url + path})
+            started = time.perf_counter()
+            try:
+                with opener.open(request, timeout=30) as response:
+                    response.read()
+                    ok = response.status == 200
+            except (URLError, OSError):
+                ok = False
+            return ok, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            results = list(pool.map(fetch, range(total)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for ok, latency in results if ok)
+        errors = total - len(latencies)
+        if not latencies:
+            raise CommandError(f"All {total} requests to {base_url} failed.")
+
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1,
+                                 int(len(latencies) * fraction))] * 1000
+
+        self.stdout.write(
+            f"Requests: {total} ({errors} errors), "
+            f"concurrency {options['concurrency']}")
+        self.stdout.write(f"Throughput: {total / elapsed:.1f} req/s")
+        self.stdout.write(
+            f"Latency: mean {statistics.mean(latencies) * 1000:.1f} ms, "
+            f"p50 {percentile(0.5):.1f} ms, p95 {percentile(0.95):.1f} ms")
+        if options['pid']:
+            rss = process_tree_rss(options['pid'])
+            if rss is None:
+                self.stdout.write("Server memory: unavailable")
+            else:
+                self.stdout.write(f"Server memory: {rss:.1f} MB RSS")
@@ -0,0 +1,117 @@
+# Standard library imports
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import time as clock_time, timedelta
+
+# Django imports
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.utils import timezone
+
+# Local application imports
+from bookings.availability import allocate_table
+from bookings.models import Booking, Table
+
+
+class Command(BaseCommand):
+    """
+    Measure booking throughput and error rate when many requests compete
+    for the same slot at once.
+
+    Every round starts N threads behind a barrier, each booking the same
+    date and time through the table allocator. Bookings are made for a
+    temporary user on dates ten years ahead and removed afterwards.
+    """
+    help = "Benchmark concurrent table allocation for the same slot."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threads', type=int, default=8,
+            help="Parallel bookers per round.")
+        parser.add_argument(
+            '--rounds', type=int, default=20,
+            help="Number of contended slots to book.")
+        parser.add_argument(
+            '--guests', type=int, default=2,
+            help="Party size of every booking.")
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        rounds = options['rounds']
+        guests = options['guests']
+
+        fitting_tables = Table.objects.filter(capacity__gte=guests).count()
+        if not fitting_tables:
+            raise CommandError(
+                f"No tables seat {guests} guests; add tables first.")
+
+        user = User.objects.create_user(
+            username=f"contention-benchmark-{uuid.uuid4().hex[:8]}")
+        first_date = timezone.localdate() + timedelta(days=3650)
+        outcomes = Counter()
+        outcomes_lock = threading.Lock()
+
+        def book(booking_date, barrier):
+            try:
+                barrier.wait()
+                booking = Booking(
+                    user=user,
+                    booking_date=booking_date,
+                    booking_time=clock_time(19, 0),
+                    number_of_guests=guests,
+                    status='confirmed',
+                )
+                try:
+                    table = allocate_table(booking)
+                    outcome = 'booked' if table is not None else 'full'
+                except Exception:
+                    outcome = 'error'
+                with outcomes_lock:
+                    outcomes[outcome] += 1
+            finally:
+                connection.close()
+
+        try:
+            started = time.perf_counter()
+            for round_number in range(rounds):
+                booking_date = first_date + timedelta(days=round_number)
+                barrier = threading.Barrier(threads)
+                workers = [
+                    threading.Thread(target=book, args=(booking_date, barrier))
+                    for _ in range(threads)
+                ]
+                for worker in workers:
+                    worker.start()
+                for worker in workers:
+                    worker.join()
+            elapsed = time.perf_counter() - started
+
+            # Every booking is at the same time, so two on one table overlap
+            double_booked = Booking.objects.filter(
+                user=user, status__in=Booking.ACTIVE_STATUSES,
+            ).values('table', 'booking_date').annotate(
+                bookings=Count('id')).filter(bookings__gt=1).count()
+        finally:
+            user.delete()
+
+        attempts = threads * rounds
+        expected = rounds * min(threads, fitting_tables)
+        self.stdout.write(
+            f"Backend: {connection.vendor}, {threads} threads x "
+            f"{rounds} rounds, {fitting_tables} fitting tables")
+        self.stdout.write(
+            f"Throughput: {attempts / elapsed:.1f} booking attempts/s "
+            f"({elapsed:.2f}s total)")
+        self.stdout.write(
+            f"Booked: {outcomes['booked']}/{expected} possible, "
+            f"no table: {outcomes['full']}, errors: {outcomes['error']} "
+            f"({100 * outcomes['error'] / attempts:.1f}%)")
+        if double_booked:
+            self.stdout.write(self.style.ERROR(
+                f"Double-booked tables: {double_booked}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("No double bookings."))
@@ -0,0 +1,37 @@
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Local application imports
+from bookings.completion import COMPLETION_BATCH_SIZE, complete_past_bookings
+
+
+class Command(BaseCommand):
+    """
+    Mark confirmed bookings whose time is over as completed.
+
+    Meant to run every few minutes (cron, Heroku Scheduler) including
+    during service: each batch is a short transaction of its own and
+    bookings locked by a concurrent edit are left for the next run.
+    """
+    help = "Complete confirmed bookings that have ended, in small batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=COMPLETION_BATCH_SIZE,
+            help="Bookings completed per transaction.")
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help="Seconds to wait between batches.")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        completed = batches = 0
+        for count in complete_past_bookings(
+                batch_size=options['batch_size'], pause=options['pause']):
+            completed += count
+            batches += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Completed {completed} past booking(s) in {batches} batch(es)."))
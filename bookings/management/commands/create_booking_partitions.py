@@ -0,0 +1,47 @@
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+# Local application imports
+from bookings.partitions import (
+    PARTITION_MONTHS_AHEAD,
+    create_partitions,
+    month_start,
+    uses_partitions,
+)
+
+
+class Command(BaseCommand):
+    """
+    Create the monthly partitions of the Booking table ahead of time.
+
+    Meant to run monthly (cron, Heroku Scheduler). Bookings made for
+    months past the last partition are kept in the default partition
+    until their month is created. Does nothing on databases where the
+    table is not partitioned.
+    """
+    help = "Pre-create monthly Booking partitions (PostgreSQL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months', type=int, default=PARTITION_MONTHS_AHEAD,
+            help="Months after the current one to create partitions for.")
+
+    def handle(self, *args, **options):
+        if options['months'] < 0:
+            raise CommandError("--months cannot be negative.")
+        if not uses_partitions():
+            self.stdout.write(
+                "The booking table is not partitioned on this database; "
+                "nothing to do.")
+            return
+
+        this_month = month_start(timezone.localdate())
+        last_month = month_start(this_month, options['months'])
+        created = create_partitions(this_month, last_month)
+
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(created)} partition(s); partitions exist up to "
+            f"{last_month:%Y-%m}."))
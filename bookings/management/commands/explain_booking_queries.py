@@ -0,0 +1,77 @@
+# Standard library imports
+from datetime import time
+
+# Django imports
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+# Local application imports
+from bookings.archive import (
+    ARCHIVE_BATCH_SIZE,
+    archivable_bookings,
+    archive_cutoff,
+)
+from bookings.availability import find_available_tables
+from bookings.completion import COMPLETION_BATCH_SIZE, past_confirmed_bookings
+from bookings.models import Table
+from bookings.occupancy import active_booking_rows
+from bookings.queries import (
+    active_bookings_for_table,
+    dashboard_bookings,
+    staff_bookings,
+    user_archived_bookings,
+    user_past_bookings,
+    user_upcoming_bookings,
+)
+
+
+class Command(BaseCommand):
+    """
+    Print the database's EXPLAIN plan for the queries behind each view, so
+    missing or unused indexes show up as full table scans.
+    """
+    help = "Print EXPLAIN plans for the booking views' queries."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help="Run EXPLAIN ANALYZE (PostgreSQL only, executes queries).")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        today = timezone.localdate()
+        user = User(pk=1)
+        table = Table(pk=1)
+
+        queries = [
+            ("availability: free tables",
+             find_available_tables(today, time(19, 0), 2)),
+            ("availability: day occupancy",
+             active_booking_rows(today, today)),
+            ("my_bookings: upcoming", user_upcoming_bookings(user, today)),
+            ("my_bookings: past", user_past_bookings(user, now)),
+            ("my_bookings: archived", user_archived_bookings(user)),
+            ("staff_dashboard: statistics", dashboard_bookings(today)),
+            ("staff_booking_list: all", staff_bookings()),
+            ("staff_booking_list: by date and status",
+             staff_bookings(status='confirmed', booking_date=today)),
+            ("staff_booking_list: keyword search",
+             staff_bookings(query='smith')),
+            ("staff_table_delete: active bookings",
+             active_bookings_for_table(table)),
+            ("complete_past_bookings: batch",
+             past_confirmed_bookings(now)[:COMPLETION_BATCH_SIZE]),
+            ("archive_bookings: batch",
+             archivable_bookings(archive_cutoff(today))[:ARCHIVE_BATCH_SIZE]),
+        ]
+
+        explain_options = {}
+        if options['analyze'] and connection.vendor == 'postgresql':
+            explain_options['analyze'] = True
+
+        for label, queryset in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
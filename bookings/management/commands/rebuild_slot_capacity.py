@@ -0,0 +1,48 @@
+# Standard library imports
+from datetime import date, timedelta
+
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+# Local application imports
+from bookings.slot_capacity import rebuild
+
+
+class Command(BaseCommand):
+    """
+    Recompute the SlotCapacity summary rows from the bookings table.
+
+    Booking signals keep built dates current; run this daily to build
+    the rows for new dates, after table changes (which drop the upcoming
+    rows) and to repair them after bulk changes that bypass signals (raw
+    SQL, QuerySet.update()).
+    """
+    help = "Rebuild the per-slot capacity summary for a range of dates."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start', type=date.fromisoformat,
+            help="First date to rebuild (YYYY-MM-DD, default today).")
+        parser.add_argument(
+            '--days', type=int, default=90,
+            help="Number of dates to rebuild.")
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Rows per bulk INSERT/UPDATE statement.")
+
+    def handle(self, *args, **options):
+        start_date = options['start'] or timezone.localdate()
+        days = options['days']
+        if days < 1:
+            raise CommandError("--days must be at least 1.")
+        end_date = start_date + timedelta(days=days - 1)
+
+        with transaction.atomic():
+            created, updated = rebuild(
+                start_date, end_date, batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Slot capacity for {start_date} to {end_date}: "
+            f"{created} created, {updated} updated."))
@@ -0,0 +1,72 @@
+# Standard library imports
+import time
+from datetime import date, timedelta
+
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, OperationalError
+from django.utils import timezone
+
+# Local application imports
+from bookings.repacking import repack_date
+
+
+class Command(BaseCommand):
+    """
+    Re-pack the confirmed bookings of the coming days across the tables.
+
+    Bookings are allocated greedily as they arrive, which fragments the
+    floor over a day. Run this nightly (e.g. from cron) to move bookings
+    onto the smallest tables that fit so larger tables are free again for
+    later requests. Each date is re-packed in its own transaction; a date
+    whose bookings are being changed, or whose plan clashes with a booking
+    made meanwhile, is rolled back and skipped.
+    """
+    help = "Re-pack upcoming confirmed bookings to reclaim wasted seats."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start', type=date.fromisoformat,
+            help="First date to re-pack (YYYY-MM-DD, default tomorrow).")
+        parser.add_argument(
+            '--days', type=int, default=7,
+            help="Number of dates to re-pack.")
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Report what would change without saving it.")
+
+    def handle(self, *args, **options):
+        start_date = (options['start']
+                      or timezone.localdate() + timedelta(days=1))
+        days = options['days']
+        if days < 1:
+            raise CommandError("--days must be at least 1.")
+
+        total_moved = total_reclaimed = 0
+        started = time.perf_counter()
+        for offset in range(days):
+            booking_date = start_date + timedelta(days=offset)
+            try:
+                moved, reclaimed = repack_date(
+                    booking_date, dry_run=options['dry_run'])
+            except IntegrityError:
+                self.stderr.write(
+                    f"{booking_date}: skipped, a booking made meanwhile "
+                    "took one of the planned tables")
+                continue
+            except OperationalError:
+                self.stderr.write(
+                    f"{booking_date}: skipped, its bookings are being "
+                    "changed; run again later")
+                continue
+            total_moved += moved
+            total_reclaimed += reclaimed
+            self.stdout.write(
+                f"{booking_date}: {moved} bookings moved, "
+                f"{reclaimed} seats reclaimed")
+        elapsed = time.perf_counter() - started
+
+        prefix = "Dry run: " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{total_moved} bookings moved, {total_reclaimed} seats "
+            f"reclaimed over {days} days in {elapsed:.2f}s."))
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.21 on 2026-10-17 17:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0002_alter_booking_created_at_alter_booking_notes_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='booking',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'confirmed'])), fields=('table', 'booking_date', 'booking_time'), name='unique_active_table_slot'),
+        ),
+    ]
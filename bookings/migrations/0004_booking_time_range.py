@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# Booking.DURATION when this migration was written
+BOOKING_DURATION = timedelta(hours=1)
+
+
+def backfill_time_range(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    batch = []
+    for booking in Booking.objects.filter(starts_at__isnull=True).only(
+            'id', 'booking_date', 'booking_time').iterator(chunk_size=2000):
+        booking.starts_at = timezone.make_aware(
+            datetime.combine(booking.booking_date, booking.booking_time))
+        booking.ends_at = booking.starts_at + BOOKING_DURATION
+        batch.append(booking)
+        if len(batch) >= 2000:
+            Booking.objects.bulk_update(batch, ['starts_at', 'ends_at'])
+            batch = []
+    Booking.objects.bulk_update(batch, ['starts_at', 'ends_at'])
+
+
+def active_overlaps(connection):
+    """
+    Return ``(booking id, booking id, table id)`` for every pair of active
+    bookings holding the same table for overlapping periods.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT a.id, b.id, a.table_id "
+            "FROM bookings_booking a JOIN bookings_booking b "
+            "ON b.table_id = a.table_id AND b.id > a.id "
+            "AND b.starts_at < a.ends_at AND a.starts_at < b.ends_at "
+            "WHERE a.status IN ('pending', 'confirmed') "
+            "AND b.status IN ('pending', 'confirmed') "
+            "ORDER BY a.id, b.id"
+        )
+        return cursor.fetchall()
+
+
+def check_no_active_overlaps(apps, schema_editor):
+    """
+    Stop with the clashing bookings named, rather than fail inside ALTER
+    TABLE, when existing data would violate the exclusion added next.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    overlaps = active_overlaps(schema_editor.connection)
+    if overlaps:
+        pairs = ', '.join(
+            f'{first} and {second} (table id {table_id})'
+            for first, second, table_id in overlaps[:20])
+        more = f' and {len(overlaps) - 20} more' if len(overlaps) > 20 else ''
+        raise RuntimeError(
+            f'Cannot add the booking overlap constraint: {len(overlaps)} '
+            f'pair(s) of active bookings hold the same table at '
+            f'overlapping times: bookings {pairs}{more}. Cancel or move one '
+            f'booking of each pair, then run migrate again.'
+        )
+
+
+def add_overlap_exclusion(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    schema_editor.execute(
+        "ALTER TABLE bookings_booking "
+        "ADD CONSTRAINT booking_no_active_overlap "
+        "EXCLUDE USING gist ("
+        "table_id WITH =, tstzrange(starts_at, ends_at, '[)') WITH &&"
+        ") WHERE (status IN ('pending', 'confirmed'))"
+    )
+
+
+def remove_overlap_exclusion(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'ALTER TABLE bookings_booking '
+        'DROP CONSTRAINT IF EXISTS booking_no_active_overlap'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0003_active_booking_unique_slot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='starts_at',
+            field=models.DateTimeField(editable=False, help_text='Start of the period the table is held (derived).', null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='ends_at',
+            field=models.DateTimeField(editable=False, help_text='End of the period the table is held (derived).', null=True),
+        ),
+        migrations.RunPython(backfill_time_range, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='booking',
+            name='starts_at',
+            field=models.DateTimeField(editable=False, help_text='Start of the period the table is held (derived).'),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='ends_at',
+            field=models.DateTimeField(editable=False, help_text='End of the period the table is held (derived).'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'confirmed'])), fields=['table', 'starts_at', 'ends_at'], name='booking_active_range_idx'),
+        ),
+        # The exclusion is only added once the data is known to satisfy it
+        migrations.RunPython(
+            check_no_active_overlaps, migrations.RunPython.noop),
+        migrations.RunPython(add_overlap_exclusion, remove_overlap_exclusion),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.21 on 2026-10-17 18:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_booking_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlotCapacity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slot_date', models.DateField(help_text='Date of the slot.')),
+                ('slot_time', models.TimeField(help_text='Start time of the slot.')),
+                ('remaining_seats', models.IntegerField(help_text='Total capacity of the tables free for the slot.')),
+                ('remaining_tables', models.JSONField(default=dict, help_text='Number of free tables per table capacity.')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'slot capacities',
+                'ordering': ['slot_date', 'slot_time'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='slotcapacity',
+            constraint=models.UniqueConstraint(fields=('slot_date', 'slot_time'), name='unique_slot_capacity'),
+        ),
+    ]
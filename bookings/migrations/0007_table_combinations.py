@@ -0,0 +1,24 @@
+# Generated by Django 4.2.21 on 2026-10-17 18:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0006_slot_capacity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='combined_with',
+            field=models.ForeignKey(blank=True, help_text='Booking whose party is also seated at this table. Set on the extra tables of a combination, which hold no guests themselves.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='combined_tables', to='bookings.booking'),
+        ),
+        migrations.AddField(
+            model_name='table',
+            name='combination_group',
+            field=models.CharField(blank=True, help_text='Tables sharing a group can be pushed together to seat a large party. Leave blank for tables that stand alone.', max_length=20),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.21 on 2026-10-17 18:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0007_table_combinations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('booking_date', models.DateField(help_text='Requested date.')),
+                ('booking_time', models.TimeField(help_text='Requested time.')),
+                ('number_of_guests', models.IntegerField(help_text='Number of guests for the reservation.')),
+                ('notes', models.TextField(blank=True, help_text='Optional special requests.', null=True)),
+                ('status', models.CharField(choices=[('waiting', 'Waiting'), ('promoted', 'Promoted'), ('cancelled', 'Cancelled')], default='waiting', help_text='Current status of the entry.', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('booking', models.OneToOneField(blank=True, help_text='The booking the entry was promoted to.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='bookings.booking')),
+                ('user', models.ForeignKey(help_text='The user waiting for a table.', on_delete=django.db.models.deletion.CASCADE, related_name='waitlist_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'waitlist entries',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(condition=models.Q(('status', 'waiting')), fields=['booking_date', 'booking_time', 'number_of_guests'], name='waitlist_waiting_slot_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='waitlistentry',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'waiting')), fields=('user', 'booking_date', 'booking_time'), name='unique_waiting_entry'),
+        ),
+    ]
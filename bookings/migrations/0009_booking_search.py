@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.db import migrations
+from django.db.utils import OperationalError
+
+# bookings.search.SEARCH_TABLE when this migration was written
+SEARCH_TABLE = 'bookings_booking_search'
+
+
+def add_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        # Match the UPPER(column::text) LIKE form of Django's icontains
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS booking_notes_trgm_idx '
+            'ON bookings_booking USING gin '
+            '(UPPER(("notes")::text) gin_trgm_ops)'
+        )
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS booking_username_trgm_idx '
+            'ON auth_user USING gin '
+            '(UPPER(("username")::text) gin_trgm_ops)'
+        )
+    elif vendor == 'sqlite':
+        try:
+            schema_editor.execute(
+                f'CREATE VIRTUAL TABLE {SEARCH_TABLE} '
+                f"USING fts5(username, notes, tokenize='trigram')"
+            )
+        except OperationalError:
+            # SQLite before 3.34 has no trigram tokenizer; search scans
+            return
+        schema_editor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, username, notes) '
+            f'SELECT b.id, u.username, b.notes FROM bookings_booking b '
+            f'JOIN auth_user u ON u.id = b.user_id'
+        )
+
+
+def remove_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS booking_notes_trgm_idx')
+        schema_editor.execute(
+            'DROP INDEX IF EXISTS booking_username_trgm_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0008_waitlist'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_indexes, remove_search_indexes),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.21 on 2026-10-17 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_booking_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'confirmed')), fields=['ends_at', 'id'], name='booking_confirmed_ends_idx'),
+        ),
+    ]
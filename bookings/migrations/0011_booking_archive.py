@@ -0,0 +1,38 @@
+# Generated by Django 4.2.21 on 2026-10-17 19:22
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('bookings', '0010_confirmed_ends_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingArchive',
+            fields=[
+                ('id', models.BigIntegerField(help_text='Id the booking had while live.', primary_key=True, serialize=False)),
+                ('table_number', models.IntegerField(help_text='Number of the table reserved, when archived.')),
+                ('table_capacity', models.IntegerField(help_text='Capacity of the table reserved, when archived.')),
+                ('combined_table_numbers', models.JSONField(blank=True, default=list, help_text='Numbers of the extra tables of a combination.')),
+                ('booking_date', models.DateField(help_text='The date of the reservation.')),
+                ('booking_time', models.TimeField(help_text='The time of the reservation.')),
+                ('number_of_guests', models.IntegerField(help_text='Number of guests for the reservation.')),
+                ('notes', models.TextField(blank=True, help_text='Optional special requests.', null=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('cancelled', 'Cancelled'), ('completed', 'Completed')], help_text='Status of the booking when archived.', max_length=20)),
+                ('created_at', models.DateTimeField(help_text='Timestamp when booking was created.')),
+                ('updated_at', models.DateTimeField(help_text='Timestamp when booking was last updated.')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, help_text='Timestamp when booking was archived.')),
+                ('user', models.ForeignKey(help_text='The user who made the booking.', on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['booking_date', 'booking_time'],
+                'indexes': [models.Index(fields=['user', 'booking_date', 'booking_time'], name='archive_user_date_idx')],
+            },
+        ),
+    ]
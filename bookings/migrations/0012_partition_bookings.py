@@ -0,0 +1,177 @@
+# Generated by Django 4.2.21 on 2026-10-17 19:30
+
+import re
+from datetime import date
+
+from django.db import migrations
+from django.utils import timezone
+
+TABLE = 'bookings_booking'
+# Holds every booking id, so foreign keys to a booking keep a unique
+# column to reference once bookings_booking's key includes booking_date
+KEY_TABLE = 'bookings_booking_key'
+# bookings.partitions.PARTITION_MONTHS_AHEAD when this migration was written
+PARTITION_MONTHS_AHEAD = 12
+# Active booking overlap exclusion of migration 0004
+OVERLAP_EXCLUSION = (
+    "EXCLUDE USING gist ("
+    "table_id WITH =, tstzrange(starts_at, ends_at, '[)') WITH &&"
+    ") WHERE (status IN ('pending', 'confirmed'))"
+)
+# Keeps KEY_TABLE in step with the partitioned table. A row moving to
+# another partition fires the DELETE and INSERT triggers.
+KEY_SYNC_FUNCTION = f"""
+CREATE FUNCTION {KEY_TABLE}_sync() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO {KEY_TABLE} (id) VALUES (NEW.id);
+    ELSIF TG_OP = 'UPDATE' THEN
+        UPDATE {KEY_TABLE} SET id = NEW.id WHERE id = OLD.id;
+    ELSIF TG_OP = 'DELETE' THEN
+        DELETE FROM {KEY_TABLE} WHERE id = OLD.id;
+    ELSE
+        DELETE FROM {KEY_TABLE};
+    END IF;
+    RETURN NULL;
+END
+$$"""
+
+
+def month_start(day, months=0):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def rebuild_table(schema_editor, partitioned):
+    """
+    Copy bookings_booking into a new table, partitioned by booking_date
+    month or plain, keeping its id sequence, indexes and foreign keys.
+    Foreign keys to a partitioned booking reference KEY_TABLE instead.
+    Runs with the table locked; plan for a maintenance window.
+    """
+    execute = schema_editor.execute
+    old = f'{TABLE}_old'
+    target = KEY_TABLE if partitioned else TABLE
+    with schema_editor.connection.cursor() as cursor:
+        # Foreign keys to the bookings, dropped here and pointed at the
+        # new target once it holds every id
+        cursor.execute(
+            "SELECT conrelid::regclass::text, conname, "
+            "pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE contype = 'f' AND conparentid = 0 AND confrelid IN "
+            "(to_regclass(%s), to_regclass(%s))", [TABLE, KEY_TABLE])
+        referencing = cursor.fetchall()
+        for table, name, _ in referencing:
+            execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
+        if not partitioned:
+            execute(f'DROP TABLE {KEY_TABLE}')
+            execute(f'DROP FUNCTION {KEY_TABLE}_sync() CASCADE')
+
+        execute(f'ALTER TABLE {TABLE} RENAME TO {old}')
+        # Plain indexes (constraint indexes are recreated below) and the
+        # foreign keys to other tables
+        cursor.execute(
+            'SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i '
+            'WHERE i.indrelid = %s::regclass AND NOT EXISTS ('
+            'SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)',
+            [old])
+        index_sql = [
+            re.sub(rf' ON (ONLY )?(\S+\.)?{old} ', f' ON {TABLE} ', sql)
+            for sql, in cursor.fetchall()
+        ]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'", [old])
+        foreign_keys = cursor.fetchall()
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [old])
+        old_sequence = cursor.fetchone()[0]
+
+        execute(
+            f'CREATE TABLE {TABLE} '
+            f'(LIKE {old} INCLUDING DEFAULTS INCLUDING IDENTITY)'
+            + (' PARTITION BY RANGE (booking_date)' if partitioned else ''))
+        partitions = []
+        if partitioned:
+            cursor.execute(f'SELECT MIN(booking_date) FROM {old}')
+            this_month = month_start(timezone.localdate())
+            month = month_start(cursor.fetchone()[0] or this_month)
+            while month <= month_start(this_month, PARTITION_MONTHS_AHEAD):
+                name = f'{TABLE}_y{month.year}m{month.month:02d}'
+                execute(
+                    f'CREATE TABLE {name} PARTITION OF {TABLE} '
+                    f"FOR VALUES FROM ('{month}') "
+                    f"TO ('{month_start(month, 1)}')")
+                partitions.append(name)
+                month = month_start(month, 1)
+            execute(f'CREATE TABLE {TABLE}_default PARTITION OF {TABLE} '
+                    f'DEFAULT')
+            partitions.append(f'{TABLE}_default')
+        execute(f'INSERT INTO {TABLE} SELECT * FROM {old}')
+
+        cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", [TABLE])
+        new_sequence = cursor.fetchone()[0]
+        if new_sequence is None:
+            # A serial id: the copied default still uses the old sequence
+            execute(f'ALTER SEQUENCE {old_sequence} OWNED BY {TABLE}.id')
+        else:
+            cursor.execute(
+                f'SELECT setval(%s, COALESCE(MAX(id), 0) + 1, false) '
+                f'FROM {TABLE}', [new_sequence])
+        execute(f'DROP TABLE {old}')
+
+        # A partitioned table's unique keys must include booking_date
+        execute(
+            f'ALTER TABLE {TABLE} ADD CONSTRAINT {TABLE}_pkey PRIMARY KEY '
+            + ('(id, booking_date)' if partitioned else '(id)'))
+        for sql in index_sql:
+            execute(sql)
+        for name, definition in foreign_keys:
+            execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT {name} {definition}')
+        if partitioned:
+            for name in partitions:
+                execute(f'ALTER TABLE {name} ADD CONSTRAINT '
+                        f'{name}_no_active_overlap {OVERLAP_EXCLUSION}')
+            # The primary key of KEY_TABLE keeps ids unique across the
+            # partitions
+            execute(f'CREATE TABLE {KEY_TABLE} (id bigint PRIMARY KEY)')
+            execute(f'INSERT INTO {KEY_TABLE} SELECT id FROM {TABLE}')
+            execute(KEY_SYNC_FUNCTION)
+            execute(
+                f'CREATE TRIGGER {KEY_TABLE}_sync '
+                f'AFTER INSERT OR UPDATE OF id OR DELETE ON {TABLE} '
+                f'FOR EACH ROW EXECUTE FUNCTION {KEY_TABLE}_sync()')
+            execute(
+                f'CREATE TRIGGER {KEY_TABLE}_truncate '
+                f'AFTER TRUNCATE ON {TABLE} '
+                f'FOR EACH STATEMENT EXECUTE FUNCTION {KEY_TABLE}_sync()')
+        else:
+            execute(f'ALTER TABLE {TABLE} ADD CONSTRAINT '
+                    f'booking_no_active_overlap {OVERLAP_EXCLUSION}')
+        for table, name, definition in referencing:
+            definition = re.sub(
+                rf'REFERENCES (\S+\.)?({TABLE}|{KEY_TABLE})\(',
+                f'REFERENCES {target}(', definition)
+            execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} {definition}')
+
+
+def partition_bookings(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    rebuild_table(schema_editor, partitioned=True)
+
+
+def unpartition_bookings(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    rebuild_table(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_booking_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_bookings, unpartition_bookings),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.21 on 2026-10-17 20:38
+
+import datetime
+from django.db import migrations, models
+
+
+def check_no_late_active_bookings(apps, schema_editor):
+    """
+    Stop with the offending bookings named, rather than fail inside ALTER
+    TABLE, when existing data would violate the check added next.
+    """
+    Booking = apps.get_model('bookings', 'Booking')
+    late = list(Booking.objects.filter(
+        booking_time__gt=datetime.time(23, 0),
+        status__in=['pending', 'confirmed'],
+    ).order_by('id').values_list('id', flat=True)[:21])
+    if late:
+        ids = ', '.join(str(pk) for pk in late[:20])
+        more = ' and more' if len(late) > 20 else ''
+        raise RuntimeError(
+            f'Cannot add the booking_ends_by_midnight check: active '
+            f'bookings {ids}{more} start after 23:00 and so end after '
+            f'midnight. Move or cancel them, then run migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_partition_bookings'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            check_no_late_active_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(check=models.Q(('booking_time__lte', datetime.time(23, 0)), models.Q(('status__in', ['pending', 'confirmed']), _negated=True), _connector='OR'), name='booking_ends_by_midnight'),
+        ),
+    ]
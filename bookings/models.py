@@ -1,5 +1,9 @@
+from datetime import datetime, time, timedelta
+
 from django.contrib.auth.models import User
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.utils import timezone
 
 
 class Table(models.Model):
@@ -9,6 +13,13 @@ class Table(models.Model):
     number = models.IntegerField(unique=True, help_text="Unique table number.")
     capacity = models.IntegerField(
         help_text="Maximum number of guests this table can accommodate.")
+    combination_group = models.CharField(
+        max_length=20,
+        blank=True,
+        help_text=(
+            "Tables sharing a group can be pushed together to seat a "
+            "large party. Leave blank for tables that stand alone."
+        ))
 
     def __str__(self):
         return f"Table {self.number} (Capacity: {self.capacity})"
@@ -25,6 +36,17 @@ class Booking(models.Model):
         ('cancelled', 'Cancelled'),
         ('completed', 'Completed'),
     ]
+    # Statuses that hold a table for their time slot
+    ACTIVE_STATUSES = ('pending', 'confirmed')
+    # Statuses staff bulk actions move bookings to, and the statuses each
+    # can be reached from. None of them re-activates a released slot.
+    BULK_STATUS_TRANSITIONS = {
+        'confirmed': ('pending',),
+        'cancelled': ('pending', 'confirmed'),
+        'completed': ('confirmed',),
+    }
+    # How long a booking holds its table
+    DURATION = timedelta(hours=1)
 
     user = models.ForeignKey(
         User,
@@ -38,6 +60,17 @@ class Booking(models.Model):
         related_name='bookings',
         help_text="The table reserved. Cannot be deleted if it has bookings."
     )
+    combined_with = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='combined_tables',
+        help_text=(
+            "Booking whose party is also seated at this table. Set on the "
+            "extra tables of a combination, which hold no guests themselves."
+        )
+    )
     booking_date = models.DateField(help_text="The date of the reservation.")
     booking_time = models.TimeField(help_text="The time of the reservation.")
     number_of_guests = models.IntegerField(
@@ -54,15 +87,304 @@ class Booking(models.Model):
         auto_now_add=True, help_text="Timestamp when booking was created.")
     updated_at = models.DateTimeField(
         auto_now=True, help_text="Timestamp when booking was last updated.")
+    starts_at = models.DateTimeField(
+        editable=False,
+        help_text="Start of the period the table is held (derived).")
+    ends_at = models.DateTimeField(
+        editable=False,
+        help_text="End of the period the table is held (derived).")
 
     class Meta:
-        # Prevent double-booking a table
-        unique_together = ('table', 'booking_date', 'booking_time')
+        # Prevent double-booking a table. Cancelled and completed
+        # bookings release their slot so it can be booked again.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['table', 'booking_date', 'booking_time'],
+                condition=models.Q(status__in=['pending', 'confirmed']),
+                name='unique_active_table_slot',
+            ),
+            # Keeps an active booking's period within its own date, so
+            # the per-partition overlap exclusion on PostgreSQL sees all
+            # its overlaps (see bookings.partitions). 23:00 is midnight
+            # less DURATION.
+            models.CheckConstraint(
+                check=(models.Q(booking_time__lte=time(23, 0))
+                       | ~models.Q(status__in=['pending', 'confirmed'])),
+                name='booking_ends_by_midnight',
+            ),
+        ]
+        indexes = [
+            # Serves the overlap check for active bookings. On PostgreSQL
+            # overlaps are also rejected by a GiST exclusion constraint
+            # added in migration 0004.
+            models.Index(
+                fields=['table', 'starts_at', 'ends_at'],
+                condition=models.Q(status__in=['pending', 'confirmed']),
+                name='booking_active_range_idx',
+            ),
+            # Day occupancy and calendar loads by date
+            models.Index(
+                fields=['booking_date', 'booking_time', 'table'],
+                name='booking_date_time_table_idx',
+            ),
+            # my_bookings upcoming/past lists
+            models.Index(
+                fields=['user', 'booking_date', 'booking_time'],
+                name='booking_user_date_idx',
+            ),
+            # Staff dashboard counts by date and status
+            models.Index(
+                fields=['booking_date', 'status'],
+                name='booking_date_status_idx',
+            ),
+            # Active bookings check before deleting a table
+            models.Index(
+                fields=['table', 'status'],
+                name='booking_table_status_idx',
+            ),
+            # Staff booking list, newest first
+            models.Index(
+                fields=['-booking_date', '-booking_time', '-id'],
+                name='booking_list_order_idx',
+            ),
+            # Completion sweeper's keyset walk over finished bookings
+            models.Index(
+                fields=['ends_at', 'id'],
+                condition=models.Q(status='confirmed'),
+                name='booking_confirmed_ends_idx',
+            ),
+        ]
         # Default sort order for queries
         ordering = ['booking_date', 'booking_time']
 
+    @classmethod
+    def time_range(cls, booking_date, booking_time):
+        """
+        Return the timezone-aware (start, end) period a booking at the
+        given date and time holds its table for.
+        """
+        starts_at = timezone.make_aware(
+            datetime.combine(booking_date, booking_time))
+        return starts_at, starts_at + cls.DURATION
+
+    def clean(self):
+        """
+        Rejects times whose held period runs past midnight: bookings are
+        partitioned by date on PostgreSQL and each partition only checks
+        overlaps within itself (see bookings.partitions).
+        """
+        super().clean()
+        if self.booking_date is None or self.booking_time is None:
+            return
+        _, ends_at = self.time_range(self.booking_date, self.booking_time)
+        midnight = timezone.make_aware(datetime.combine(
+            self.booking_date + timedelta(days=1), time.min))
+        if ends_at > midnight:
+            latest = (datetime.combine(self.booking_date, time.min)
+                      - self.DURATION).time()
+            raise ValidationError({
+                'booking_time': (
+                    f"A booking must end by midnight; the latest start "
+                    f"time is {latest:%H:%M}."),
+            })
+
+    def save(self, *args, **kwargs):
+        self.starts_at, self.ends_at = self.time_range(
+            self.booking_date, self.booking_time)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields, 'starts_at', 'ends_at'}
+        # Keeps the SlotCapacity rows written by the post_save signal and
+        # the extra tables of a combination in the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if self.combined_with_id is None:
+                # Cancelling or completing a party releases all its tables
+                for extra in self.combined_tables.exclude(status=self.status):
+                    extra.status = self.status
+                    extra.save(update_fields=['status', 'updated_at'])
+
     def __str__(self):
         return (
             f"Booking by {self.user.username} for Table {self.table.number} "
             f"on {self.booking_date} at {self.booking_time} ({self.status})"
         )
+
+
+class BookingArchive(models.Model):
+    """
+    A booking older than the archive horizon, moved out of the Booking
+    table by the archive_bookings management command so the live table
+    stays small. Keeps the booking's id and a copy of its table, which
+    may since have been changed or deleted. The extra tables of a
+    combination are folded into their party's row.
+    """
+    id = models.BigIntegerField(
+        primary_key=True, help_text="Id the booking had while live.")
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_bookings',
+        help_text="The user who made the booking."
+    )
+    table_number = models.IntegerField(
+        help_text="Number of the table reserved, when archived.")
+    table_capacity = models.IntegerField(
+        help_text="Capacity of the table reserved, when archived.")
+    combined_table_numbers = models.JSONField(
+        default=list, blank=True,
+        help_text="Numbers of the extra tables of a combination.")
+    booking_date = models.DateField(help_text="The date of the reservation.")
+    booking_time = models.TimeField(help_text="The time of the reservation.")
+    number_of_guests = models.IntegerField(
+        help_text="Number of guests for the reservation.")
+    notes = models.TextField(blank=True, null=True,
+                             help_text="Optional special requests.")
+    status = models.CharField(
+        max_length=20,
+        choices=Booking.BOOKING_STATUS_CHOICES,
+        help_text="Status of the booking when archived."
+    )
+    created_at = models.DateTimeField(
+        help_text="Timestamp when booking was created.")
+    updated_at = models.DateTimeField(
+        help_text="Timestamp when booking was last updated.")
+    archived_at = models.DateTimeField(
+        auto_now_add=True, help_text="Timestamp when booking was archived.")
+
+    class Meta:
+        indexes = [
+            # A user's booking history, newest first
+            models.Index(
+                fields=['user', 'booking_date', 'booking_time'],
+                name='archive_user_date_idx',
+            ),
+        ]
+        ordering = ['booking_date', 'booking_time']
+
+    @property
+    def table(self):
+        """
+        The archived table as an unsaved Table, so archived bookings can
+        be shown wherever live ones are.
+        """
+        return Table(number=self.table_number, capacity=self.table_capacity)
+
+    def __str__(self):
+        return (
+            f"Archived booking by {self.user.username} for Table "
+            f"{self.table_number} on {self.booking_date} at "
+            f"{self.booking_time} ({self.status})"
+        )
+
+
+class SlotCapacity(models.Model):
+    """
+    Denormalised availability of one service slot: the seats and tables
+    still free for a booking starting in the slot. Built by the
+    rebuild_slot_capacity management command and kept up to date from
+    Booking signals (see bookings.slot_capacity).
+    """
+    slot_date = models.DateField(help_text="Date of the slot.")
+    slot_time = models.TimeField(help_text="Start time of the slot.")
+    remaining_seats = models.IntegerField(
+        help_text="Total capacity of the tables free for the slot.")
+    remaining_tables = models.JSONField(
+        default=dict,
+        help_text="Number of free tables per table capacity.")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['slot_date', 'slot_time'],
+                name='unique_slot_capacity',
+            ),
+        ]
+        ordering = ['slot_date', 'slot_time']
+        verbose_name_plural = 'slot capacities'
+
+    def free_tables_for(self, number_of_guests):
+        """
+        Return how many free tables seat a party of the given size on
+        their own; combinations of tables are not counted.
+        """
+        return sum(
+            count for capacity, count in self.remaining_tables.items()
+            if int(capacity) >= number_of_guests
+        )
+
+    def __str__(self):
+        return (
+            f"{self.slot_date} {self.slot_time:%H:%M}: "
+            f"{self.remaining_seats} seats free"
+        )
+
+
+class WaitlistEntry(models.Model):
+    """
+    A request to be booked automatically if a table frees up for a slot
+    that was full. Entries are promoted to confirmed bookings in order of
+    arrival when a booking for an overlapping period is cancelled or moved.
+    """
+    WAITLIST_STATUS_CHOICES = [
+        ('waiting', 'Waiting'),
+        ('promoted', 'Promoted'),
+        ('cancelled', 'Cancelled'),
+    ]
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries',
+        help_text="The user waiting for a table."
+    )
+    booking_date = models.DateField(help_text="Requested date.")
+    booking_time = models.TimeField(help_text="Requested time.")
+    number_of_guests = models.IntegerField(
+        help_text="Number of guests for the reservation.")
+    notes = models.TextField(blank=True, null=True,
+                             help_text="Optional special requests.")
+    status = models.CharField(
+        max_length=10,
+        choices=WAITLIST_STATUS_CHOICES,
+        default='waiting',
+        help_text="Current status of the entry."
+    )
+    booking = models.OneToOneField(
+        Booking,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='waitlist_entry',
+        help_text="The booking the entry was promoted to."
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            # One waiting entry per user and slot
+            models.UniqueConstraint(
+                fields=['user', 'booking_date', 'booking_time'],
+                condition=models.Q(status='waiting'),
+                name='unique_waiting_entry',
+            ),
+        ]
+        indexes = [
+            # Matching a freed slot against the queue
+            models.Index(
+                fields=['booking_date', 'booking_time', 'number_of_guests'],
+                condition=models.Q(status='waiting'),
+                name='waitlist_waiting_slot_idx',
+            ),
+        ]
+        ordering = ['created_at']
+        verbose_name_plural = 'waitlist entries'
+
+    def __str__(self):
+        return (
+            f"Waitlist entry by {self.user.username} for "
+            f"{self.booking_date} at {self.booking_time} ({self.status})"
+        )
@@ -0,0 +1,429 @@
+# Standard library imports
+import threading
+import time
+from datetime import date, datetime, timedelta
+from itertools import groupby
+
+# Django imports
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+# Local application imports
+from .availability import CLOSING_TIME, OPENING_TIME
+from .combinations import cheapest_combination
+from .models import Booking, Table
+
+# Each bit of a table's day bitmap covers one slot of this many minutes
+SLOT_MINUTES = 15
+
+
+def slot_mask(booking_time):
+    """
+    Return a bitmap of the slots covered by a booking starting at the given
+    time and holding its table for ``Booking.DURATION``. Two bookings
+    overlap only if their masks intersect; for times on slot boundaries the
+    test is exact, otherwise it errs on the side of "taken". Bits past the
+    end of the day are kept, so late bookings still clash with each other.
+    """
+    start = booking_time.hour * 60 + booking_time.minute
+    end = start + Booking.DURATION // timedelta(minutes=1)
+    first, last = start // SLOT_MINUTES, (end - 1) // SLOT_MINUTES
+    return ((1 << (last - first + 1)) - 1) << first
+
+
+def day_slots():
+    """Return the start time of every slot between opening and closing."""
+    slots = []
+    current = datetime.combine(date.min, OPENING_TIME)
+    closing = datetime.combine(date.min, CLOSING_TIME)
+    while current <= closing:
+        slots.append(current.time())
+        current += timedelta(minutes=SLOT_MINUTES)
+    return slots
+
+
+def service_slots(booking_date):
+    """
+    Return the start time of every slot between opening and closing that
+    can still be booked on the given date.
+    """
+    now = timezone.localtime()
+    # Slots earlier today can no longer be booked
+    if booking_date != now.date():
+        return day_slots()
+    return [slot for slot in day_slots() if slot >= now.time()]
+
+
+def current_slot_key():
+    """
+    Return a string that changes whenever a new slot starts, for caching
+    answers built from ``service_slots`` (which hides past slots today).
+    """
+    now = timezone.localtime()
+    return f"{now:%Y-%m-%dT%H}:{now.minute // SLOT_MINUTES}"
+
+
+def active_booking_rows(start_date, end_date):
+    """
+    Return ``(date, id, table id, time)`` rows of the active bookings in the
+    inclusive date range, ordered by date.
+    """
+    return Booking.objects.filter(
+        booking_date__range=(start_date, end_date),
+        status__in=Booking.ACTIVE_STATUSES,
+    ).order_by('booking_date').values_list(
+        'booking_date', 'id', 'table_id', 'booking_time')
+
+
+def load_day(booking_date):
+    """Build the occupancy of a date with a single Booking query."""
+    return DayOccupancy(
+        row[1:] for row in active_booking_rows(booking_date, booking_date))
+
+
+async def aload_day(booking_date):
+    """Async version of ``load_day`` using the async ORM."""
+    rows = active_booking_rows(booking_date, booking_date)
+    return DayOccupancy([row[1:] async for row in rows])
+
+
+def load_days(start_date, end_date):
+    """
+    Build the occupancy of every date in the inclusive range with a single
+    Booking query, grouped by booking date.
+    """
+    return group_days(active_booking_rows(start_date, end_date),
+                      start_date, end_date)
+
+
+async def aload_days(start_date, end_date):
+    """Async version of ``load_days`` using the async ORM."""
+    rows = active_booking_rows(start_date, end_date)
+    return group_days([row async for row in rows], start_date, end_date)
+
+
+def group_days(rows, start_date, end_date):
+    """Build ``{date: DayOccupancy}`` from ``active_booking_rows`` rows."""
+    # Every date is present, in order, even when it has no bookings
+    days = {}
+    current = start_date
+    while current <= end_date:
+        days[current] = DayOccupancy(())
+        current += timedelta(days=1)
+
+    for booking_date, day_rows in groupby(rows, key=lambda row: row[0]):
+        days[booking_date] = DayOccupancy(row[1:] for row in day_rows)
+    return days
+
+
+def seating(free, number_of_guests):
+    """
+    Return the given free tables that seat the party on their own or, when
+    none does, the cheapest combination of them that ``allocate_tables``
+    would book, or an empty list.
+    """
+    fitting = [table for table in free if table.capacity >= number_of_guests]
+    if fitting:
+        return fitting
+    return cheapest_combination(free, number_of_guests) or []
+
+
+def free_tables(day, tables, booking_time, number_of_guests):
+    """
+    Return the tables that are free in the day's occupancy and seat the
+    party at the given time (see ``seating``), in the given order.
+    """
+    mask = slot_mask(booking_time)
+    return seating(
+        [table for table in tables if day.is_free(table.pk, mask)],
+        number_of_guests)
+
+
+def free_table_counts(day, tables, booking_date, number_of_guests):
+    """
+    Return ``(slot time, free table count)`` for every bookable service
+    slot of a day, counting the tables that seat the party on their own,
+    or a free combination of tables that seats it as one.
+    """
+    masks = [(table, day.masks.get(table.pk, 0)) for table in tables]
+    counts = []
+    for slot_time in service_slots(booking_date):
+        wanted = slot_mask(slot_time)
+        free = [table for table, mask in masks if not mask & wanted]
+        count = sum(1 for table in free if table.capacity >= number_of_guests)
+        if not count and cheapest_combination(free, number_of_guests):
+            count = 1
+        counts.append((slot_time, count))
+    return counts
+
+
+def nearest_free_slots(day, tables, booking_date, booking_time,
+                       number_of_guests, limit):
+    """
+    Return up to ``limit`` ``(slot time, table)`` pairs that are free on
+    the day, nearest to the requested time first, each with the smallest
+    table that seats the party or, failing that, the lead (largest) table
+    of the cheapest free combination. The requested time itself is skipped.
+    """
+    tables = sorted(tables, key=lambda table: (table.capacity, table.number))
+    requested = booking_time.hour * 60 + booking_time.minute
+    candidates = sorted(
+        (slot for slot in service_slots(booking_date) if slot != booking_time),
+        # Earlier slot first when two are equally near
+        key=lambda slot: (abs(slot.hour * 60 + slot.minute - requested), slot))
+
+    suggestions = []
+    for slot_time in candidates:
+        wanted = slot_mask(slot_time)
+        seated = seating(
+            [table for table in tables if day.is_free(table.pk, wanted)],
+            number_of_guests)
+        if seated:
+            suggestions.append((slot_time, seated[0]))
+            if len(suggestions) == limit:
+                break
+    return suggestions
+
+
+class DayOccupancy:
+    """
+    Active bookings of one day as a bitmap per table, one bit per slot.
+    """
+
+    def __init__(self, rows):
+        self.loaded_at = time.monotonic()
+        # booking id -> (table id, bitmap of its slots)
+        self.bookings = {}
+        # table id -> bitmap of occupied slots
+        self.masks = {}
+        for booking_id, table_id, booking_time in rows:
+            self.add(booking_id, table_id, booking_time)
+
+    def add(self, booking_id, table_id, booking_time):
+        mask = slot_mask(booking_time)
+        self.bookings[booking_id] = (table_id, mask)
+        self.masks[table_id] = self.masks.get(table_id, 0) | mask
+
+    def remove(self, booking_id):
+        entry = self.bookings.pop(booking_id, None)
+        if entry is None:
+            return
+        # Rebuild the table's bitmap, another booking may share a slot
+        table_id = entry[0]
+        mask = 0
+        for other_table_id, other_mask in self.bookings.values():
+            if other_table_id == table_id:
+                mask |= other_mask
+        self.masks[table_id] = mask
+
+    def is_free(self, table_id, mask):
+        return not self.masks.get(table_id, 0) & mask
+
+
+class OccupancyIndex:
+    """
+    Per-process, lazily built index of table occupancy by booking date.
+
+    A day is loaded from the database with one query the first time it is
+    asked about and then patched from Booking save/delete signals once
+    their transaction commits. Days and the table list are reloaded after
+    ``BOOKINGS_OCCUPANCY_TTL`` seconds so bookings and tables written by
+    other worker processes become visible. Booking creation still confirms
+    the table against the database; the index only answers read queries.
+
+    Reads are single dict and attribute lookups and take no lock. Loads
+    run outside the lock, which only guards swapping results in and
+    applying changes, so it is never held across a query and async code
+    never waits for it on the event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (monotonic load time, tables) or None
+        self._tables = None
+        self._days = {}
+        # Counts of the changes applied, so a load that raced one of them,
+        # and may have missed it, is served but not kept
+        self._day_changes = 0
+        self._table_changes = 0
+
+    @property
+    def enabled(self):
+        return getattr(settings, 'BOOKINGS_OCCUPANCY_INDEX', True)
+
+    def clear(self):
+        """Drop every loaded day and the cached table list."""
+        with self._lock:
+            self._tables = None
+            self._days = {}
+
+    def tables(self):
+        """Return all tables, smallest (best fitting) first."""
+        tables = self._fresh_tables()
+        if tables is None:
+            changes, loaded_at = self._table_changes, time.monotonic()
+            tables = list(Table.objects.order_by('capacity', 'number'))
+            self._store_tables(tables, loaded_at, changes)
+        return tables
+
+    async def atables(self):
+        """Async version of ``tables`` using the async ORM."""
+        tables = self._fresh_tables()
+        if tables is None:
+            changes, loaded_at = self._table_changes, time.monotonic()
+            tables = [
+                table async for table in
+                Table.objects.order_by('capacity', 'number')
+            ]
+            await sync_to_async(self._store_tables, thread_sensitive=False)(
+                tables, loaded_at, changes)
+        return tables
+
+    def day(self, booking_date):
+        """Return the occupancy of a date, loading it if needed."""
+        day = self._fresh_day(booking_date)
+        if day is None:
+            changes = self._day_changes
+            day = load_day(booking_date)
+            self._store_day(booking_date, day, changes)
+        return day
+
+    async def aday(self, booking_date):
+        """Async version of ``day``."""
+        day = self._fresh_day(booking_date)
+        if day is None:
+            changes = self._day_changes
+            day = await aload_day(booking_date)
+            await sync_to_async(self._store_day, thread_sensitive=False)(
+                booking_date, day, changes)
+        return day
+
+    def free_tables(self, booking_date, booking_time, number_of_guests):
+        """
+        Return the tables that are free and seat the party at the given
+        time: the single tables that fit, smallest first, or else the
+        cheapest combination, largest first.
+        """
+        return free_tables(self.day(booking_date), self.tables(),
+                           booking_time, number_of_guests)
+
+    async def afree_tables(self, booking_date, booking_time,
+                           number_of_guests):
+        """Async version of ``free_tables``."""
+        return free_tables(await self.aday(booking_date),
+                           await self.atables(),
+                           booking_time, number_of_guests)
+
+    def free_table_counts(self, booking_date, number_of_guests):
+        """
+        Return ``(slot time, free table count)`` for every bookable slot of
+        the day. Uses the loaded bitmaps when the index is enabled and a
+        single fresh Booking query otherwise.
+        """
+        if self.enabled:
+            day, tables = self.day(booking_date), self.tables()
+        else:
+            day, tables = load_day(booking_date), list(Table.objects.all())
+        return free_table_counts(day, tables, booking_date, number_of_guests)
+
+    async def afree_table_counts(self, booking_date, number_of_guests):
+        """Async version of ``free_table_counts``."""
+        if self.enabled:
+            day, tables = await self.aday(booking_date), await self.atables()
+        else:
+            day = await aload_day(booking_date)
+            tables = [table async for table in Table.objects.all()]
+        return free_table_counts(day, tables, booking_date, number_of_guests)
+
+    def nearest_free_slots(self, booking_date, booking_time,
+                           number_of_guests, limit=3):
+        """
+        Return up to ``limit`` free ``(slot time, table)`` alternatives to
+        a full time on the same day, from one pass over its bookings.
+        """
+        if self.enabled:
+            day, tables = self.day(booking_date), self.tables()
+        else:
+            day, tables = load_day(booking_date), list(Table.objects.all())
+        return nearest_free_slots(
+            day, tables, booking_date, booking_time, number_of_guests, limit)
+
+    def booking_saved(self, booking):
+        """
+        Move a saved booking to its current date and slot once the
+        transaction commits, so rolled back saves leave no trace.
+        """
+        booking_id, table_id = booking.pk, booking.table_id
+        booking_date, booking_time = booking.booking_date, booking.booking_time
+        active = booking.status in Booking.ACTIVE_STATUSES
+
+        def patch():
+            with self._lock:
+                self._day_changes += 1
+                for day in self._days.values():
+                    day.remove(booking_id)
+                day = self._days.get(booking_date)
+                if day is not None and active:
+                    day.add(booking_id, table_id, booking_time)
+        transaction.on_commit(patch)
+
+    def booking_deleted(self, booking):
+        """Forget a deleted booking once the transaction commits."""
+        booking_id = booking.pk
+
+        def patch():
+            with self._lock:
+                self._day_changes += 1
+                for day in self._days.values():
+                    day.remove(booking_id)
+        transaction.on_commit(patch)
+
+    def tables_changed(self):
+        """
+        Reload the table list on next use after the transaction commits;
+        bitmaps stay valid.
+        """
+        def reset():
+            with self._lock:
+                self._table_changes += 1
+                self._tables = None
+        transaction.on_commit(reset)
+
+    def _store_day(self, booking_date, day, changes):
+        with self._lock:
+            if changes == self._day_changes:
+                self._prune()
+                self._days[booking_date] = day
+
+    def _store_tables(self, tables, loaded_at, changes):
+        with self._lock:
+            if changes == self._table_changes:
+                self._tables = (loaded_at, tables)
+
+    def _fresh_day(self, booking_date):
+        # Loaded days expire so other processes' bookings become visible
+        day = self._days.get(booking_date)
+        if day is None or self._expired(day.loaded_at):
+            return None
+        return day
+
+    def _fresh_tables(self):
+        # As do tables, for other processes' table changes
+        if self._tables is None or self._expired(self._tables[0]):
+            return None
+        return self._tables[1]
+
+    def _expired(self, loaded_at):
+        ttl = getattr(settings, 'BOOKINGS_OCCUPANCY_TTL', 60)
+        return time.monotonic() - loaded_at > ttl
+
+    def _prune(self):
+        # Past days are never asked about again
+        today = timezone.localdate()
+        for booking_date in [d for d in self._days if d < today]:
+            del self._days[booking_date]
+
+
+occupancy_index = OccupancyIndex()
@@ -0,0 +1,120 @@
+# Monthly partitions of the Booking table on PostgreSQL. Migration 0012
+# turns bookings_booking into a table partitioned by booking_date month,
+# so queries filtered by date only read the partitions of those dates and
+# VACUUM and index maintenance work a month at a time. Bookings for a
+# month without its own partition go to a default partition, which
+# create_booking_partitions empties as it adds their months. Booking ids
+# stay unique through the bookings_booking_key table, which a trigger
+# keeps in step and foreign keys to a booking reference. Other databases
+# (SQLite in development and tests) keep a plain table.
+
+# Standard library imports
+from datetime import date
+
+# Django imports
+from django.db import connection, transaction
+
+# Local application imports
+from .models import Booking
+
+# Months after the current one create_booking_partitions keeps ready
+PARTITION_MONTHS_AHEAD = 12
+
+TABLE = Booking._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+KEY_TABLE = f'{TABLE}_key'
+
+
+def month_start(day, months=0):
+    """Return the first day of the month ``months`` after ``day``'s."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    """Return the name of the partition holding ``month``'s bookings."""
+    return f'{TABLE}_y{month.year}m{month.month:02d}'
+
+
+def uses_partitions():
+    """Return whether the Booking table is partitioned on this database."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)',
+            [TABLE])
+        row = cursor.fetchone()
+    return row is not None and row[0] == 'p'
+
+
+def existing_partitions():
+    """Return the names of the Booking table's partitions."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s)', [TABLE])
+        return {name for name, in cursor.fetchall()}
+
+
+def overlap_exclusion_sql(partition):
+    """
+    Return the SQL adding the overlap exclusion of migration 0004 to one
+    partition. PostgreSQL cannot enforce it across a partitioned table,
+    but the ``booking_ends_by_midnight`` check keeps an active booking's
+    period within its own date, so it never spans two partitions.
+    """
+    return (
+        f'ALTER TABLE {partition} '
+        f'ADD CONSTRAINT {partition}_no_active_overlap '
+        f'EXCLUDE USING gist ('
+        f"table_id WITH =, tstzrange(starts_at, ends_at, '[)') WITH &&"
+        f") WHERE (status IN ('pending', 'confirmed'))"
+    )
+
+
+def create_partition(month):
+    """
+    Add the partition of ``month``, moving the month's bookings out of
+    the default partition. Returns the partition's name.
+    """
+    name = partition_name(month)
+    start, end = month_start(month), month_start(month, 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Holds off writes to the default partition until the month is
+        # attached, so no booking for it lands there meanwhile
+        cursor.execute(f'LOCK TABLE {DEFAULT_PARTITION} IN EXCLUSIVE MODE')
+        # Built detached and then attached, as a partition for rows still
+        # in the default partition cannot be created in place
+        cursor.execute(
+            f'CREATE TABLE {name} '
+            f'(LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH moved AS ('
+            f'DELETE FROM {DEFAULT_PARTITION} '
+            f'WHERE booking_date >= %s AND booking_date < %s RETURNING *'
+            f') INSERT INTO {name} SELECT * FROM moved', [start, end])
+        cursor.execute(
+            f'ALTER TABLE {TABLE} ATTACH PARTITION {name} '
+            f"FOR VALUES FROM ('{start}') TO ('{end}')")
+        # The delete dropped the moved ids from the key table; foreign
+        # keys to it are deferred, so nothing is checked before this
+        cursor.execute(f'INSERT INTO {KEY_TABLE} SELECT id FROM {name}')
+        cursor.execute(overlap_exclusion_sql(name))
+    return name
+
+
+def create_partitions(first_month, last_month):
+    """
+    Create the missing partitions of the months from ``first_month`` to
+    ``last_month``, inclusive. Returns the names of those created.
+    """
+    existing = existing_partitions()
+    created = []
+    month = month_start(first_month)
+    while month <= last_month:
+        if partition_name(month) not in existing:
+            created.append(create_partition(month))
+        month = month_start(month, 1)
+    return created
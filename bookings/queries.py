@@ -0,0 +1,117 @@
+# Booking querysets shared by the views and the explain_booking_queries
+# command, so query plans are checked against the real query shapes.
+
+# Standard library imports
+from heapq import merge
+
+# Django imports
+from django.db.models import Q
+
+# Local application imports
+from .models import Booking, BookingArchive, WaitlistEntry
+from .search import keyword_filter
+
+
+def user_upcoming_bookings(user, today):
+    """Active bookings of a user from today onward, soonest first."""
+    return Booking.objects.filter(
+        user=user,
+        booking_date__gte=today,
+        combined_with=None
+    ).exclude(
+        status__in=['cancelled', 'completed']
+    ).order_by(
+        'booking_date', 'booking_time'
+    )
+
+
+def user_waitlist_entries(user, today):
+    """Waiting waitlist entries of a user from today onward, soonest first."""
+    return WaitlistEntry.objects.filter(
+        user=user,
+        status='waiting',
+        booking_date__gte=today
+    ).order_by('booking_date', 'booking_time')
+
+
+def user_past_bookings(user, now):
+    """
+    Bookings of a user before today or earlier today, most recent first.
+    """
+    return Booking.objects.filter(
+        user=user,
+        combined_with=None
+    ).filter(
+        Q(booking_date__lt=now.date()) |  # Date is in the past
+        # Or date is today and time is in the past
+        Q(booking_date=now.date(), booking_time__lt=now.time())
+    ).order_by('-booking_date', '-booking_time')
+
+
+def user_archived_bookings(user):
+    """Archived bookings of a user, most recent first."""
+    return BookingArchive.objects.filter(user=user).order_by(
+        '-booking_date', '-booking_time')
+
+
+def merge_history(past_bookings, archived_bookings):
+    """
+    Merge live past bookings and archived ones, both most recent first,
+    into one list in the same order.
+    """
+    return list(merge(
+        past_bookings, archived_bookings, reverse=True,
+        key=lambda booking: (booking.booking_date, booking.booking_time)))
+
+
+def user_booking_history(user, now):
+    """
+    A user's past bookings from both the live and the archive table, most
+    recent first. Archived bookings show their table as it was.
+    """
+    return merge_history(
+        user_past_bookings(user, now).select_related('table'),
+        user_archived_bookings(user))
+
+
+def dashboard_bookings(today):
+    """
+    Bookings from today onward, which the staff dashboard's statistics
+    are aggregated over.
+    """
+    return Booking.objects.filter(booking_date__gte=today, combined_with=None)
+
+
+def staff_bookings(query=None, status=None, booking_date=None,
+                   date_from=None, date_to=None):
+    """
+    All bookings for the staff list, newest first, narrowed by an optional
+    keyword (username/notes substring or exact table number), status,
+    booking date and booking date range (inclusive). The extra
+    tables of a combination are listed with their party's booking.
+    """
+    # The list shows each booking's user and table, so join them up front
+    bookings = Booking.objects.filter(combined_with=None).select_related(
+        'user', 'table'
+    ).order_by('-booking_date', '-booking_time', '-id')
+
+    if query:
+        # Served by the search indexes (see bookings.search)
+        bookings = bookings.filter(keyword_filter(query))
+    if status:
+        bookings = bookings.filter(status=status)
+    if booking_date:
+        bookings = bookings.filter(booking_date=booking_date)
+    if date_from:
+        bookings = bookings.filter(booking_date__gte=date_from)
+    if date_to:
+        bookings = bookings.filter(booking_date__lte=date_to)
+    return bookings
+
+
+def active_bookings_for_table(table):
+    """Pending or confirmed bookings holding a table."""
+    return Booking.objects.filter(
+        table=table,
+        status__in=['confirmed', 'pending']
+    )
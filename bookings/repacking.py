@@ -0,0 +1,127 @@
+# Django imports
+from django.utils import timezone
+
+# Local application imports
+from . import availability_cache, slot_capacity
+from .availability import date_lock
+from .models import Booking, Table
+from .occupancy import slot_mask
+
+
+def pack(movable, fixed, tables):
+    """
+    Assign tables to bookings so as few seats as possible sit empty.
+
+    ``movable`` holds ``(booking id, guests, time, current table id)`` for
+    the bookings that may change table and ``fixed`` holds ``(table id,
+    time)`` for the ones that may not. Largest parties are placed first,
+    each at the smallest table free for its whole period (best-fit
+    decreasing), keeping its current table when that is as small.
+
+    Returns ``{booking id: table id}``, or None if a booking did not fit.
+    """
+    tables = sorted(tables, key=lambda table: (table.capacity, table.number))
+    capacities = {table.pk: table.capacity for table in tables}
+    masks = {}
+    for table_id, booking_time in fixed:
+        masks[table_id] = masks.get(table_id, 0) | slot_mask(booking_time)
+
+    assignment = {}
+    for booking_id, guests, booking_time, current_table_id in sorted(
+            movable, key=lambda row: (-row[1], row[2], row[0])):
+        mask = slot_mask(booking_time)
+        chosen = None
+        for table in tables:
+            if table.capacity < guests or masks.get(table.pk, 0) & mask:
+                continue
+            chosen = table.pk
+            break
+        if chosen is None:
+            return None
+        if (chosen != current_table_id
+                and capacities.get(current_table_id) == capacities[chosen]
+                and not masks.get(current_table_id, 0) & mask):
+            # Same fit either way, so avoid moving the booking
+            chosen = current_table_id
+        masks[chosen] = masks.get(chosen, 0) | mask
+        assignment[booking_id] = chosen
+    return assignment
+
+
+def wasted_seats(rows, assignment, capacities):
+    """Return the empty seats of ``pack`` rows under an assignment."""
+    return sum(
+        capacities[assignment[booking_id]] - guests
+        for booking_id, guests, _, _ in rows
+    )
+
+
+def repack_date(booking_date, dry_run=False):
+    """
+    Re-pack the confirmed bookings of a date across the tables.
+
+    Pending bookings, bookings that have already started and parties seated
+    at a combination of tables keep their tables. The new plan is only
+    applied when every booking fits and fewer seats are wasted. Other
+    processes' occupancy indexes pick the moves up when their days reload.
+
+    The date's ``date_lock`` is held exclusively, so allocations for the
+    date wait for the plan instead of finding its tables locked, and its
+    bookings are locked without waiting: if one is being changed, the
+    OperationalError is raised rather than risk a deadlock with a
+    transaction that allocates after changing it. A booking saved without
+    the allocator may still take a planned table; the IntegrityError then
+    rolls the date back and is raised. Returns ``(bookings moved, seats
+    reclaimed)``.
+    """
+    now = timezone.now()
+
+    with date_lock(booking_date, exclusive=True):
+        rows = list(Booking.objects.select_for_update(nowait=True).filter(
+            booking_date=booking_date,
+            status__in=Booking.ACTIVE_STATUSES,
+        ).values_list(
+            'id', 'table_id', 'booking_time', 'number_of_guests', 'status',
+            'combined_with_id', 'starts_at'))
+        tables = list(Table.objects.all())
+        capacities = {table.pk: table.capacity for table in tables}
+        parties = {row[5] for row in rows if row[5] is not None}
+
+        movable, fixed = [], []
+        for (booking_id, table_id, booking_time, guests, status,
+             combined_with_id, starts_at) in rows:
+            if (status == 'confirmed' and combined_with_id is None
+                    and booking_id not in parties and starts_at > now):
+                movable.append((booking_id, guests, booking_time, table_id))
+            else:
+                fixed.append((table_id, booking_time))
+
+        assignment = pack(movable, fixed, tables)
+        if assignment is None:
+            return 0, 0
+        current = {row[0]: row[3] for row in movable}
+        reclaimed = (wasted_seats(movable, current, capacities)
+                     - wasted_seats(movable, assignment, capacities))
+        moved = [
+            Booking(pk=booking_id, table_id=table_id, updated_at=now)
+            for booking_id, table_id in assignment.items()
+            if table_id != current[booking_id]
+        ]
+        if not moved or reclaimed <= 0:
+            return 0, 0
+        if dry_run:
+            return len(moved), reclaimed
+
+        # Swapping tables between bookings would trip the active-slot
+        # constraints row by row, so the moved bookings leave the active
+        # statuses while their tables change. The transaction hides this.
+        moved_ids = [booking.pk for booking in moved]
+        Booking.objects.filter(pk__in=moved_ids).update(status='cancelled')
+        Booking.objects.bulk_update(
+            moved, ['table', 'updated_at'], batch_size=1000)
+        Booking.objects.filter(pk__in=moved_ids).update(status='confirmed')
+
+        # QuerySet updates send no signals
+        slot_capacity.refresh_dates([booking_date])
+    availability_cache.invalidate_dates([booking_date])
+    return len(moved), reclaimed
@@ -0,0 +1,144 @@
+# Printable run sheet of a service day: its bookings by time with tables,
+# covers and notes, as a PDF. PDFs are rendered by xhtml2pdf in a process
+# pool, never inside the request, and kept on disk under a name holding a
+# digest of the sheet's rows. A download serves the file on disk until a
+# booking on that day changes, which changes the digest and starts a new
+# rendering.
+
+# Standard library imports
+import hashlib
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+# Django imports
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+# Local application imports
+from .models import Booking
+from .run_sheet_pdf import render_pdf
+
+logger = logging.getLogger(__name__)
+
+# Pool rendering the PDFs, started on first use
+_executor = None
+
+# Renderings under way, by PDF path
+_pending = {}
+
+_lock = threading.Lock()
+
+
+class RunSheetError(Exception):
+    """Raised when rendering a run sheet PDF failed."""
+
+
+def run_sheet_rows(day):
+    """
+    Return the run sheet rows of a day: every booking that is not
+    cancelled, by time and table, with all the tables of a combination.
+    """
+    bookings = Booking.objects.filter(
+        booking_date=day, combined_with=None
+    ).exclude(
+        status='cancelled'
+    ).select_related('user', 'table').prefetch_related(
+        'combined_tables__table'
+    ).order_by('booking_time', 'table__number')
+
+    return [
+        {
+            'id': booking.pk,
+            'time': booking.booking_time,
+            'tables': [booking.table.number] + sorted(
+                extra.table.number for extra in booking.combined_tables.all()),
+            'guests': booking.number_of_guests,
+            'name': booking.user.get_full_name() or booking.user.username,
+            'status': booking.get_status_display(),
+            'notes': booking.notes or '',
+        }
+        for booking in bookings
+    ]
+
+
+def sheet_version(day, rows):
+    """
+    Return a digest of everything printed on a day's sheet, which changes
+    with any booking change on that day.
+    """
+    return hashlib.md5(
+        repr((day, rows)).encode(), usedforsecurity=False).hexdigest()
+
+
+def sheet_path(day, version):
+    return (Path(settings.BOOKINGS_RUN_SHEET_DIR)
+            / f'run-sheet-{day:%Y-%m-%d}-{version}.pdf')
+
+
+def render_html(day, rows):
+    """Return the run sheet as HTML for xhtml2pdf."""
+    return render_to_string('bookings/run_sheet.html', {
+        'day': day,
+        'rows': rows,
+        'covers': sum(row['guests'] for row in rows),
+        'generated_at': timezone.localtime(),
+    })
+
+
+def _submit(html, path):
+    global _executor
+    if _executor is None:
+        # Spawned rather than forked: forking a threaded web worker can
+        # copy locks held by other threads into the child
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.BOOKINGS_RUN_SHEET_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    try:
+        return _executor.submit(render_pdf, html, str(path))
+    except BrokenProcessPool:
+        # A pool process died; start a fresh pool
+        _executor = None
+        return _submit(html, path)
+
+
+def get_run_sheet(day):
+    """
+    Return the path of the day's current run sheet PDF if it has been
+    rendered. Otherwise start rendering it in the background, unless that
+    is already under way, and return None.
+
+    Raises RunSheetError when the last rendering of the current sheet
+    failed; the next call tries again.
+    """
+    rows = run_sheet_rows(day)
+    path = sheet_path(day, sheet_version(day, rows))
+    if path.exists():
+        return path
+
+    with _lock:
+        # Forget finished renderings of other (older) sheets
+        for other in [other for other, future in _pending.items()
+                      if other != path and future.done()]:
+            del _pending[other]
+
+        future = _pending.get(path)
+        if future is not None and future.done():
+            del _pending[path]
+            error = future.exception()
+            if error is not None:
+                logger.error('Rendering %s failed', path.name,
+                             exc_info=error)
+                raise RunSheetError(
+                    f'Rendering the run sheet for {day} failed') from error
+            if path.exists():
+                return path
+            future = None
+        if future is None:
+            _pending[path] = _submit(render_html(day, rows), path)
+    return None
@@ -0,0 +1,36 @@
+# Run sheet PDF rendering, run in the run sheet process pool. Kept free of
+# Django imports so spawned pool processes start without setting Django up.
+
+# Standard library imports
+import os
+from pathlib import Path
+
+
+def render_pdf(html, path):
+    """
+    Render the run sheet HTML to a PDF at ``path`` and delete the older
+    versions of the same day's sheet. The file is written under a
+    temporary name first, so readers never see a partial PDF.
+    """
+    # Imported here so only the pool processes load xhtml2pdf/reportlab
+    from xhtml2pdf import pisa
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f'{path.name}.{os.getpid()}.partial')
+    try:
+        with open(partial, 'wb') as output:
+            result = pisa.CreatePDF(html, dest=output, encoding='utf-8')
+        if result.err:
+            raise RuntimeError(
+                f'xhtml2pdf reported {result.err} error(s) for {path.name}')
+        os.replace(partial, path)
+    finally:
+        partial.unlink(missing_ok=True)
+
+    # Names end in "-<version>.pdf"; earlier versions of the day are stale
+    day_prefix = path.name.rsplit('-', 1)[0]
+    for stale in path.parent.glob(f'{day_prefix}-*.pdf'):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return str(path)
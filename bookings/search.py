@@ -0,0 +1,117 @@
+# Indexed keyword search for the staff booking list. Matches are
+# case-insensitive substrings of the username or notes, or an exact table
+# number, as before, but each part is answered from an index:
+# - PostgreSQL: trigram GIN indexes on UPPER(notes) and UPPER(username),
+#   which serve the same icontains lookups (migration 0009).
+# - SQLite: an FTS5 trigram table of (username, notes) per booking, kept
+#   in sync by the Booking and User signals.
+# Elsewhere, or for terms too short for trigrams, it falls back to a scan.
+
+# Django imports
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+# Local application imports
+from .models import Table
+
+# FTS5 table mirroring each booking's username and notes by booking id
+SEARCH_TABLE = 'bookings_booking_search'
+
+# Trigram indexes cannot narrow down shorter terms
+MIN_INDEXED_LENGTH = 3
+
+# Databases known to have the FTS5 table, by name
+_fts_databases = {}
+
+
+def uses_fts():
+    """Return whether the default database has the FTS5 search table."""
+    if connection.vendor != 'sqlite':
+        return False
+    name = str(connection.settings_dict['NAME'])
+    if name not in _fts_databases:
+        _fts_databases[name] = SEARCH_TABLE in (
+            connection.introspection.table_names())
+    return _fts_databases[name]
+
+
+def keyword_filter(query):
+    """
+    Return a filter matching bookings whose username or notes contain the
+    query, or whose table has exactly that number.
+    """
+    query = query.strip()
+    condition = _text_filter(query)
+    if query.isdigit():
+        # Resolved through the unique index on Table.number
+        condition |= Q(table_id__in=list(
+            Table.objects.filter(number=int(query)).values_list(
+                'pk', flat=True)))
+    return condition
+
+
+def _text_filter(query):
+    if len(query) < MIN_INDEXED_LENGTH:
+        return Q(user__username__icontains=query) | Q(notes__icontains=query)
+
+    if uses_fts():
+        # A quoted phrase matches any substring with the trigram tokenizer
+        phrase = '"{}"'.format(query.replace('"', '""'))
+        return Q(pk__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s', [phrase]))
+
+    if connection.vendor == 'postgresql':
+        # Look the users up first so every condition left is on an index
+        # of bookings_booking and the planner can OR their bitmaps
+        return Q(notes__icontains=query) | Q(user_id__in=list(
+            User.objects.filter(username__icontains=query).values_list(
+                'pk', flat=True)))
+
+    return Q(user__username__icontains=query) | Q(notes__icontains=query)
+
+
+def index_booking(booking):
+    """Write a booking's username and notes to the FTS5 table."""
+    if not uses_fts():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [booking.pk])
+        cursor.execute(
+            f'INSERT INTO {SEARCH_TABLE} (rowid, username, notes) '
+            f'SELECT %s, username, %s FROM auth_user WHERE id = %s',
+            [booking.pk, booking.notes or '', booking.user_id])
+
+
+def unindex_booking(booking):
+    """Remove a deleted booking from the FTS5 table."""
+    if not uses_fts():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [booking.pk])
+
+
+def unindex_bookings(booking_ids):
+    """Remove bookings deleted without signals from the FTS5 table."""
+    if not uses_fts() or not booking_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(booking_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})',
+            list(booking_ids))
+
+
+def reindex_user(user):
+    """Copy a user's current username to their bookings' FTS5 rows."""
+    if not uses_fts():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {SEARCH_TABLE} SET username = %s WHERE rowid IN '
+            f'(SELECT id FROM bookings_booking WHERE user_id = %s)',
+            [user.username, user.pk])
@@ -0,0 +1,102 @@
+# Django imports
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+# Local application imports
+from . import availability_cache, dashboard, search, slot_capacity
+from .live_updates import booking_change, change_notifier
+from .models import Booking, Table
+from .occupancy import occupancy_index
+from .waitlist import promote_waitlist
+
+
+def held_slot(booking):
+    """
+    Return the ``(table id, date, time)`` an active booking holds, or None.
+    """
+    # Read from __dict__ so deferred fields are not fetched
+    values = booking.__dict__
+    if (values.get('status') not in Booking.ACTIVE_STATUSES
+            or values.get('table_id') is None):
+        return None
+    return (values.get('table_id'), values.get('booking_date'),
+            values.get('booking_time'))
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_date(sender, instance, **kwargs):
+    """
+    Keep the date and held slot a booking was loaded with, to see when
+    edits move it or release its table.
+    """
+    # Read from __dict__ so deferred fields are not fetched
+    instance._original_booking_date = instance.__dict__.get('booking_date')
+    instance._original_held_slot = held_slot(instance)
+
+
+@receiver(post_save, sender=Booking)
+def booking_saved(sender, instance, created, **kwargs):
+    """
+    Patch the occupancy index, apply the change to the slot capacity rows,
+    drop cached answers for them, offer a released slot to the waitlist
+    and tell the live staff dashboards.
+    """
+    dates = availability_cache.affected_dates(instance)
+    # A new booking held nothing before, whatever it was built with
+    released = None if created else instance._original_held_slot
+    held = held_slot(instance)
+    occupancy_index.booking_saved(instance)
+    slot_capacity.apply_changes([(instance.pk, released, held)])
+    availability_cache.invalidate_dates(dates)
+    dashboard.invalidate()
+    search.index_booking(instance)
+    instance._original_booking_date = instance.booking_date
+    instance._original_held_slot = held
+
+    # A cancelled, finished or moved booking frees its old slot
+    if released is not None and released != held:
+        promote_waitlist(*released)
+
+    # Extra tables of a combination are reported with their party
+    if instance.combined_with_id is None:
+        change_notifier.publish(booking_change(
+            instance, 'created' if created else 'updated'))
+
+
+@receiver(post_delete, sender=Booking)
+def booking_deleted(sender, instance, **kwargs):
+    """
+    Remove the deleted booking from the index, slots and cache, and tell
+    the live staff dashboards.
+    """
+    dates = availability_cache.affected_dates(instance)
+    occupancy_index.booking_deleted(instance)
+    slot_capacity.apply_changes(
+        [(instance.pk, instance._original_held_slot, None)])
+    availability_cache.invalidate_dates(dates)
+    dashboard.invalidate()
+    search.unindex_booking(instance)
+    if instance.combined_with_id is None:
+        change_notifier.publish(booking_change(instance, 'deleted'))
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    """Keep the search index's copy of a renamed user's username."""
+    # Logins only update last_login
+    if update_fields is None or 'username' in update_fields:
+        search.reindex_user(instance)
+
+
+@receiver(post_save, sender=Table)
+@receiver(post_delete, sender=Table)
+def table_changed(sender, instance, **kwargs):
+    """
+    Reload tables, drop the upcoming slot rows (until the next rebuild),
+    all cached answers and dashboard statistics.
+    """
+    occupancy_index.tables_changed()
+    slot_capacity.drop_upcoming()
+    availability_cache.invalidate_all()
+    dashboard.invalidate()
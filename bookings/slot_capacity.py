@@ -0,0 +1,299 @@
+# Per-slot capacity summary. Rows are built for a range of dates by the
+# rebuild_slot_capacity command and then kept current by applying each
+# booking change as a delta to the slots it affects, on rows locked for
+# the update. Dates that have not been built (and past dates) are left
+# alone; the grid answers those from the occupancy index.
+
+# Standard library imports
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+# Django imports
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+# Local application imports
+from .combinations import cheapest_combination
+from .models import Booking, SlotCapacity, Table
+from .occupancy import (
+    day_slots, load_day, load_days, occupancy_index, slot_mask)
+
+# Dates loaded per Booking query when rebuilding a long range
+REBUILD_WINDOW_DAYS = 31
+
+
+def slot_values(day, tables):
+    """
+    Return ``{slot time: (remaining seats, remaining tables)}`` for every
+    service slot of a day, where remaining tables maps each table capacity
+    (as a string, like the stored JSON) to the number of free tables.
+    """
+    values = {}
+    for slot_time in day_slots():
+        wanted = slot_mask(slot_time)
+        free = [
+            table.capacity for table in tables
+            if day.is_free(table.pk, wanted)
+        ]
+        values[slot_time] = (
+            sum(free),
+            {str(capacity): count
+             for capacity, count in sorted(Counter(free).items())},
+        )
+    return values
+
+
+def sync_days(days, tables, batch_size=None):
+    """
+    Write the slot capacity of each ``{date: DayOccupancy}`` entry, touching
+    only rows whose values changed. Returns ``(created, updated)`` counts.
+    The dates' existing rows must be locked by the caller (see
+    ``lock_dates``) before their bookings are read.
+    """
+    now = timezone.now()
+    existing = {
+        (row.slot_date, row.slot_time): row
+        for row in SlotCapacity.objects.filter(slot_date__in=list(days))
+    }
+
+    to_create, to_update = [], []
+    for slot_date, day in days.items():
+        for slot_time, (seats, free_tables) in slot_values(
+                day, tables).items():
+            row = existing.pop((slot_date, slot_time), None)
+            if row is None:
+                to_create.append(SlotCapacity(
+                    slot_date=slot_date,
+                    slot_time=slot_time,
+                    remaining_seats=seats,
+                    remaining_tables=free_tables,
+                ))
+            elif (row.remaining_seats, row.remaining_tables) != (
+                    seats, free_tables):
+                row.remaining_seats = seats
+                row.remaining_tables = free_tables
+                # bulk_update() does not apply auto_now
+                row.updated_at = now
+                to_update.append(row)
+
+    # A concurrent rebuild of the same dates may have created them first
+    SlotCapacity.objects.bulk_create(
+        to_create, batch_size=batch_size, ignore_conflicts=True)
+    SlotCapacity.objects.bulk_update(
+        to_update,
+        ['remaining_seats', 'remaining_tables', 'updated_at'],
+        batch_size=batch_size,
+    )
+    # Whatever is left is outside the current opening hours
+    if existing:
+        SlotCapacity.objects.filter(
+            pk__in=[row.pk for row in existing.values()]).delete()
+    return len(to_create), len(to_update)
+
+
+def lock_dates(start_date, end_date):
+    """
+    Lock the stored rows of the inclusive date range, so booking deltas
+    wait until a recomputation from the bookings read after it is written.
+    """
+    list(SlotCapacity.objects.select_for_update().filter(
+        slot_date__range=(start_date, end_date)
+    ).order_by('slot_date', 'slot_time').values_list('pk', flat=True))
+
+
+def refresh_dates(dates):
+    """
+    Recompute the stored rows of the given dates from the database, after
+    changes that bypass ``apply_changes``. Past and unbuilt dates are
+    skipped.
+    """
+    today = timezone.localdate()
+    with transaction.atomic():
+        built = set(SlotCapacity.objects.filter(
+            slot_date__in=[d for d in set(dates) if d >= today]
+        ).values_list('slot_date', flat=True).distinct())
+        if not built:
+            return 0, 0
+        lock_dates(min(built), max(built))
+        tables = list(Table.objects.all())
+        return sync_days({d: load_day(d) for d in built}, tables)
+
+
+def apply_changes(changes):
+    """
+    Update the stored rows for bookings whose held slot changed.
+
+    ``changes`` are ``(booking id, old slot, new slot)`` triples, each slot
+    a ``(table id, date, time)`` as returned by ``signals.held_slot`` or
+    None. For each table and date involved, the other active bookings of
+    the table are read once; every service slot whose "table is free"
+    answer flips gets a delta applied to its row. The rows of every slot
+    the changes overlap are locked first, in slot order like
+    ``lock_dates``, so concurrent changes that could flip the same slots
+    queue up and each reads the neighbours the previous one committed.
+    Tables are not locked: the allocator skips locked tables. Call inside
+    the transaction that wrote the bookings.
+    """
+    today = timezone.localdate()
+    masks = defaultdict(lambda: [0, 0])
+    booking_ids = defaultdict(set)
+    for booking_id, old_slot, new_slot in changes:
+        if old_slot == new_slot:
+            continue
+        for index, slot in enumerate((old_slot, new_slot)):
+            if slot is None or slot[1] < today:
+                continue
+            table_id, slot_date, booking_time = slot
+            masks[table_id, slot_date][index] |= slot_mask(booking_time)
+            booking_ids[table_id, slot_date].add(booking_id)
+    if not masks:
+        return
+
+    touched = {
+        (slot_date, slot_time)
+        for (_, slot_date), (old_mask, new_mask) in masks.items()
+        for slot_time in day_slots()
+        if slot_mask(slot_time) & (old_mask | new_mask)
+    }
+    with transaction.atomic():
+        built = set(_slot_rows(touched).select_for_update().order_by(
+            'slot_date', 'slot_time').values_list('slot_date', flat=True))
+        if not built:
+            return
+        capacities = dict(Table.objects.filter(
+            pk__in={table_id for table_id, _ in masks}
+        ).values_list('pk', 'capacity'))
+
+        deltas = defaultdict(Counter)
+        for (table_id, slot_date), (old_mask, new_mask) in masks.items():
+            if slot_date not in built or table_id not in capacities:
+                continue
+            others = 0
+            for booking_time in Booking.objects.filter(
+                    table_id=table_id,
+                    booking_date=slot_date,
+                    status__in=Booking.ACTIVE_STATUSES,
+            ).exclude(
+                pk__in=booking_ids[table_id, slot_date]
+            ).values_list('booking_time', flat=True):
+                others |= slot_mask(booking_time)
+            before, after = others | old_mask, others | new_mask
+            for slot_time in day_slots():
+                wanted = slot_mask(slot_time)
+                # +1 when the table becomes free for the slot, -1 when taken
+                delta = bool(before & wanted) - bool(after & wanted)
+                if delta:
+                    deltas[slot_date, slot_time][
+                        capacities[table_id]] += delta
+        if deltas:
+            _apply_deltas(deltas)
+
+
+def _slot_rows(slots):
+    """Return the stored rows of the given ``(date, time)`` slots."""
+    times = defaultdict(set)
+    for slot_date, slot_time in slots:
+        times[slot_date].add(slot_time)
+    condition = Q(pk__in=[])
+    for slot_date, slot_times in times.items():
+        condition |= Q(slot_date=slot_date, slot_time__in=slot_times)
+    return SlotCapacity.objects.filter(condition)
+
+
+def _apply_deltas(deltas):
+    # Already locked by apply_changes
+    rows = _slot_rows(deltas).order_by('slot_date', 'slot_time')
+    now = timezone.now()
+    changed = []
+    for row in rows:
+        delta = deltas.get((row.slot_date, row.slot_time))
+        if not delta:
+            continue
+        free = Counter({
+            int(capacity): count
+            for capacity, count in row.remaining_tables.items()})
+        free.update(delta)
+        row.remaining_seats = F('remaining_seats') + sum(
+            capacity * count for capacity, count in delta.items())
+        row.remaining_tables = {
+            str(capacity): count
+            for capacity, count in sorted(free.items()) if count > 0}
+        row.updated_at = now
+        changed.append(row)
+    SlotCapacity.objects.bulk_update(
+        changed, ['remaining_seats', 'remaining_tables', 'updated_at'])
+
+
+def drop_upcoming():
+    """
+    Drop the stored rows from today onward once the current transaction
+    commits, after tables change. The grid answers those dates from the
+    occupancy index until rebuild_slot_capacity builds them again.
+    """
+    transaction.on_commit(lambda: SlotCapacity.objects.filter(
+        slot_date__gte=timezone.localdate()).delete())
+
+
+def rebuild(start_date, end_date, batch_size=500):
+    """
+    Recompute the slot capacity of every date in the inclusive range, one
+    Booking query per window of dates. Returns ``(created, updated)``.
+    Call inside a transaction, which holds the row locks.
+    """
+    tables = list(Table.objects.all())
+    created = updated = 0
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(
+            window_start + timedelta(days=REBUILD_WINDOW_DAYS - 1), end_date)
+        lock_dates(window_start, window_end)
+        window_created, window_updated = sync_days(
+            load_days(window_start, window_end), tables, batch_size)
+        created += window_created
+        updated += window_updated
+        window_start = window_end + timedelta(days=1)
+    return created, updated
+
+
+def free_table_counts(booking_date, number_of_guests):
+    """
+    Return ``(slot time, free table count)`` for every bookable slot of a
+    day from its stored rows, or None when the date has not been built or
+    the rows cannot answer for the party (see ``_bookable_counts``).
+    """
+    counts = _bookable_counts(
+        SlotCapacity.objects.filter(slot_date=booking_date),
+        booking_date, number_of_guests)
+    if counts and not all(free for _, free in counts):
+        if cheapest_combination(occupancy_index.tables(), number_of_guests):
+            return None
+    return counts
+
+
+async def afree_table_counts(booking_date, number_of_guests):
+    """Async version of ``free_table_counts`` using the async ORM."""
+    rows = SlotCapacity.objects.filter(slot_date=booking_date)
+    counts = _bookable_counts(
+        [row async for row in rows], booking_date, number_of_guests)
+    if counts and not all(free for _, free in counts):
+        tables = await occupancy_index.atables()
+        if cheapest_combination(tables, number_of_guests):
+            return None
+    return counts
+
+
+def _bookable_counts(rows, booking_date, number_of_guests):
+    # Rows count free tables per capacity, not per combination group, so
+    # a slot with no single table for the party may still seat it on
+    # combined tables; callers fall back to the occupancy index then
+    rows = list(rows)
+    if not rows:
+        return None
+    now = timezone.localtime()
+    return [
+        (row.slot_time, row.free_tables_for(number_of_guests))
+        for row in rows
+        # Slots earlier today can no longer be booked
+        if booking_date != now.date() or row.slot_time >= now.time()
+    ]
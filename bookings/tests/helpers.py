@@ -0,0 +1,23 @@
+# bookings/tests/helpers.py
+# Standard library imports
+from datetime import time
+
+# Local application imports
+from bookings.models import Booking
+
+
+def book(user, table, booking_date, booking_time=time(19, 0),
+         number_of_guests=2, status='confirmed', **fields):
+    """
+    Create a booking for the tests, for two guests at 19:00 and confirmed
+    unless told otherwise.
+    """
+    return Booking.objects.create(
+        user=user,
+        table=table,
+        booking_date=booking_date,
+        booking_time=booking_time,
+        number_of_guests=number_of_guests,
+        status=status,
+        **fields
+    )
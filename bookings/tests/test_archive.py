@@ -0,0 +1,158 @@
+# bookings/tests/test_archive.py
+# Standard library imports
+from datetime import date, time, timedelta
+from io import StringIO
+
+# Django imports (third-party)
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+# Local application imports
+from bookings.archive import archive_old_bookings
+from bookings.models import (
+    Table, Booking, BookingArchive, SlotCapacity, WaitlistEntry)
+from bookings.search import keyword_filter
+from bookings.slot_capacity import rebuild
+from bookings.tests.helpers import book
+
+User = get_user_model()
+
+
+@override_settings(BOOKINGS_ARCHIVE_AFTER_DAYS=30)
+class ArchiveBookingsTest(TestCase):
+    """
+    Tests for archiving old bookings and reading them back as history.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='archiveuser', password='password123')
+        cls.table = Table.objects.create(
+            number=1, capacity=4, combination_group='window')
+        cls.extra_table = Table.objects.create(
+            number=2, capacity=4, combination_group='window')
+        today = date.today()
+        cls.old_date = today - timedelta(days=60)
+        cls.recent_date = today - timedelta(days=5)
+
+        cls.old_bookings = [
+            cls.book(cls.old_date - timedelta(days=days), 'completed')
+            for days in range(3)
+        ]
+        cls.old_party = cls.book(cls.old_date, 'cancelled',
+                                 booking_time=time(12, 0),
+                                 number_of_guests=7)
+        cls.old_extra = cls.book(cls.old_date, 'cancelled',
+                                 table=cls.extra_table,
+                                 booking_time=time(12, 0),
+                                 combined_with=cls.old_party)
+        cls.recent_booking = cls.book(cls.recent_date, 'completed')
+
+        cls.entry = WaitlistEntry.objects.create(
+            user=cls.user,
+            booking_date=cls.old_bookings[0].booking_date,
+            booking_time=time(19, 0),
+            number_of_guests=2,
+            status='promoted',
+            booking=cls.old_bookings[0],
+        )
+        rebuild(cls.old_date, cls.old_date)
+
+    @classmethod
+    def book(cls, booking_date, status, booking_time=time(19, 0), **fields):
+        fields.setdefault('table', cls.table)
+        return book(cls.user, booking_date=booking_date,
+                    booking_time=booking_time, status=status,
+                    notes='Window seat please', **fields)
+
+    def archive(self, *args):
+        out = StringIO()
+        call_command('archive_bookings', *args, stdout=out)
+        return out.getvalue()
+
+    def test_moves_old_bookings_to_the_archive(self):
+        """
+        Test that bookings older than the horizon leave the live table with
+        their details kept, and recent bookings stay live.
+        """
+        output = self.archive()
+
+        self.assertIn("Archived 4 booking(s)", output)
+        self.assertIn("in 1 batch(es).", output)
+        self.assertEqual(list(Booking.objects.all()), [self.recent_booking])
+        archived = BookingArchive.objects.get(pk=self.old_bookings[1].pk)
+        self.assertEqual(archived.user, self.user)
+        self.assertEqual(archived.table_number, 1)
+        self.assertEqual(archived.table_capacity, 4)
+        self.assertEqual(archived.booking_date,
+                         self.old_bookings[1].booking_date)
+        self.assertEqual(archived.status, 'completed')
+        self.assertEqual(archived.notes, 'Window seat please')
+        self.assertEqual(archived.created_at, self.old_bookings[1].created_at)
+
+    def test_folds_combined_tables_into_their_party(self):
+        """
+        Test that a combination is archived as one row listing its extra
+        tables.
+        """
+        self.archive()
+
+        archived = BookingArchive.objects.get(pk=self.old_party.pk)
+        self.assertEqual(archived.number_of_guests, 7)
+        self.assertEqual(archived.combined_table_numbers, [2])
+        self.assertFalse(
+            BookingArchive.objects.filter(pk=self.old_extra.pk).exists())
+
+    def test_clears_references_and_derived_rows(self):
+        """
+        Test that waitlist entries let go of archived bookings, archived
+        bookings leave the search index, and old slot capacity rows go.
+        """
+        self.assertTrue(
+            SlotCapacity.objects.filter(slot_date=self.old_date).exists())
+
+        self.archive()
+
+        self.entry.refresh_from_db()
+        self.assertIsNone(self.entry.booking)
+        self.assertEqual(self.entry.status, 'promoted')
+        self.assertFalse(Booking.objects.filter(
+            keyword_filter('window')).exclude(
+                pk=self.recent_booking.pk).exists())
+        self.assertFalse(
+            SlotCapacity.objects.filter(slot_date=self.old_date).exists())
+
+    def test_works_in_bounded_batches(self):
+        """
+        Test that bookings are archived at most a batch at a time.
+        """
+        self.assertEqual(list(archive_old_bookings(batch_size=3)), [3, 1])
+        self.assertIn("Archived 0 booking(s)", self.archive())
+
+    def test_rejects_empty_batches(self):
+        """
+        Test that a batch size below one is refused.
+        """
+        with self.assertRaises(CommandError):
+            self.archive('--batch-size', '0')
+
+    def test_my_bookings_lists_live_and_archived_history(self):
+        """
+        Test that a user's past bookings read both tables, newest first.
+        """
+        self.archive()
+        self.client.login(username='archiveuser', password='password123')
+
+        response = self.client.get(reverse('my_bookings'))
+
+        past = response.context['past_bookings']
+        self.assertEqual(
+            [booking.pk for booking in past],
+            [self.recent_booking.pk, self.old_bookings[0].pk,
+             self.old_party.pk, self.old_bookings[1].pk,
+             self.old_bookings[2].pk])
+        self.assertIsInstance(past[1], BookingArchive)
+        self.assertContains(response, 'Cancelled')
@@ -0,0 +1,117 @@
+# bookings/tests/test_async_views.py
+# Standard library imports
+import json
+from datetime import date, time, timedelta
+
+# Django imports (third-party)
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.test import AsyncRequestFactory, RequestFactory, TestCase
+
+# Local application imports
+from bookings import async_views, views
+from bookings.models import Table, Booking
+
+User = get_user_model()
+
+
+class AsyncViewsTest(TestCase):
+    """
+    Tests that the async views answer like their sync counterparts.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='asyncuser', password='password123')
+        cls.table1 = Table.objects.create(number=1, capacity=2)
+        cls.table2 = Table.objects.create(number=2, capacity=4)
+        cls.future_date = date.today() + timedelta(days=7)
+        cls.booking = Booking.objects.create(
+            user=cls.user,
+            table=cls.table1,
+            booking_date=cls.future_date,
+            booking_time=time(19, 0),
+            number_of_guests=2,
+            status='confirmed'
+        )
+
+    def setUp(self):
+        self.factory = AsyncRequestFactory()
+
+    def request(self, method, path, data=None, user=None):
+        request = getattr(self.factory, method)(path, data or {})
+        request.user = user or AnonymousUser()
+        request._messages = CookieStorage(request)
+        return request
+
+    async def sync_json(self, view, params):
+        request = RequestFactory().get('/', params)
+        response = await sync_to_async(view)(request)
+        return json.loads(response.content)
+
+    async def test_grid_matches_sync_view(self):
+        """
+        Test that the async grid returns the sync grid's answer.
+        """
+        params = {'check_date': self.future_date.isoformat(),
+                  'num_guests': 2}
+        response = await async_views.availability_grid(
+            self.request('get', '/', params))
+
+        self.assertEqual(response.status_code, 200)
+        expected = await self.sync_json(views.availability_grid, params)
+        self.assertEqual(json.loads(response.content), expected)
+
+    async def test_calendar_matches_sync_view(self):
+        """
+        Test that the async calendar returns the sync calendar's answer.
+        """
+        params = {'check_date': self.future_date.isoformat(),
+                  'num_guests': 2, 'days': 3}
+        response = await async_views.availability_calendar(
+            self.request('get', '/', params))
+
+        expected = await self.sync_json(
+            views.availability_calendar, params)
+        self.assertEqual(json.loads(response.content), expected)
+
+    async def test_json_endpoints_only_accept_get(self):
+        """
+        Test that other methods are rejected like with require_GET.
+        """
+        response = await async_views.availability_grid(
+            self.request('post', '/'))
+        self.assertEqual(response.status_code, 405)
+
+    async def test_check_availability_lists_free_tables(self):
+        """
+        Test that the async availability check excludes booked tables.
+        """
+        response = await async_views.check_availability(
+            self.request('post', '/', {
+                'check_date': self.future_date.isoformat(),
+                'check_time': '19:00',
+                'num_guests': 2,
+            }))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Found 1 table(s) available.")
+
+    async def test_my_bookings_requires_login(self):
+        """
+        Test that anonymous users are sent to the login page.
+        """
+        response = await async_views.my_bookings(
+            self.request('get', '/my-bookings/'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/accounts/login/', response.url)
+
+    async def test_my_bookings_lists_upcoming_bookings(self):
+        """
+        Test that the user's bookings are rendered with their tables.
+        """
+        response = await async_views.my_bookings(
+            self.request('get', '/my-bookings/', user=self.user))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Booking for Table 1")
@@ -0,0 +1,529 @@
+# bookings/tests/test_availability.py
+# Standard library imports
+import threading
+from datetime import date, time, timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
+# Django imports (third-party)
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.db.utils import IntegrityError
+from django.urls import reverse
+
+# Local application imports
+from bookings import availability, availability_cache, slot_capacity
+from bookings.availability import (
+    DATE_LOCK_POOL_SIZE,
+    allocate_table,
+    allocate_tables,
+    date_lock,
+    find_available_table,
+    find_available_tables,
+    find_seating,
+)
+from bookings.combinations import cheapest_combination
+from bookings.models import Table, Booking
+from bookings.occupancy import occupancy_index
+from bookings.tests.helpers import book
+
+User = get_user_model()
+
+
+class AvailabilityServiceTest(TestCase):
+    """
+    Tests for the shared table availability service.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='availabilityuser', password='password123')
+        cls.small_table = Table.objects.create(number=1, capacity=2)
+        cls.medium_table = Table.objects.create(number=2, capacity=4)
+        cls.large_table = Table.objects.create(number=3, capacity=8)
+        cls.future_date = date.today() + timedelta(days=7)
+        cls.booking_time = time(19, 0)
+
+    def book(self, table, booking_time, status='confirmed'):
+        return book(self.user, table, self.future_date, booking_time,
+                    status=status)
+
+    def test_best_fit_table_is_smallest_free_table(self):
+        """
+        Test that the smallest table seating the party is chosen.
+        """
+        table = find_available_table(self.future_date, self.booking_time, 3)
+        self.assertEqual(table, self.medium_table)
+
+    def test_overlapping_active_booking_blocks_table(self):
+        """
+        Test that overlapping pending and confirmed bookings block the table.
+        """
+        self.book(self.small_table, time(18, 30), status='pending')
+        self.book(self.medium_table, time(19, 45))
+
+        tables = list(
+            find_available_tables(self.future_date, self.booking_time, 2))
+        self.assertEqual(tables, [self.large_table])
+
+    def test_adjacent_booking_does_not_block_table(self):
+        """
+        Test that a booking ending as the new one starts leaves it free.
+        """
+        self.book(self.small_table, time(18, 0))
+        self.book(self.small_table, time(20, 0))
+
+        table = find_available_table(self.future_date, self.booking_time, 2)
+        self.assertEqual(table, self.small_table)
+
+    def test_cancelled_booking_releases_table(self):
+        """
+        Test that cancelled bookings, even at the exact time, do not block.
+        """
+        self.book(self.small_table, self.booking_time, status='cancelled')
+
+        table = find_available_table(self.future_date, self.booking_time, 2)
+        self.assertEqual(table, self.small_table)
+
+    def test_excluded_booking_does_not_conflict_with_itself(self):
+        """
+        Test that an edited booking does not block its own table.
+        """
+        booking = self.book(self.small_table, self.booking_time)
+
+        table = find_available_table(
+            self.future_date, self.booking_time, 2, exclude_booking=booking)
+        self.assertEqual(table, self.small_table)
+
+    def test_lookup_is_a_single_query(self):
+        """
+        Test that finding the free tables runs exactly one query.
+        """
+        self.book(self.small_table, self.booking_time)
+        with self.assertNumQueries(1):
+            tables = list(
+                find_available_tables(self.future_date, self.booking_time, 2))
+        self.assertEqual(tables, [self.medium_table, self.large_table])
+
+    def test_booking_ending_at_midnight_leaves_next_day_free(self):
+        """
+        Test that the latest booking of a day, which holds its table up to
+        midnight, does not block the table on the next day.
+        """
+        self.book(self.small_table, time(23, 0))
+
+        next_day = self.future_date + timedelta(days=1)
+        self.assertEqual(
+            find_available_table(self.future_date, time(23, 30), 2),
+            self.medium_table)
+        self.assertEqual(
+            find_available_table(next_day, time(0, 0), 2), self.small_table)
+
+
+class AllocateTableTest(TestCase):
+    """
+    Tests for locking table allocation.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='allocationuser', password='password123')
+        cls.small_table = Table.objects.create(number=1, capacity=2)
+        cls.large_table = Table.objects.create(number=2, capacity=6)
+        cls.future_date = date.today() + timedelta(days=7)
+
+    def new_booking(self, number_of_guests=2):
+        return Booking(
+            user=self.user,
+            booking_date=self.future_date,
+            booking_time=time(19, 0),
+            number_of_guests=number_of_guests,
+            status='confirmed'
+        )
+
+    def test_allocates_and_saves_best_fit_table(self):
+        """
+        Test that the smallest free table is assigned and saved.
+        """
+        booking = self.new_booking()
+        self.assertEqual(allocate_table(booking), self.small_table)
+        self.assertIsNotNone(booking.pk)
+        self.assertEqual(
+            Booking.objects.get(pk=booking.pk).table, self.small_table)
+
+    def test_returns_none_when_no_table_fits(self):
+        """
+        Test that nothing is saved when every fitting table is taken.
+        """
+        allocate_table(self.new_booking(number_of_guests=5))
+
+        booking = self.new_booking(number_of_guests=5)
+        self.assertIsNone(allocate_table(booking))
+        self.assertIsNone(booking.pk)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_falls_through_to_next_table_after_lost_race(self):
+        """
+        Test that losing a race for a table moves on to the next one.
+        """
+        booking = self.new_booking()
+        original_save = Booking.save
+        calls = []
+
+        def save_losing_first_race(instance, *args, **kwargs):
+            calls.append(instance.table_id)
+            if len(calls) == 1:
+                raise IntegrityError("unique_active_table_slot")
+            return original_save(instance, *args, **kwargs)
+
+        with patch.object(Booking, 'save', save_losing_first_race):
+            table = allocate_table(booking)
+
+        self.assertEqual(calls, [self.small_table.pk, self.large_table.pk])
+        self.assertEqual(table, self.large_table)
+
+    def test_edited_booking_keeps_table_when_nothing_fits(self):
+        """
+        Test that a failed edit leaves the booking's table unchanged.
+        """
+        booking = self.new_booking()
+        allocate_table(booking)
+
+        booking.number_of_guests = 10
+        self.assertIsNone(allocate_table(booking))
+        self.assertEqual(booking.table, self.small_table)
+
+    def test_date_locks_come_from_a_fixed_pool(self):
+        """
+        Test that locking many dates does not add locks.
+        """
+        for offset in range(DATE_LOCK_POOL_SIZE * 2):
+            with date_lock(self.future_date + timedelta(days=offset)):
+                pass
+        self.assertEqual(
+            len(availability._date_locks), DATE_LOCK_POOL_SIZE)
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            'needs PostgreSQL (set TEST_DATABASE_URL)')
+class ConcurrentAllocationTest(TransactionTestCase):
+    """
+    Tests for allocations meeting tables locked by other allocations.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='allocationuser', password='password123')
+        self.future_date = date.today() + timedelta(days=7)
+
+    def new_booking(self, booking_time, number_of_guests=2):
+        return Booking(
+            user=self.user,
+            booking_date=self.future_date,
+            booking_time=booking_time,
+            number_of_guests=number_of_guests,
+            status='confirmed'
+        )
+
+    def allocate_in_thread(self, booking):
+        """Start ``allocate_tables`` in another thread and connection."""
+        result = {}
+
+        def allocate():
+            try:
+                result['tables'] = allocate_tables(booking)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=allocate)
+        thread.start()
+        return thread, result
+
+    def test_waits_for_a_table_locked_for_another_time(self):
+        """
+        Test that a table locked by an allocation for another time is
+        waited for rather than reported taken.
+        """
+        table = Table.objects.create(number=1, capacity=4)
+        with transaction.atomic():
+            allocate_table(self.new_booking(time(12, 0)))
+            thread, result = self.allocate_in_thread(
+                self.new_booking(time(19, 0)))
+            thread.join(0.5)
+            self.assertTrue(thread.is_alive())
+        thread.join(5)
+
+        self.assertEqual(result['tables'], [table])
+
+    def test_waits_for_combination_tables_locked_for_another_time(self):
+        """
+        Test that a combination whose tables are locked for another time
+        is waited for rather than reported taken.
+        """
+        tables = [Table.objects.create(
+            number=number, capacity=2, combination_group='patio')
+            for number in (1, 2)]
+        with transaction.atomic():
+            allocate_table(self.new_booking(time(12, 0)))
+            thread, result = self.allocate_in_thread(
+                self.new_booking(time(19, 0), number_of_guests=4))
+            thread.join(0.5)
+            self.assertTrue(thread.is_alive())
+        thread.join(5)
+
+        self.assertEqual(set(result['tables']), set(tables))
+
+
+class TableCombinationTest(TestCase):
+    """
+    Tests for seating large parties at combinations of tables.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='combinationuser', password='password123')
+        cls.table1 = Table.objects.create(
+            number=1, capacity=6, combination_group='terrace')
+        cls.table2 = Table.objects.create(
+            number=2, capacity=6, combination_group='terrace')
+        cls.table3 = Table.objects.create(
+            number=3, capacity=4, combination_group='terrace')
+        cls.table4 = Table.objects.create(number=4, capacity=8)
+        cls.future_date = date.today() + timedelta(days=7)
+
+    def new_booking(self, number_of_guests):
+        return Booking(
+            user=self.user,
+            booking_date=self.future_date,
+            booking_time=time(19, 0),
+            number_of_guests=number_of_guests,
+            status='confirmed'
+        )
+
+    def test_cheapest_combination_minimises_tables_then_seats(self):
+        """
+        Test that fewest tables win, then fewest empty seats.
+        """
+        tables = [self.table1, self.table2, self.table3, self.table4]
+        self.assertEqual(
+            cheapest_combination(tables, 10), [self.table1, self.table3])
+        self.assertEqual(
+            cheapest_combination(tables, 12), [self.table1, self.table2])
+        self.assertEqual(
+            cheapest_combination(tables, 14),
+            [self.table1, self.table2, self.table3])
+        self.assertIsNone(cheapest_combination(tables, 17))
+
+    def test_ungrouped_tables_never_combine(self):
+        """
+        Test that tables without a combination group are left alone.
+        """
+        self.assertIsNone(
+            cheapest_combination([self.table3, self.table4], 10))
+
+    def test_large_party_is_seated_at_a_combination(self):
+        """
+        Test that the extra tables are held by linked bookings.
+        """
+        booking = self.new_booking(10)
+        self.assertEqual(
+            allocate_tables(booking), [self.table1, self.table3])
+
+        self.assertEqual(booking.table, self.table1)
+        extra = booking.combined_tables.get()
+        self.assertEqual(extra.table, self.table3)
+        self.assertEqual(extra.number_of_guests, 0)
+        self.assertNotIn(
+            self.table3,
+            find_available_tables(self.future_date, time(19, 30), 1))
+
+    def test_cancelling_a_party_releases_every_table(self):
+        """
+        Test that the status of a party reaches its extra tables.
+        """
+        booking = self.new_booking(10)
+        allocate_tables(booking)
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(
+            booking.combined_tables.get().status, 'cancelled')
+        self.assertEqual(
+            find_available_tables(self.future_date, time(19, 0), 1).count(),
+            4)
+
+    def test_editing_a_party_down_to_one_table(self):
+        """
+        Test that a party shrinking to one table frees its extra tables.
+        """
+        booking = self.new_booking(10)
+        allocate_tables(booking)
+
+        booking.number_of_guests = 6
+        self.assertEqual(allocate_tables(booking), [self.table1])
+        self.assertFalse(booking.combined_tables.exists())
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_failed_edit_keeps_the_existing_combination(self):
+        """
+        Test that extra tables are restored when nothing fits the edit.
+        """
+        booking = self.new_booking(10)
+        allocate_tables(booking)
+
+        booking.number_of_guests = 30
+        self.assertIsNone(allocate_tables(booking))
+        self.assertEqual(booking.combined_tables.get().table, self.table3)
+
+    def test_reads_offer_the_combination_the_allocator_books(self):
+        """
+        Test that availability reads seat a large party on the combination
+        ``allocate_tables`` would book.
+        """
+        occupancy_index.clear()
+        self.assertEqual(find_seating(self.future_date, time(19, 0), 10),
+                         [self.table1, self.table3])
+        self.assertEqual(
+            occupancy_index.free_tables(self.future_date, time(19, 0), 10),
+            [self.table1, self.table3])
+        self.assertEqual(
+            occupancy_index.nearest_free_slots(
+                self.future_date, time(19, 0), 10, limit=1)[0][1],
+            self.table1)
+
+        params = {'check_date': self.future_date.isoformat(),
+                  'num_guests': 10}
+        grid = self.client.get(reverse('availability_grid'), params).json()
+        self.assertTrue(all(slot['free_tables'] == 1
+                            for slot in grid['slots']))
+        calendar = self.client.get(
+            reverse('availability_calendar'), {**params, 'days': 1}).json()
+        self.assertTrue(calendar['calendar'][0]['available'])
+
+        response = self.client.post(reverse('check_availability'), {
+            'check_date': self.future_date.isoformat(),
+            'check_time': '19:00',
+            'num_guests': 10,
+        })
+        self.assertContains(response, "Tables 1 + 3 can be combined")
+
+    def test_grid_rows_defer_to_the_index_for_combinations(self):
+        """
+        Test that stored slot rows, which only count single tables, leave
+        parties a combination could seat to the occupancy index.
+        """
+        occupancy_index.clear()
+        slot_capacity.rebuild(self.future_date, self.future_date)
+        allocate_tables(self.new_booking(6))
+
+        self.assertIsNone(
+            slot_capacity.free_table_counts(self.future_date, 10))
+        counts = dict(occupancy_index.free_table_counts(self.future_date, 10))
+        self.assertEqual(counts[time(19, 0)], 1)
+        self.assertEqual(counts[time(12, 0)], 1)
+        # No combination seats 17, so the rows answer
+        self.assertFalse(any(
+            free for _, free in
+            slot_capacity.free_table_counts(self.future_date, 17)))
+
+
+@override_settings(BOOKINGS_AVAILABILITY_CACHE_TTL=60)
+class AvailabilityCacheTest(TestCase):
+    """
+    Tests for cached availability answers and their invalidation.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='cacheuser', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=4)
+        cls.first_date = date.today() + timedelta(days=7)
+        cls.second_date = cls.first_date + timedelta(days=1)
+
+    def setUp(self):
+        cache.clear()
+        self.computed = []
+
+    def lookup(self, booking_date):
+        def compute():
+            self.computed.append(booking_date)
+            return [booking_date.isoformat()]
+        return availability_cache.get_or_compute(
+            [booking_date], f"test:{booking_date}", compute)
+
+    def test_repeat_lookup_is_served_from_cache(self):
+        """
+        Test that an unchanged date is only computed once.
+        """
+        self.lookup(self.first_date)
+        self.assertEqual(
+            self.lookup(self.first_date), [self.first_date.isoformat()])
+        self.assertEqual(self.computed, [self.first_date])
+
+    def test_booking_change_invalidates_only_its_date(self):
+        """
+        Test that saving a booking drops answers for its date alone.
+        """
+        self.lookup(self.first_date)
+        self.lookup(self.second_date)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                user=self.user, table=self.table,
+                booking_date=self.first_date, booking_time=time(19, 0),
+                number_of_guests=2, status='confirmed'
+            )
+        self.lookup(self.first_date)
+        self.lookup(self.second_date)
+        self.assertEqual(
+            self.computed,
+            [self.first_date, self.second_date, self.first_date])
+
+    def test_invalidation_waits_for_commit(self):
+        """
+        Test that answers stay cached until the booking change commits,
+        so a read of the old state cannot be cached as current.
+        """
+        self.lookup(self.first_date)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Booking.objects.create(
+                user=self.user, table=self.table,
+                booking_date=self.first_date, booking_time=time(19, 0),
+                number_of_guests=2, status='confirmed'
+            )
+            self.lookup(self.first_date)
+            self.assertEqual(self.computed, [self.first_date])
+        self.lookup(self.first_date)
+        self.assertEqual(self.computed, [self.first_date, self.first_date])
+
+    def test_moving_a_booking_invalidates_old_and_new_dates(self):
+        """
+        Test that editing a booking's date refreshes both dates.
+        """
+        booking = Booking.objects.create(
+            user=self.user, table=self.table,
+            booking_date=self.first_date, booking_time=time(19, 0),
+            number_of_guests=2, status='confirmed'
+        )
+        booking = Booking.objects.get(pk=booking.pk)
+        self.lookup(self.first_date)
+        self.lookup(self.second_date)
+
+        booking.booking_date = self.second_date
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        self.lookup(self.first_date)
+        self.lookup(self.second_date)
+        self.assertEqual(len(self.computed), 4)
+
+    def test_table_change_invalidates_every_date(self):
+        """
+        Test that adding a table drops all cached answers.
+        """
+        self.lookup(self.first_date)
+        with self.captureOnCommitCallbacks(execute=True):
+            Table.objects.create(number=2, capacity=2)
+        self.lookup(self.first_date)
+        self.assertEqual(self.computed, [self.first_date, self.first_date])
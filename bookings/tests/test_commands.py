@@ -0,0 +1,197 @@
+# bookings/tests/test_commands.py
+# Standard library imports
+from datetime import date, time, timedelta
+from io import StringIO
+from unittest import mock, skipIf
+
+# Django imports (third-party)
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+
+# Local application imports
+from bookings.live_updates import change_notifier
+from bookings.models import Table, Booking, SlotCapacity
+from bookings.occupancy import day_slots
+from bookings.partitions import month_start, partition_name
+from bookings.slot_capacity import rebuild
+from bookings.tests.helpers import book
+
+User = get_user_model()
+
+
+class ExplainBookingQueriesCommandTest(TestCase):
+    """
+    Tests for the explain_booking_queries management command.
+    """
+    def test_prints_plan_for_each_view_query(self):
+        """
+        Test that every view query gets a labelled, index-backed plan.
+        """
+        out = StringIO()
+        call_command('explain_booking_queries', stdout=out)
+        output = out.getvalue()
+        for label in ("availability: free tables",
+                      "my_bookings: upcoming",
+                      "staff_dashboard: statistics",
+                      "staff_booking_list: all",
+                      "staff_table_delete: active bookings",
+                      "complete_past_bookings: batch",
+                      "archive_bookings: batch"):
+            self.assertIn(label, output)
+        # On PostgreSQL the plan names the month partitions' own indexes
+        self.assertRegex(
+            output,
+            "booking_user_date_idx|user_id_booking_date_booking_time_idx")
+
+
+class RebuildSlotCapacityCommandTest(TestCase):
+    """
+    Tests for the rebuild_slot_capacity management command.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='rebuilduser', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=4)
+        cls.future_date = date.today() + timedelta(days=7)
+        Booking.objects.create(
+            user=cls.user,
+            table=cls.table,
+            booking_date=cls.future_date,
+            booking_time=time(19, 0),
+            number_of_guests=2,
+            status='confirmed'
+        )
+        rebuild(cls.future_date, cls.future_date)
+
+    def test_rebuild_creates_and_repairs_rows(self):
+        """
+        Test that missing dates are built and stale rows are corrected.
+        """
+        SlotCapacity.objects.filter(slot_time=time(19, 0)).update(
+            remaining_seats=99)
+
+        out = StringIO()
+        call_command(
+            'rebuild_slot_capacity',
+            '--start', self.future_date.isoformat(), '--days', '2',
+            stdout=out)
+
+        self.assertIn(f"{len(day_slots())} created, 1 updated",
+                      out.getvalue())
+        self.assertEqual(
+            SlotCapacity.objects.get(
+                slot_date=self.future_date, slot_time=time(19, 0)
+            ).remaining_seats, 0)
+        self.assertEqual(
+            SlotCapacity.objects.filter(
+                slot_date=self.future_date + timedelta(days=1)).count(),
+            len(day_slots()))
+
+
+class CompletePastBookingsCommandTest(TestCase):
+    """
+    Tests for the complete_past_bookings management command.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='sweepuser', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=4)
+        today = date.today()
+        cls.past_confirmed = [
+            cls.book(today - timedelta(days=days), 'confirmed')
+            for days in range(1, 6)
+        ]
+        cls.past_pending = cls.book(today - timedelta(days=1), 'pending',
+                                    booking_time=time(12, 0))
+        cls.future_confirmed = cls.book(today + timedelta(days=1),
+                                        'confirmed')
+
+    @classmethod
+    def book(cls, booking_date, status, booking_time=time(19, 0)):
+        return book(cls.user, cls.table, booking_date, booking_time,
+                    status=status)
+
+    def sweep(self, *args):
+        out = StringIO()
+        call_command('complete_past_bookings', *args, stdout=out)
+        return out.getvalue()
+
+    def test_completes_only_confirmed_bookings_that_ended(self):
+        """
+        Test that confirmed bookings that have ended are completed, and
+        pending or upcoming bookings are left alone.
+        """
+        output = self.sweep()
+
+        self.assertIn("Completed 5 past booking(s) in 1 batch(es).", output)
+        for booking in self.past_confirmed:
+            booking.refresh_from_db()
+            self.assertEqual(booking.status, 'completed')
+        self.past_pending.refresh_from_db()
+        self.future_confirmed.refresh_from_db()
+        self.assertEqual(self.past_pending.status, 'pending')
+        self.assertEqual(self.future_confirmed.status, 'confirmed')
+
+    def test_works_in_bounded_batches(self):
+        """
+        Test that bookings are completed at most a batch at a time, one
+        bulk UPDATE and one change broadcast per batch.
+        """
+        with mock.patch.object(change_notifier, 'publish_many') as publish:
+            output = self.sweep('--batch-size', '2')
+
+        self.assertIn("Completed 5 past booking(s) in 3 batch(es).", output)
+        self.assertEqual(
+            [len(call.args[0]) for call in publish.call_args_list],
+            [2, 2, 1])
+        self.assertFalse(Booking.objects.filter(
+            pk__in=[b.pk for b in self.past_confirmed], status='confirmed'
+        ).exists())
+
+    def test_second_run_finds_nothing(self):
+        """
+        Test that running again right away has nothing left to do.
+        """
+        self.sweep()
+        # One empty SELECT, inside its (savepoint) transaction
+        with self.assertNumQueries(3):
+            output = self.sweep()
+        self.assertIn("Completed 0 past booking(s) in 0 batch(es).", output)
+
+    def test_rejects_empty_batches(self):
+        """
+        Test that a batch size below one is refused.
+        """
+        with self.assertRaises(CommandError):
+            self.sweep('--batch-size', '0')
+
+
+class CreateBookingPartitionsCommandTest(TestCase):
+    """
+    Tests for the create_booking_partitions management command.
+    """
+    @skipIf(connection.vendor == 'postgresql',
+            'the booking table is partitioned on PostgreSQL')
+    def test_leaves_plain_tables_alone(self):
+        """
+        Test that the command does nothing where the table is not
+        partitioned.
+        """
+        out = StringIO()
+        call_command('create_booking_partitions', stdout=out)
+        self.assertIn("not partitioned on this database", out.getvalue())
+
+    def test_names_one_partition_per_month(self):
+        """
+        Test that months are counted across year ends and each gets its
+        own partition name.
+        """
+        self.assertEqual(month_start(date(2025, 11, 17), 2), date(2026, 1, 1))
+        self.assertEqual(month_start(date(2026, 3, 31), -3), date(2025, 12, 1))
+        self.assertEqual(partition_name(date(2026, 1, 1)),
+                         'bookings_booking_y2026m01')
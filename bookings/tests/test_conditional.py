@@ -0,0 +1,222 @@
+# bookings/tests/test_conditional.py
+# Standard library imports
+from datetime import date, time, timedelta
+from unittest.mock import patch
+
+# Django imports (third-party)
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.test import AsyncRequestFactory, TestCase
+from django.urls import reverse
+from django.utils.http import http_date
+
+# Local application imports
+from bookings import async_views
+from bookings.models import Table, Booking
+from bookings.tests.helpers import book
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    """
+    Tests for ETag handling of the read-heavy views.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='etaguser', password='password123')
+        cls.other_user = User.objects.create_user(
+            username='otheruser', password='password123')
+        cls.table1 = Table.objects.create(number=1, capacity=2)
+        cls.table2 = Table.objects.create(number=2, capacity=4)
+        cls.future_date = date.today() + timedelta(days=7)
+        cls.booking = Booking.objects.create(
+            user=cls.user,
+            table=cls.table1,
+            booking_date=cls.future_date,
+            booking_time=time(19, 0),
+            number_of_guests=2,
+            status='confirmed'
+        )
+
+    def get_grid(self, **headers):
+        return self.client.get(reverse('availability_grid'), {
+            'check_date': self.future_date.isoformat(),
+            'num_guests': 2,
+        }, headers=headers)
+
+    def get_my_bookings(self, **headers):
+        return self.client.get(reverse('my_bookings'), headers=headers)
+
+    def book(self, booking_date, user=None):
+        return book(user or self.other_user, self.table2, booking_date,
+                    time(12, 0))
+
+    def test_unchanged_grid_is_not_modified(self):
+        """
+        Test that repeating a grid request with its ETag returns 304.
+        """
+        response = self.get_grid()
+        self.assertEqual(response.status_code, 200)
+
+        response = self.get_grid(if_none_match=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_grid_sends_no_last_modified(self):
+        """
+        Test that no Last-Modified is sent, as deletes leave no timestamp,
+        and If-Modified-Since alone never gets a 304 after one.
+        """
+        booking = self.book(self.future_date)
+        response = self.get_grid()
+        self.assertFalse(response.has_header('Last-Modified'))
+        booking.delete()
+
+        response = self.get_grid(if_modified_since=http_date())
+        self.assertEqual(response.status_code, 200)
+
+    def test_booking_on_date_changes_grid_etag(self):
+        """
+        Test that a new booking on the date invalidates the grid ETag.
+        """
+        etag = self.get_grid()['ETag']
+        self.book(self.future_date)
+
+        response = self.get_grid(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_deleted_booking_changes_grid_etag(self):
+        """
+        Test that deleting a booking changes the ETag even though no
+        remaining row was updated.
+        """
+        booking = self.book(self.future_date)
+        etag = self.get_grid()['ETag']
+        booking.delete()
+
+        self.assertEqual(self.get_grid(if_none_match=etag).status_code, 200)
+
+    def test_booking_on_other_date_keeps_grid_etag(self):
+        """
+        Test that bookings on unrelated dates do not invalidate the grid.
+        """
+        etag = self.get_grid()['ETag']
+        self.book(self.future_date + timedelta(days=3))
+
+        self.assertEqual(self.get_grid(if_none_match=etag).status_code, 304)
+
+    def test_table_change_changes_grid_etag(self):
+        """
+        Test that changing the tables invalidates the grid ETag.
+        """
+        etag = self.get_grid()['ETag']
+        # No longer seats the party of two
+        self.table2.capacity = 1
+        with self.captureOnCommitCallbacks(execute=True):
+            self.table2.save()
+
+        self.assertEqual(self.get_grid(if_none_match=etag).status_code, 200)
+
+    def test_grid_etag_follows_the_body_served(self):
+        """
+        Test that the grid ETag is taken from the answer actually served,
+        so a stale per-process answer never shares a tag with a fresh one.
+        """
+        # The occupancy index answers this date, its rows not being built
+        with patch('bookings.occupancy.free_table_counts',
+                   return_value=[(time(19, 0), 1)]):
+            stale = self.get_grid()
+        with patch('bookings.occupancy.free_table_counts',
+                   return_value=[(time(19, 0), 0)]):
+            fresh = self.get_grid(if_none_match=stale['ETag'])
+
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.json()['slots'][0]['free_tables'], 0)
+        self.assertNotEqual(fresh['ETag'], stale['ETag'])
+
+    def test_calendar_covers_its_whole_range(self):
+        """
+        Test that a booking on the last day of the range changes the
+        calendar ETag.
+        """
+        # Only table 2 seats three, so its booking changes the answer
+        params = {'check_date': self.future_date.isoformat(),
+                  'num_guests': 3, 'days': 3}
+        etag = self.client.get(
+            reverse('availability_calendar'), params)['ETag']
+        self.book(self.future_date + timedelta(days=2))
+
+        response = self.client.get(
+            reverse('availability_calendar'), params,
+            headers={'if_none_match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_unchanged_my_bookings_is_not_modified(self):
+        """
+        Test that my bookings returns 304 until the user's bookings change.
+        """
+        self.client.login(username='etaguser', password='password123')
+        # The first page sets the CSRF cookie that the tag depends on
+        self.get_my_bookings()
+        etag = self.get_my_bookings()['ETag']
+
+        self.book(self.future_date)
+        self.assertEqual(self.get_my_bookings(if_none_match=etag).status_code,
+                         304)
+
+        self.booking.status = 'cancelled'
+        self.booking.save()
+        response = self.get_my_bookings(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'bookings/my_bookings.html')
+
+    def test_my_bookings_etag_is_per_user(self):
+        """
+        Test that two users never share a my bookings ETag.
+        """
+        self.client.login(username='etaguser', password='password123')
+        etag = self.get_my_bookings()['ETag']
+        self.client.login(username='otheruser', password='password123')
+
+        self.assertNotEqual(self.get_my_bookings()['ETag'], etag)
+
+    def test_pending_messages_are_rendered(self):
+        """
+        Test that a page with a message waiting is rendered, not a 304.
+        """
+        completed = self.book(self.future_date, user=self.user)
+        completed.status = 'completed'
+        completed.save()
+        self.client.login(username='etaguser', password='password123')
+        self.get_my_bookings()
+        etag = self.get_my_bookings()['ETag']
+
+        # Refused without changing anything, but leaves a warning
+        self.client.post(reverse('cancel_booking', args=[completed.id]))
+        response = self.get_my_bookings(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Cannot cancel.")
+
+    async def test_async_grid_is_not_modified(self):
+        """
+        Test that the async grid answers 304 for an unchanged ETag.
+        """
+        factory = AsyncRequestFactory()
+        params = {'check_date': self.future_date.isoformat(),
+                  'num_guests': 2}
+
+        def request(**headers):
+            request = factory.get('/', params, headers=headers)
+            request.user = AnonymousUser()
+            request._messages = CookieStorage(request)
+            return request
+
+        response = await async_views.availability_grid(request())
+        self.assertEqual(response.status_code, 200)
+        response = await async_views.availability_grid(
+            request(if_none_match=response['ETag']))
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,136 @@
+# bookings/tests/test_dashboard.py
+# Standard library imports
+from datetime import time, timedelta
+
+# Django imports (third-party)
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+# Local application imports
+from bookings.dashboard import compute_stats, dashboard_stats
+from bookings.models import Table, Booking
+from bookings.tests.helpers import book
+
+User = get_user_model()
+
+
+class DashboardStatsTest(TestCase):
+    """
+    Tests for the staff dashboard statistics.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='diner', password='password123')
+        cls.staff_user = User.objects.create_user(
+            username='staffuser', password='password123', is_staff=True)
+        cls.table1 = Table.objects.create(number=1, capacity=4)
+        cls.table2 = Table.objects.create(number=2, capacity=4)
+        cls.table3 = Table.objects.create(number=3, capacity=2)
+        cls.today = timezone.now().date()
+
+        cls.book(cls.table1, cls.today, time(19, 0), 4, 'confirmed')
+        cls.book(cls.table2, cls.today, time(19, 30), 3, 'pending')
+        cls.book(cls.table3, cls.today, time(12, 0), 2, 'cancelled')
+        cls.book(cls.table3, cls.today, time(9, 0), 2, 'completed')
+        cls.book(cls.table1, cls.today + timedelta(days=2), time(20, 0), 2,
+                 'confirmed')
+        cls.book(cls.table1, cls.today - timedelta(days=1), time(19, 0), 4,
+                 'confirmed')
+
+    @classmethod
+    def book(cls, table, booking_date, booking_time, guests, status):
+        return book(cls.user, table, booking_date, booking_time, guests,
+                    status)
+
+    def setUp(self):
+        cache.clear()
+
+    def covers_at(self, stats, hour):
+        return next(row for row in stats['covers_per_hour']
+                    if row['hour'] == hour)
+
+    def test_counts_match_the_dashboard_definitions(self):
+        """
+        Test that the counts cover active bookings from today onward and
+        confirmed bookings today.
+        """
+        stats = compute_stats(self.today)
+
+        self.assertEqual(stats['upcoming_active_bookings_count'], 3)
+        self.assertEqual(stats['confirmed_today_count'], 1)
+        self.assertEqual(stats['total_tables'], 3)
+        self.assertEqual(stats['total_seats'], 10)
+
+    def test_covers_per_hour_and_utilization(self):
+        """
+        Test that today's covers are grouped by starting hour, skip
+        cancelled bookings and give the seat utilization.
+        """
+        stats = compute_stats(self.today)
+
+        self.assertEqual(self.covers_at(stats, '19:00')['covers'], 7)
+        self.assertEqual(self.covers_at(stats, '19:00')['utilization'], 70.0)
+        self.assertEqual(self.covers_at(stats, '09:00')['covers'], 2)
+        self.assertEqual(self.covers_at(stats, '12:00')['covers'], 0)
+        self.assertEqual(stats['covers_today'], 9)
+        hours = len(stats['covers_per_hour'])
+        self.assertEqual(stats['seat_utilization'],
+                         round(100 * 9 / (10 * hours), 1))
+
+    def test_stats_take_one_query(self):
+        """
+        Test that every statistic comes from a single query, with or
+        without bookings.
+        """
+        with self.assertNumQueries(1):
+            compute_stats(self.today)
+        with self.assertNumQueries(1):
+            stats = compute_stats(self.today + timedelta(days=30))
+        self.assertEqual(stats['upcoming_active_bookings_count'], 0)
+        self.assertEqual(stats['total_tables'], 3)
+
+    def test_no_tables(self):
+        """
+        Test that an empty restaurant reports zeros.
+        """
+        Booking.objects.all().delete()
+        Table.objects.all().delete()
+
+        stats = compute_stats(self.today)
+        self.assertEqual(stats['total_tables'], 0)
+        self.assertEqual(stats['seat_utilization'], 0.0)
+
+    @override_settings(BOOKINGS_DASHBOARD_CACHE_TTL=60)
+    def test_stats_are_cached_until_a_booking_changes(self):
+        """
+        Test that cached statistics are reused and dropped once a booking
+        change commits.
+        """
+        dashboard_stats(self.today)
+        with self.assertNumQueries(0):
+            dashboard_stats(self.today)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.table2, self.today, time(21, 0), 2, 'confirmed')
+
+        stats = dashboard_stats(self.today)
+        self.assertEqual(stats['confirmed_today_count'], 2)
+
+    def test_dashboard_is_staff_only(self):
+        """
+        Test that non-staff users are sent to the staff login.
+        """
+        self.client.login(username='diner', password='password123')
+        response = self.client.get(reverse('staff_dashboard'))
+        self.assertRedirects(
+            response,
+            f"{reverse('admin:login')}?next={reverse('staff_dashboard')}")
+
+        self.client.login(username='staffuser', password='password123')
+        response = self.client.get(reverse('staff_dashboard'))
+        self.assertContains(response, 'id="seat-utilization">')
+        self.assertEqual(response.context['covers_today'], 9)
@@ -0,0 +1,230 @@
+# bookings/tests/test_export.py
+# Standard library imports
+import csv
+import io
+import json
+from datetime import date, time, timedelta
+from unittest import mock
+
+# Django imports (third-party)
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import (
+    AsyncRequestFactory,
+    TestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+# Local application imports
+from bookings import async_views, export
+from bookings.models import Table, Booking
+
+User = get_user_model()
+
+
+@override_settings(BOOKINGS_ASYNC_VIEWS=False)
+class BookingExportTest(TestCase):
+    """
+    Tests for the streaming staff booking export.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff_user = User.objects.create_user(
+            username='staffuser', password='password123', is_staff=True)
+        cls.user = User.objects.create_user(
+            username='diner', password='password123')
+        cls.table = Table.objects.create(number=4, capacity=4)
+        cls.day = date.today() + timedelta(days=10)
+        for offset, status in enumerate(
+                ['confirmed', 'pending', 'cancelled', 'confirmed']):
+            Booking.objects.create(
+                user=cls.user,
+                table=cls.table,
+                booking_date=cls.day + timedelta(days=offset),
+                booking_time=time(19, 0),
+                number_of_guests=2,
+                status=status,
+                notes='Window, "quiet"' if offset == 0 else '',
+            )
+
+    def setUp(self):
+        self.client.login(username='staffuser', password='password123')
+
+    def export(self, **params):
+        return self.client.get(reverse('staff_booking_export'), params)
+
+    def content(self, response):
+        # Iterating the response also consumes the async view's stream
+        return b''.join(response)
+
+    def csv_rows(self, response):
+        content = self.content(response).decode()
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_csv_export_streams_every_booking(self):
+        """
+        Test that the CSV export is a streamed attachment with a header row
+        and one row per booking, newest first.
+        """
+        response = self.export()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="bookings-',
+                      response['Content-Disposition'])
+        rows = self.csv_rows(response)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[-1]['booking_date'], self.day.isoformat())
+        self.assertEqual(rows[-1]['username'], 'diner')
+        self.assertEqual(rows[-1]['table'], '4')
+        self.assertEqual(rows[-1]['notes'], 'Window, "quiet"')
+
+    def test_csv_export_neutralises_formulas(self):
+        """
+        Test that notes and usernames a spreadsheet would run as formulas
+        are exported as text, and the JSON export is left as it is.
+        """
+        user = User.objects.create_user(
+            username='@mallory', password='password123')
+        Booking.objects.create(
+            user=user,
+            table=self.table,
+            booking_date=self.day + timedelta(days=5),
+            booking_time=time(19, 0),
+            number_of_guests=2,
+            status='confirmed',
+            notes='=HYPERLINK("http://example.com","Click")',
+        )
+
+        row = self.csv_rows(self.export())[0]
+        self.assertEqual(row['username'], "'@mallory")
+        self.assertEqual(
+            row['notes'], '\'=HYPERLINK("http://example.com","Click")')
+        record = json.loads(self.content(self.export(format='json')))[0]
+        self.assertEqual(record['username'], '@mallory')
+
+    def test_export_takes_the_list_filters_and_a_date_range(self):
+        """
+        Test that the status, keyword and date range filters narrow the
+        export.
+        """
+        rows = self.csv_rows(self.export(status='confirmed'))
+        self.assertEqual(len(rows), 2)
+
+        rows = self.csv_rows(self.export(q='quiet'))
+        self.assertEqual(len(rows), 1)
+
+        rows = self.csv_rows(self.export(
+            date_from=(self.day + timedelta(days=1)).isoformat(),
+            date_to=(self.day + timedelta(days=2)).isoformat()))
+        self.assertEqual({row['status'] for row in rows},
+                         {'pending', 'cancelled'})
+
+    def test_json_export_is_one_array(self):
+        """
+        Test that the JSON export parses as an array of bookings.
+        """
+        response = self.export(format='json', status='pending')
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        rows = json.loads(self.content(response))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['status'], 'pending')
+        self.assertEqual(rows[0]['booking_time'], '19:00:00')
+
+        response = self.export(format='json', q='nobody')
+        self.assertEqual(json.loads(self.content(response)), [])
+
+    def test_export_reads_rows_lazily_from_one_cursor(self):
+        """
+        Test that no booking is read until the body is streamed, and that
+        small chunks still come from a single query.
+        """
+        with mock.patch.object(export, 'EXPORT_CHUNK_SIZE', 1):
+            response = self.export()
+            with self.assertNumQueries(1):
+                rows = self.csv_rows(response)
+        self.assertEqual(len(rows), 4)
+
+    def test_invalid_filters_are_rejected(self):
+        """
+        Test that a bad date or a reversed range is answered with 400.
+        """
+        response = self.export(date='not-a-date')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date', response.json()['errors'])
+
+        response = self.export(
+            date_from=self.day.isoformat(),
+            date_to=(self.day - timedelta(days=1)).isoformat())
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_is_staff_only(self):
+        """
+        Test that non-staff users are sent to the staff login.
+        """
+        self.client.login(username='diner', password='password123')
+        response = self.export()
+        self.assertRedirects(
+            response,
+            f"{reverse('admin:login')}?next={reverse('staff_booking_export')}")
+
+    def test_booking_list_links_to_a_filtered_export(self):
+        """
+        Test that the booking list's export links carry its filters.
+        """
+        response = self.client.get(
+            reverse('staff_booking_list'), {'status': 'pending'})
+        self.assertContains(
+            response,
+            f"{reverse('staff_booking_export')}?status=pending&amp;"
+            f"format=csv")
+
+
+class AsyncBookingExportTest(TestCase):
+    """
+    Tests for the async staff booking export.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff_user = User.objects.create_user(
+            username='staffuser', password='password123', is_staff=True)
+        cls.table = Table.objects.create(number=4, capacity=4)
+        Booking.objects.create(
+            user=cls.staff_user,
+            table=cls.table,
+            booking_date=date.today() + timedelta(days=3),
+            booking_time=time(18, 0),
+            number_of_guests=3,
+            status='confirmed',
+        )
+
+    def request(self, user, **params):
+        request = AsyncRequestFactory().get('/', params)
+        request.user = user
+        return request
+
+    async def test_async_export_streams_asynchronously(self):
+        """
+        Test that the async view streams the rows from an async iterator.
+        """
+        response = await async_views.staff_booking_export(
+            self.request(self.staff_user, format='json'))
+
+        self.assertTrue(response.is_async)
+        rows = json.loads(b''.join([
+            chunk async for chunk in response.streaming_content]))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['number_of_guests'], 3)
+
+    async def test_async_export_is_staff_only(self):
+        """
+        Test that anonymous users are sent to the staff login.
+        """
+        response = await async_views.staff_booking_export(
+            self.request(AnonymousUser()))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(
+            response['Location'].startswith(reverse('admin:login')))
@@ -0,0 +1,200 @@
+# bookings/tests/test_live_updates.py
+# Standard library imports
+import asyncio
+import json
+import time as clock
+from datetime import date, time, timedelta
+from unittest import mock, skipUnless
+
+# Django imports (third-party)
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.test import (
+    AsyncRequestFactory, TestCase, TransactionTestCase, override_settings)
+from django.urls import reverse
+
+# Local application imports
+from bookings import async_views
+from bookings.live_updates import CHANNEL, ChangeNotifier, change_notifier
+from bookings.models import Table, Booking
+
+User = get_user_model()
+
+
+class LiveUpdatesTest(TestCase):
+    """
+    Tests for the booking change notifier and the staff dashboard stream.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff_user = User.objects.create_user(
+            username='staffuser', password='password123', is_staff=True)
+        cls.user = User.objects.create_user(
+            username='guestuser', password='password123')
+        cls.table = Table.objects.create(number=7, capacity=4)
+        cls.future_date = date.today() + timedelta(days=3)
+
+    def setUp(self):
+        # TestCase never commits, so a NOTIFY would never be delivered;
+        # NotifyRelayTest covers that path
+        patcher = mock.patch.object(
+            ChangeNotifier, 'uses_notify', new_callable=mock.PropertyMock,
+            return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_booking(self, **fields):
+        fields.setdefault('table', self.table)
+        with self.captureOnCommitCallbacks(execute=True):
+            return Booking.objects.create(
+                user=self.user,
+                booking_date=self.future_date,
+                booking_time=time(19, 0),
+                number_of_guests=2,
+                status='confirmed',
+                **fields
+            )
+
+    def stream_request(self, user):
+        request = AsyncRequestFactory().get('/')
+        request.user = user
+        return request
+
+    async def next_event(self, stream):
+        """Return the next ``(event, data)``, skipping other messages."""
+        while True:
+            chunk = (await asyncio.wait_for(anext(stream), 2)).decode()
+            if chunk.startswith('event: '):
+                event, data = chunk.strip().split('\n')
+                return event[len('event: '):], json.loads(data[len('data: '):])
+
+    async def test_committed_change_reaches_subscribers(self):
+        """
+        Test that a saved booking is delivered once its transaction commits.
+        """
+        queue = change_notifier.subscribe()
+        try:
+            booking = await sync_to_async(self.create_booking)()
+            change = await asyncio.wait_for(queue.get(), 2)
+        finally:
+            change_notifier.unsubscribe(queue)
+
+        self.assertEqual(change['action'], 'created')
+        self.assertEqual(change['id'], booking.id)
+        self.assertEqual(change['booking_time'], '19:00')
+
+    async def test_uncommitted_change_is_not_sent(self):
+        """
+        Test that nothing is delivered while the change is uncommitted.
+        """
+        queue = change_notifier.subscribe()
+        try:
+            await Booking.objects.acreate(
+                user=self.user,
+                table=self.table,
+                booking_date=self.future_date,
+                booking_time=time(12, 0),
+                number_of_guests=2,
+            )
+            await asyncio.sleep(0.05)
+            self.assertTrue(queue.empty())
+        finally:
+            change_notifier.unsubscribe(queue)
+
+    async def test_stream_pushes_counts_and_changes(self):
+        """
+        Test that the stream sends the counts, then each change followed
+        by refreshed counts.
+        """
+        response = await async_views.staff_dashboard_stream(
+            self.stream_request(self.staff_user))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        try:
+            event, counts = await self.next_event(stream)
+            self.assertEqual(event, 'counts')
+            self.assertEqual(counts['upcoming_active_bookings_count'], 0)
+            self.assertEqual(counts['total_tables'], 1)
+
+            booking = await sync_to_async(self.create_booking)()
+
+            event, row = await self.next_event(stream)
+            self.assertEqual(event, 'booking')
+            self.assertEqual(row['id'], booking.id)
+            self.assertEqual(row['username'], 'guestuser')
+            self.assertEqual(row['table'], 7)
+            event, counts = await self.next_event(stream)
+            self.assertEqual(event, 'counts')
+            self.assertEqual(counts['upcoming_active_bookings_count'], 1)
+        finally:
+            await stream.aclose()
+
+    async def test_stream_is_staff_only(self):
+        """
+        Test that non-staff and anonymous users cannot open the stream.
+        """
+        for user in (self.user, AnonymousUser()):
+            response = await async_views.staff_dashboard_stream(
+                self.stream_request(user))
+            self.assertEqual(response.status_code, 403)
+
+    @override_settings(BOOKINGS_ASYNC_VIEWS=False)
+    def test_dashboard_connects_only_when_streaming(self):
+        """
+        Test that the dashboard page does not open a stream under WSGI.
+        """
+        self.client.login(username='staffuser', password='password123')
+        response = self.client.get(reverse('staff_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['live_updates'])
+        self.assertNotContains(response, 'EventSource')
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            'needs PostgreSQL (set TEST_DATABASE_URL)')
+class NotifyRelayTest(TransactionTestCase):
+    """
+    Tests for relaying booking changes through NOTIFY on PostgreSQL.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='guestuser', password='password123')
+        self.table = Table.objects.create(number=7, capacity=4)
+
+    def tearDown(self):
+        change_notifier.stop_listener()
+
+    def wait_for_listener(self):
+        """Wait until the listener thread has run its LISTEN."""
+        with connection.cursor() as cursor:
+            for _ in range(50):
+                cursor.execute(
+                    'SELECT 1 FROM pg_stat_activity WHERE query = %s',
+                    [f'LISTEN {CHANNEL}'])
+                if cursor.fetchone():
+                    return
+                clock.sleep(0.1)
+        self.fail("The NOTIFY listener did not start")
+
+    async def test_committed_change_arrives_through_notify(self):
+        """
+        Test that a committed booking reaches subscribers via NOTIFY.
+        """
+        queue = change_notifier.subscribe()
+        try:
+            await sync_to_async(self.wait_for_listener)()
+            booking = await Booking.objects.acreate(
+                user=self.user,
+                table=self.table,
+                booking_date=date.today() + timedelta(days=3),
+                booking_time=time(19, 0),
+                number_of_guests=2,
+            )
+            change = await asyncio.wait_for(queue.get(), 2)
+        finally:
+            change_notifier.unsubscribe(queue)
+
+        self.assertEqual(change['action'], 'created')
+        self.assertEqual(change['id'], booking.id)
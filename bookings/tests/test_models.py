@@ -1,11 +1,16 @@
 # bookings/tests/test_models.py
 # Standard library imports
-from datetime import date, time, timedelta
+from datetime import date, datetime, time, timedelta
+from importlib import import_module
+from unittest import skipIf
 
 # Django imports (third-party)
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.db.utils import IntegrityError
+from django.utils import timezone
 
 # Local application imports
 from bookings.models import Table, Booking
@@ -113,6 +118,77 @@ class BookingModelTest(TestCase):
                 status='pending'
             )
 
+    def test_booking_time_range_is_derived_on_save(self):
+        """
+        Test that starts_at/ends_at follow the booking date and time.
+        """
+        booking = Booking.objects.create(
+            user=self.user,
+            table=self.table,
+            booking_date=self.future_date,
+            booking_time=time(21, 30),
+            number_of_guests=2,
+            status='pending'
+        )
+        booking.refresh_from_db()
+        self.assertEqual(
+            timezone.localtime(booking.starts_at).replace(tzinfo=None),
+            datetime.combine(self.future_date, time(21, 30)))
+        self.assertEqual(booking.ends_at - booking.starts_at,
+                         Booking.DURATION)
+
+    def test_booking_may_not_run_past_midnight(self):
+        """
+        Test that a booking whose held period would cross into the next
+        day (and its partition) is rejected, while one ending at
+        midnight is accepted.
+        """
+        booking = Booking(
+            user=self.user,
+            table=self.table,
+            booking_date=self.future_date,
+            booking_time=time(23, 30),
+            number_of_guests=2,
+            status='pending'
+        )
+        with self.assertRaises(ValidationError) as raised:
+            booking.full_clean()
+        self.assertIn('latest start time is 23:00',
+                      str(raised.exception.message_dict['booking_time']))
+
+        booking.booking_time = time(23, 0)
+        booking.full_clean()
+
+    @skipIf(connection.vendor == 'postgresql',
+            'the exclusion constraint already refuses the overlapping rows')
+    def test_overlap_check_names_clashing_bookings(self):
+        """
+        Test that the check run before migration 0004 adds the overlap
+        exclusion finds active bookings holding a table at the same time.
+        """
+        migration = import_module(
+            'bookings.migrations.0004_booking_time_range')
+        bookings = [
+            Booking.objects.create(
+                user=self.user,
+                table=self.table,
+                booking_date=self.future_date,
+                booking_time=booking_time,
+                number_of_guests=2,
+                status=status
+            )
+            for booking_time, status in [
+                (time(18, 0), 'confirmed'),
+                (time(18, 30), 'pending'),
+                (time(18, 45), 'cancelled'),
+                (time(19, 30), 'confirmed'),
+            ]
+        ]
+
+        self.assertEqual(
+            migration.active_overlaps(connection),
+            [(bookings[0].pk, bookings[1].pk, self.table.pk)])
+
     def test_booking_status_choices(self):
         """
         Test that booking status choices are as expected.
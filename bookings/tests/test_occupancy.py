@@ -0,0 +1,191 @@
+# bookings/tests/test_occupancy.py
+# Standard library imports
+import threading
+from datetime import date, time, timedelta
+from unittest import mock
+
+# Django imports (third-party)
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+# Local application imports
+from bookings.models import Table
+from bookings.occupancy import load_day, occupancy_index, slot_mask
+from bookings.tests.helpers import book
+
+User = get_user_model()
+
+
+class RecordingLock:
+    """A lock that records the threads taking it."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def __enter__(self):
+        self.threads.append(threading.get_ident())
+        return self.lock.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self.lock.__exit__(*exc_info)
+
+
+class OccupancyIndexTest(TestCase):
+    """
+    Tests for the in-memory slot occupancy index.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='occupancyuser', password='password123')
+        cls.table1 = Table.objects.create(number=1, capacity=2)
+        cls.table2 = Table.objects.create(number=2, capacity=4)
+        cls.future_date = date.today() + timedelta(days=7)
+        cls.booking_time = time(19, 0)
+
+    def setUp(self):
+        occupancy_index.clear()
+
+    def tearDown(self):
+        occupancy_index.clear()
+
+    def book(self, table, booking_time, status='confirmed'):
+        return book(self.user, table, self.future_date, booking_time,
+                    status=status)
+
+    def test_slot_masks_overlap_like_bookings(self):
+        """
+        Test that masks intersect exactly when the bookings overlap.
+        """
+        mask = slot_mask(time(19, 0))
+        self.assertEqual(bin(mask).count('1'), 4)
+        self.assertTrue(mask & slot_mask(time(18, 15)))
+        self.assertTrue(mask & slot_mask(time(19, 45)))
+        self.assertFalse(mask & slot_mask(time(18, 0)))
+        self.assertFalse(mask & slot_mask(time(20, 0)))
+
+    def test_free_tables_loaded_from_database(self):
+        """
+        Test that a day is loaded lazily and respects active bookings.
+        """
+        self.book(self.table1, time(18, 30))
+        self.book(self.table2, self.booking_time, status='cancelled')
+
+        free = occupancy_index.free_tables(
+            self.future_date, self.booking_time, 2)
+        self.assertEqual(free, [self.table2])
+
+    def test_loaded_day_is_answered_without_queries(self):
+        """
+        Test that repeat lookups for a loaded day hit no database.
+        """
+        occupancy_index.free_tables(self.future_date, self.booking_time, 2)
+        with self.assertNumQueries(0):
+            free = occupancy_index.free_tables(
+                self.future_date, self.booking_time, 4)
+        self.assertEqual(free, [self.table2])
+
+    def test_signals_patch_loaded_day(self):
+        """
+        Test that saving and cancelling bookings updates the index.
+        """
+        occupancy_index.free_tables(self.future_date, self.booking_time, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking = self.book(self.table1, self.booking_time)
+        self.assertEqual(
+            occupancy_index.free_tables(
+                self.future_date, self.booking_time, 2),
+            [self.table2])
+
+        booking.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.save()
+        self.assertEqual(
+            occupancy_index.free_tables(
+                self.future_date, self.booking_time, 2),
+            [self.table1, self.table2])
+
+    def test_rolled_back_booking_leaves_no_trace(self):
+        """
+        Test that the index is only patched once a booking commits.
+        """
+        occupancy_index.free_tables(self.future_date, self.booking_time, 2)
+
+        with self.captureOnCommitCallbacks(execute=False):
+            self.book(self.table1, self.booking_time)
+        self.assertEqual(
+            occupancy_index.free_tables(
+                self.future_date, self.booking_time, 2),
+            [self.table1, self.table2])
+
+    def test_table_list_expires(self):
+        """
+        Test that tables changed by another process are picked up once
+        the TTL has passed.
+        """
+        self.assertEqual(occupancy_index.tables(), [self.table1, self.table2])
+        # As if added by another worker: no signal reaches this index
+        with self.captureOnCommitCallbacks(execute=False):
+            table3 = Table.objects.create(number=3, capacity=6)
+        self.assertEqual(occupancy_index.tables(), [self.table1, self.table2])
+
+        with override_settings(BOOKINGS_OCCUPANCY_TTL=-1):
+            self.assertEqual(
+                occupancy_index.tables(),
+                [self.table1, self.table2, table3])
+
+    def test_day_loaded_across_a_change_is_not_kept(self):
+        """
+        Test that a day whose load raced a committed booking is served
+        once but loaded again on the next lookup.
+        """
+        def load_then_book(booking_date):
+            day = load_day(booking_date)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.book(self.table1, self.booking_time)
+            return day
+
+        with mock.patch('bookings.occupancy.load_day',
+                        side_effect=load_then_book):
+            self.assertEqual(
+                occupancy_index.free_tables(
+                    self.future_date, self.booking_time, 2),
+                [self.table1, self.table2])
+        self.assertEqual(
+            occupancy_index.free_tables(
+                self.future_date, self.booking_time, 2),
+            [self.table2])
+
+    async def test_async_loads_take_no_lock_on_the_event_loop(self):
+        """
+        Test that the async lookups only take the index lock off the
+        event loop's thread, to store what they loaded.
+        """
+        lock = RecordingLock()
+        with mock.patch.object(occupancy_index, '_lock', lock):
+            day = await occupancy_index.aday(self.future_date)
+            tables = await occupancy_index.atables()
+            self.assertIs(await occupancy_index.aday(self.future_date), day)
+            self.assertIs(await occupancy_index.atables(), tables)
+
+        self.assertEqual(len(lock.threads), 2)
+        self.assertNotIn(threading.get_ident(), lock.threads)
+
+    @override_settings(BOOKINGS_OCCUPANCY_INDEX=True)
+    def test_check_availability_uses_index(self):
+        """
+        Test that check_availability answers from the index when enabled.
+        """
+        self.book(self.table1, self.booking_time)
+        response = self.client.post(reverse('check_availability'), {
+            'check_date': self.future_date.isoformat(),
+            'check_time': self.booking_time.strftime('%H:%M'),
+            'num_guests': 2,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(response.context['available_tables']), [self.table2])
+        self.assertContains(response, "Found 1 table(s) available.")
@@ -0,0 +1,288 @@
+# bookings/tests/test_partitions.py
+# Standard library imports
+from datetime import time, timedelta
+from io import StringIO
+from unittest import skipUnless
+
+# Django imports (third-party)
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+# Local application imports
+from bookings.availability import overlapping_bookings
+from bookings.models import Table, Booking, WaitlistEntry
+from bookings.partitions import (
+    DEFAULT_PARTITION,
+    KEY_TABLE,
+    PARTITION_MONTHS_AHEAD,
+    create_partitions,
+    existing_partitions,
+    month_start,
+    partition_name,
+    uses_partitions,
+)
+from bookings.tests.helpers import book
+
+User = get_user_model()
+
+
+def partition_of(booking):
+    """Return the name of the partition holding a booking's row."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT tableoid::regclass::text FROM bookings_booking '
+            'WHERE id = %s', [booking.pk])
+        return cursor.fetchone()[0]
+
+
+def check_deferred_constraints():
+    """Run the deferred foreign key checks of the open transaction."""
+    with connection.cursor() as cursor:
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute('SET CONSTRAINTS ALL DEFERRED')
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            'needs PostgreSQL (set TEST_DATABASE_URL)')
+class BookingPartitionTest(TestCase):
+    """
+    Tests for the monthly partitions of the Booking table on PostgreSQL.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='partitionuser', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=4)
+        # Mid-month, so the day before lies in the same partition
+        cls.next_month = month_start(timezone.localdate(), 1)
+        cls.future_date = cls.next_month + timedelta(days=14)
+
+    def book(self, booking_date, booking_time=time(19, 0)):
+        return book(self.user, self.table, booking_date, booking_time)
+
+    def test_migrations_partition_the_booking_table(self):
+        """
+        Test that the table is partitioned with a partition per month
+        ahead and a default partition.
+        """
+        self.assertTrue(uses_partitions())
+        partitions = existing_partitions()
+        self.assertIn(DEFAULT_PARTITION, partitions)
+        self.assertIn(partition_name(self.next_month), partitions)
+        self.assertIn(
+            partition_name(month_start(
+                timezone.localdate(), PARTITION_MONTHS_AHEAD)),
+            partitions)
+
+    def test_bookings_land_in_their_month(self):
+        """
+        Test that a booking is stored in its month's partition.
+        """
+        booking = self.book(self.future_date)
+        self.assertEqual(
+            partition_of(booking), partition_name(self.next_month))
+
+    def test_overlap_lookup_reads_only_its_partition(self):
+        """
+        Test that the overlap lookup is pruned to the partition of its
+        date.
+        """
+        plan = overlapping_bookings(*Booking.time_range(
+            self.future_date, time(19, 0))).explain()
+        self.assertIn(partition_name(self.next_month), plan)
+        self.assertNotIn(
+            partition_name(month_start(self.next_month, 1)), plan)
+        self.assertNotIn(DEFAULT_PARTITION, plan)
+
+    def test_partitions_reject_overlapping_active_bookings(self):
+        """
+        Test that each partition keeps the overlap exclusion.
+        """
+        self.book(self.future_date)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.book(self.future_date, time(19, 30))
+
+    def test_new_partition_takes_its_month_from_the_default(self):
+        """
+        Test that creating a month's partition moves its bookings out of
+        the default partition and keeps the overlap exclusion.
+        """
+        far_month = month_start(
+            timezone.localdate(), PARTITION_MONTHS_AHEAD + 2)
+        far_date = far_month + timedelta(days=9)
+        booking = self.book(far_date)
+        self.assertEqual(partition_of(booking), DEFAULT_PARTITION)
+
+        self.assertEqual(create_partitions(far_month, far_month),
+                         [partition_name(far_month)])
+
+        self.assertEqual(partition_of(booking), partition_name(far_month))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.book(far_date, time(19, 30))
+
+    def test_command_creates_missing_months(self):
+        """
+        Test that the command only creates the months that are missing.
+        """
+        out = StringIO()
+        call_command('create_booking_partitions', '--months',
+                     str(PARTITION_MONTHS_AHEAD + 1), stdout=out)
+        last_month = month_start(
+            timezone.localdate(), PARTITION_MONTHS_AHEAD + 1)
+        self.assertIn(f"Created {partition_name(last_month)}",
+                      out.getvalue())
+        self.assertIn("Created 1 partition(s)", out.getvalue())
+
+    def test_ids_stay_unique_across_partitions(self):
+        """
+        Test that a booking id cannot be reused in another partition.
+        """
+        booking = self.book(self.future_date)
+        copy = Booking(
+            pk=booking.pk, user=self.user, table=self.table,
+            booking_date=month_start(self.next_month, 1),
+            booking_time=time(19, 0), number_of_guests=2)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            copy.save(force_insert=True)
+
+    def test_moving_a_booking_keeps_its_key(self):
+        """
+        Test that moving a booking to another month's partition keeps
+        its id registered for foreign keys.
+        """
+        booking = self.book(self.future_date)
+        booking.booking_date = month_start(self.next_month, 1)
+        booking.save()
+        self.assertEqual(
+            partition_of(booking), partition_name(booking.booking_date))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {KEY_TABLE} WHERE id = %s',
+                [booking.pk])
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_foreign_keys_to_bookings_are_enforced(self):
+        """
+        Test that a waitlist entry cannot point at a missing booking.
+        """
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            WaitlistEntry.objects.create(
+                user=self.user,
+                booking_date=self.future_date,
+                booking_time=time(19, 0),
+                number_of_guests=2,
+                status='promoted',
+                booking_id=10 ** 9,
+            )
+            check_deferred_constraints()
+
+    def test_deleting_a_referenced_booking_is_refused(self):
+        """
+        Test that the database refuses to drop a booking a combination
+        still points at.
+        """
+        booking = self.book(self.future_date)
+        extra_table = Table.objects.create(number=2, capacity=2)
+        Booking.objects.create(
+            user=self.user, table=extra_table,
+            booking_date=self.future_date, booking_time=time(19, 0),
+            number_of_guests=0, status='confirmed', combined_with=booking)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM bookings_booking WHERE id = %s',
+                    [booking.pk])
+            check_deferred_constraints()
+
+    def test_active_bookings_must_end_by_midnight(self):
+        """
+        Test that the database rejects an active booking running past
+        midnight.
+        """
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.book(self.future_date, time(23, 30))
+
+    def test_new_partition_keeps_moved_ids_registered(self):
+        """
+        Test that bookings moved out of the default partition stay
+        referenceable.
+        """
+        far_month = month_start(
+            timezone.localdate(), PARTITION_MONTHS_AHEAD + 2)
+        booking = self.book(far_month + timedelta(days=9))
+        WaitlistEntry.objects.create(
+            user=self.user, booking_date=booking.booking_date,
+            booking_time=booking.booking_time, number_of_guests=2,
+            status='promoted', booking=booking)
+
+        create_partitions(far_month, far_month)
+
+        check_deferred_constraints()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {KEY_TABLE} WHERE id = %s',
+                [booking.pk])
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            'needs PostgreSQL (set TEST_DATABASE_URL)')
+class PartitionMigrationTest(TransactionTestCase):
+    """
+    Tests for migrating the Booking table into partitions and back.
+    """
+    before = [('bookings', '0011_booking_archive')]
+    after = [('bookings', '0013_booking_ends_by_midnight')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+
+    def test_rollback_and_migrate_keep_bookings_and_foreign_keys(self):
+        """
+        Test that unpartitioning and partitioning again keeps the rows,
+        the ids and the foreign keys to bookings.
+        """
+        user = User.objects.create_user(
+            username='migrationuser', password='password123')
+        table = Table.objects.create(number=1, capacity=4)
+        booking = Booking.objects.create(
+            user=user, table=table,
+            booking_date=timezone.localdate() + timedelta(days=3),
+            booking_time=time(19, 0), number_of_guests=2,
+            status='confirmed')
+        WaitlistEntry.objects.create(
+            user=user, booking_date=booking.booking_date,
+            booking_time=booking.booking_time, number_of_guests=2,
+            status='promoted', booking=booking)
+        try:
+            self.migrate(self.before)
+            self.assertFalse(uses_partitions())
+            self.assertEqual(
+                list(Booking.objects.values_list('id', flat=True)),
+                [booking.pk])
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT to_regclass(%s), confrelid::regclass::text '
+                    'FROM pg_constraint WHERE conrelid = '
+                    "'bookings_waitlistentry'::regclass AND contype = 'f' "
+                    "AND conname LIKE '%%booking_id%%'", [KEY_TABLE])
+                self.assertEqual(
+                    cursor.fetchone(), (None, 'bookings_booking'))
+        finally:
+            self.migrate(self.after)
+
+        self.assertTrue(uses_partitions())
+        self.assertEqual(WaitlistEntry.objects.get().booking, booking)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT id FROM {KEY_TABLE}')
+            self.assertEqual(cursor.fetchall(), [(booking.pk,)])
+        next_booking = Booking.objects.create(
+            user=user, table=table, booking_date=booking.booking_date,
+            booking_time=time(21, 0), number_of_guests=2)
+        self.assertGreater(next_booking.pk, booking.pk)
@@ -0,0 +1,193 @@
+# bookings/tests/test_repacking.py
+# Standard library imports
+from datetime import date, time, timedelta
+import threading
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+# Django imports (third-party)
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, OperationalError, connection
+
+# Local application imports
+from bookings.availability import allocate_table, date_lock
+from bookings.models import Table, Booking
+from bookings.repacking import pack, repack_date
+from bookings.tests.helpers import book
+
+User = get_user_model()
+
+
+class RepackingTest(TestCase):
+    """
+    Tests for re-packing a day's bookings across the tables.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='repackuser', password='password123')
+        cls.small_table = Table.objects.create(number=1, capacity=2)
+        cls.large_table = Table.objects.create(number=2, capacity=6)
+        cls.future_date = date.today() + timedelta(days=2)
+
+    def book(self, table, guests, booking_time=time(19, 0),
+             status='confirmed', booking_date=None):
+        return book(self.user, table, booking_date or self.future_date,
+                    booking_time, guests, status)
+
+    def test_pack_places_largest_parties_first(self):
+        """
+        Test that best-fit decreasing gives each party the smallest table.
+        """
+        tables = [self.small_table, self.large_table]
+        movable = [(1, 2, time(19, 0), self.large_table.pk),
+                   (2, 5, time(19, 30), self.small_table.pk)]
+        self.assertEqual(
+            pack(movable, [], tables),
+            {1: self.small_table.pk, 2: self.large_table.pk})
+        self.assertIsNone(
+            pack(movable, [(self.large_table.pk, time(19, 0))], tables))
+
+    def test_repack_moves_party_off_oversized_table(self):
+        """
+        Test that a couple on the six-top moves to the free two-top.
+        """
+        booking = self.book(self.large_table, 2)
+
+        self.assertEqual(repack_date(self.future_date), (1, 4))
+        booking.refresh_from_db()
+        self.assertEqual(booking.table, self.small_table)
+        self.assertEqual(booking.status, 'confirmed')
+
+    def test_repack_moves_bookings_onto_each_others_tables(self):
+        """
+        Test that a booking can take a table freed in the same re-pack.
+        """
+        medium_table = Table.objects.create(number=3, capacity=4)
+        couple = self.book(medium_table, 2)
+        group = self.book(self.large_table, 4)
+
+        self.assertEqual(repack_date(self.future_date), (2, 4))
+        couple.refresh_from_db()
+        group.refresh_from_db()
+        self.assertEqual(couple.table, self.small_table)
+        self.assertEqual(group.table, medium_table)
+
+    def test_pending_bookings_keep_their_tables(self):
+        """
+        Test that only confirmed bookings are moved.
+        """
+        booking = self.book(self.large_table, 2, status='pending')
+
+        self.assertEqual(repack_date(self.future_date), (0, 0))
+        booking.refresh_from_db()
+        self.assertEqual(booking.table, self.large_table)
+
+    def test_command_dry_run_saves_nothing(self):
+        """
+        Test that a dry run reports the plan without applying it.
+        """
+        booking = self.book(self.large_table, 2)
+
+        out = StringIO()
+        call_command(
+            'repack_bookings', '--start', self.future_date.isoformat(),
+            '--days', '1', '--dry-run', stdout=out)
+        self.assertIn(
+            "Dry run: 1 bookings moved, 4 seats reclaimed", out.getvalue())
+        booking.refresh_from_db()
+        self.assertEqual(booking.table, self.large_table)
+
+    def test_command_skips_a_date_whose_plan_clashes(self):
+        """
+        Test that a date hitting a constraint is rolled back and the
+        command goes on with the remaining dates.
+        """
+        booking = self.book(self.large_table, 2)
+        later = self.book(self.large_table, 2,
+                          booking_date=self.future_date + timedelta(days=1))
+
+        out, err = StringIO(), StringIO()
+        with patch('bookings.repacking.slot_capacity.refresh_dates',
+                   side_effect=[IntegrityError, None]):
+            call_command(
+                'repack_bookings', '--start', self.future_date.isoformat(),
+                '--days', '2', stdout=out, stderr=err)
+
+        self.assertIn(f"{self.future_date}: skipped", err.getvalue())
+        self.assertIn("1 bookings moved, 4 seats reclaimed", out.getvalue())
+        booking.refresh_from_db()
+        later.refresh_from_db()
+        self.assertEqual(booking.table, self.large_table)
+        self.assertEqual(booking.status, 'confirmed')
+        self.assertEqual(later.table, self.small_table)
+
+    def test_command_skips_a_date_whose_bookings_are_locked(self):
+        """
+        Test that a date whose bookings another transaction holds is
+        skipped rather than waited for.
+        """
+        self.book(self.large_table, 2)
+
+        err = StringIO()
+        with patch('bookings.repacking.Booking.objects.select_for_update',
+                   side_effect=OperationalError):
+            call_command(
+                'repack_bookings', '--start', self.future_date.isoformat(),
+                '--days', '1', stdout=StringIO(), stderr=err)
+
+        self.assertIn(
+            f"{self.future_date}: skipped, its bookings are being changed",
+            err.getvalue())
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            'needs PostgreSQL (set TEST_DATABASE_URL)')
+class RepackLockingTest(TransactionTestCase):
+    """
+    Tests for how a re-pack and concurrent allocations wait for each other.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='repackuser', password='password123')
+        self.table = Table.objects.create(number=1, capacity=4)
+        self.future_date = date.today() + timedelta(days=2)
+
+    def allocate_in_thread(self, booking_date):
+        """Start allocating a booking in another thread and connection."""
+        booking = Booking(
+            user=self.user, booking_date=booking_date,
+            booking_time=time(19, 0), number_of_guests=2,
+            status='confirmed')
+        result = {}
+
+        def allocate():
+            try:
+                result['table'] = allocate_table(booking)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=allocate)
+        thread.start()
+        return thread, result
+
+    def test_allocation_waits_for_a_repack_of_its_date(self):
+        """
+        Test that an allocation during a re-pack of its date waits and
+        then gets a table, while other dates are not held up.
+        """
+        with date_lock(self.future_date, exclusive=True):
+            same_day, same_day_result = self.allocate_in_thread(
+                self.future_date)
+            other_day, other_day_result = self.allocate_in_thread(
+                self.future_date + timedelta(days=1))
+            other_day.join(5)
+            same_day.join(0.5)
+            self.assertTrue(same_day.is_alive())
+        same_day.join(5)
+
+        self.assertEqual(other_day_result['table'], self.table)
+        self.assertEqual(same_day_result['table'], self.table)
@@ -0,0 +1,178 @@
+# bookings/tests/test_run_sheet.py
+# Standard library imports
+import importlib.util
+import shutil
+import tempfile
+from concurrent.futures import Future
+from datetime import date, time, timedelta
+from pathlib import Path
+from unittest import mock, skipUnless
+
+# Django imports (third-party)
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+# Local application imports
+from bookings import run_sheet
+from bookings.models import Table
+from bookings.run_sheet_pdf import render_pdf
+from bookings.tests.helpers import book
+
+User = get_user_model()
+
+
+class RunSheetTest(TestCase):
+    """
+    Tests for the PDF run sheet of a service day.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff_user = User.objects.create_user(
+            username='staffuser', password='password123', is_staff=True)
+        cls.user = User.objects.create_user(
+            username='diner', password='password123',
+            first_name='Dana', last_name='Diner')
+        cls.table1 = Table.objects.create(number=1, capacity=4)
+        cls.table2 = Table.objects.create(number=2, capacity=4)
+        cls.day = date.today() + timedelta(days=5)
+        cls.late = cls.book(cls.table1, time(20, 0), 4, 'confirmed',
+                            notes='Birthday cake')
+        cls.early = cls.book(cls.table2, time(18, 0), 2, 'pending')
+        cls.book(cls.table2, time(19, 0), 3, 'cancelled')
+        cls.party = cls.book(cls.table1, time(12, 0), 8, 'confirmed')
+        cls.book(cls.table2, time(12, 0), 0, 'confirmed',
+                 combined_with=cls.party)
+
+    @classmethod
+    def book(cls, table, booking_time, guests, status, **fields):
+        return book(cls.user, table, cls.day, booking_time, guests, status,
+                    **fields)
+
+    def setUp(self):
+        self.sheet_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.sheet_dir)
+        settings_override = override_settings(
+            BOOKINGS_RUN_SHEET_DIR=self.sheet_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(run_sheet._pending.clear)
+        self.client.login(username='staffuser', password='password123')
+
+    def current_path(self):
+        rows = run_sheet.run_sheet_rows(self.day)
+        return run_sheet.sheet_path(
+            self.day, run_sheet.sheet_version(self.day, rows))
+
+    def download(self):
+        return self.client.get(
+            reverse('staff_run_sheet'), {'date': self.day.isoformat()})
+
+    def test_rows_list_the_day_by_time(self):
+        """
+        Test that the sheet lists the day's bookings that are not
+        cancelled by time, with every table of a combination.
+        """
+        rows = run_sheet.run_sheet_rows(self.day)
+
+        self.assertEqual([row['id'] for row in rows],
+                         [self.party.pk, self.early.pk, self.late.pk])
+        self.assertEqual(rows[0]['tables'], [1, 2])
+        self.assertEqual(rows[0]['name'], 'Dana Diner')
+        self.assertEqual(rows[2]['notes'], 'Birthday cake')
+
+        html = run_sheet.render_html(self.day, rows)
+        self.assertIn('1 + 2', html)
+        self.assertIn('14 covers', html)
+
+    def test_version_changes_with_the_day_bookings(self):
+        """
+        Test that the sheet version changes when a booking on the day
+        changes, and only then.
+        """
+        first = self.current_path()
+        self.assertEqual(self.current_path(), first)
+
+        self.early.number_of_guests = 3
+        self.early.save()
+        self.assertNotEqual(self.current_path(), first)
+
+    def test_rendered_sheet_is_served_from_disk(self):
+        """
+        Test that a sheet already rendered for the current version is
+        served without rendering it again.
+        """
+        path = self.current_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'%PDF-cached')
+
+        with mock.patch.object(run_sheet, '_submit') as submit:
+            response = self.download()
+
+        submit.assert_not_called()
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(b''.join(response.streaming_content),
+                         b'%PDF-cached')
+        self.assertIn(f'run-sheet-{self.day.isoformat()}.pdf',
+                      response['Content-Disposition'])
+
+    def test_missing_sheet_is_rendered_in_the_background_once(self):
+        """
+        Test that a missing sheet is queued once and answered with 202
+        while it renders.
+        """
+        with mock.patch.object(
+                run_sheet, '_submit', return_value=Future()) as submit:
+            first = self.download()
+            second = self.download()
+
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(second.status_code, 202)
+        self.assertContains(first, 'being prepared', status_code=202)
+        submit.assert_called_once()
+        html, path = submit.call_args.args
+        self.assertIn('Birthday cake', html)
+        self.assertEqual(path, self.current_path())
+
+    def test_failed_rendering_is_reported_and_retried(self):
+        """
+        Test that a failed rendering sends staff back to the dashboard
+        with an error, and the next download tries again.
+        """
+        failed = Future()
+        failed.set_exception(RuntimeError('no fonts'))
+        with mock.patch.object(
+                run_sheet, '_submit', return_value=failed) as submit:
+            self.download()
+            with self.assertLogs('bookings.run_sheet', 'ERROR'):
+                response = self.download()
+            self.assertRedirects(response, reverse('staff_dashboard'))
+            self.download()
+
+        self.assertEqual(submit.call_count, 2)
+
+    def test_run_sheet_is_staff_only(self):
+        """
+        Test that non-staff users are sent to the staff login.
+        """
+        self.client.login(username='diner', password='password123')
+        response = self.client.get(reverse('staff_run_sheet'))
+        self.assertRedirects(
+            response,
+            f"{reverse('admin:login')}?next={reverse('staff_run_sheet')}")
+
+    @skipUnless(importlib.util.find_spec('xhtml2pdf'), 'needs xhtml2pdf')
+    def test_render_pdf_replaces_older_versions(self):
+        """
+        Test that rendering writes a PDF and removes the day's older
+        versions.
+        """
+        stale = Path(self.sheet_dir) / f'run-sheet-{self.day}-old.pdf'
+        stale.write_bytes(b'%PDF-stale')
+        path = self.current_path()
+
+        render_pdf(run_sheet.render_html(
+            self.day, run_sheet.run_sheet_rows(self.day)), str(path))
+
+        self.assertTrue(path.read_bytes().startswith(b'%PDF'))
+        self.assertFalse(stale.exists())
@@ -0,0 +1,110 @@
+# bookings/tests/test_search.py
+# Standard library imports
+from datetime import time, timedelta
+
+# Django imports (third-party)
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+# Local application imports
+from bookings.models import Table, Booking
+from bookings.queries import staff_bookings
+from bookings.search import SEARCH_TABLE, uses_fts
+
+User = get_user_model()
+
+
+class BookingSearchTest(TestCase):
+    """
+    Tests for the indexed keyword search of the staff booking list.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user(
+            username='AliceSmith', password='password123')
+        cls.bob = User.objects.create_user(
+            username='bob', password='password123')
+        cls.table1 = Table.objects.create(number=1, capacity=4)
+        cls.table10 = Table.objects.create(number=10, capacity=4)
+        day = timezone.now().date() + timedelta(days=5)
+        cls.alice_booking = Booking.objects.create(
+            user=cls.alice, table=cls.table1, booking_date=day,
+            booking_time=time(19, 0), number_of_guests=2,
+            notes='Anniversary dinner, window seat')
+        cls.bob_booking = Booking.objects.create(
+            user=cls.bob, table=cls.table10, booking_date=day,
+            booking_time=time(20, 0), number_of_guests=3,
+            notes='Needs a high chair')
+
+    def search(self, query):
+        return set(staff_bookings(query=query))
+
+    def test_matches_username_and_notes_substrings(self):
+        """
+        Test that any case-insensitive part of a username or the notes
+        matches.
+        """
+        self.assertEqual(self.search('cesmi'), {self.alice_booking})
+        self.assertEqual(self.search('WINDOW'), {self.alice_booking})
+        self.assertEqual(self.search('high chair'), {self.bob_booking})
+        self.assertEqual(self.search('nothing like it'), set())
+
+    def test_table_number_matches_exactly(self):
+        """
+        Test that a number matches its table only, not tables containing
+        the digit.
+        """
+        self.assertEqual(self.search('1'), {self.alice_booking})
+        self.assertEqual(self.search('10'), {self.bob_booking})
+
+    def test_short_terms_still_match(self):
+        """
+        Test that terms too short for the trigram index are still found.
+        """
+        self.assertEqual(self.search('bo'), {self.bob_booking})
+
+    def test_quotes_in_query_are_literal(self):
+        """
+        Test that FTS syntax in the query does not raise.
+        """
+        self.assertEqual(self.search('"dinner'), set())
+        self.assertEqual(self.search('chair" OR "x'), set())
+
+    def test_search_uses_fts_table(self):
+        """
+        Test that on SQLite the text search is answered by the FTS5 table.
+        """
+        if not uses_fts():
+            self.skipTest("SQLite without the FTS5 trigram tokenizer")
+        with CaptureQueriesContext(connection) as queries:
+            self.search('anniversary')
+        self.assertIn('MATCH', queries.captured_queries[-1]['sql'])
+        self.assertNotIn('LIKE', queries.captured_queries[-1]['sql'])
+
+    def test_index_follows_changes(self):
+        """
+        Test that edited notes, renamed users and deleted bookings are
+        reflected in the search.
+        """
+        self.bob_booking.notes = 'Birthday cake'
+        self.bob_booking.save()
+        self.assertEqual(self.search('birthday'), {self.bob_booking})
+        self.assertEqual(self.search('high chair'), set())
+
+        self.alice.username = 'AliceJones'
+        self.alice.save()
+        self.assertEqual(self.search('jones'), {self.alice_booking})
+        self.assertEqual(self.search('smith'), set())
+
+        booking_id = self.alice_booking.id
+        self.alice_booking.delete()
+        self.assertEqual(self.search('anniversary'), set())
+        if uses_fts():
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT COUNT(*) FROM {SEARCH_TABLE} WHERE rowid = %s',
+                    [booking_id])
+                self.assertEqual(cursor.fetchone()[0], 0)
@@ -0,0 +1,216 @@
+# bookings/tests/test_slot_capacity.py
+# Standard library imports
+import threading
+from datetime import date, time, timedelta
+from unittest import skipUnless
+
+# Django imports (third-party)
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+# Local application imports
+from bookings.availability import allocate_table
+from bookings.models import Table, Booking, SlotCapacity
+from bookings.occupancy import day_slots, load_day, occupancy_index
+from bookings.slot_capacity import rebuild, slot_values
+from bookings.tests.helpers import book
+
+User = get_user_model()
+
+
+class SlotCapacityTest(TestCase):
+    """
+    Tests for the signal-maintained per-slot capacity summary.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='slotuser', password='password123')
+        cls.table1 = Table.objects.create(number=1, capacity=2)
+        cls.table2 = Table.objects.create(number=2, capacity=4)
+        cls.future_date = date.today() + timedelta(days=7)
+        cls.booking_time = time(19, 0)
+        rebuild(cls.future_date, cls.future_date)
+
+    def book(self, table, booking_time, status='confirmed',
+             booking_date=None):
+        return book(self.user, table, booking_date or self.future_date,
+                    booking_time, status=status)
+
+    def slot(self, slot_time):
+        return SlotCapacity.objects.get(
+            slot_date=self.future_date, slot_time=slot_time)
+
+    def test_booking_updates_the_slots_it_overlaps(self):
+        """
+        Test that a booking takes its table from every slot it overlaps.
+        """
+        self.book(self.table1, self.booking_time)
+
+        rows = SlotCapacity.objects.filter(slot_date=self.future_date)
+        self.assertEqual(rows.count(), len(day_slots()))
+        self.assertEqual(self.slot(time(12, 0)).remaining_seats, 6)
+        self.assertEqual(self.slot(time(18, 0)).remaining_seats, 6)
+        taken = self.slot(time(18, 15))
+        self.assertEqual(taken.remaining_seats, 4)
+        self.assertEqual(taken.remaining_tables, {'4': 1})
+        self.assertEqual(taken.free_tables_for(2), 1)
+        self.assertEqual(self.slot(time(19, 45)).remaining_seats, 4)
+        self.assertEqual(self.slot(time(20, 0)).remaining_seats, 6)
+
+    def test_adjacent_bookings_of_one_table_count_once(self):
+        """
+        Test that a slot overlapping two bookings of a table loses the
+        table once, and keeps it taken while either remains.
+        """
+        first = self.book(self.table1, self.booking_time)
+        self.book(self.table1, time(20, 0))
+        self.assertEqual(self.slot(time(19, 30)).remaining_seats, 4)
+        self.assertEqual(self.slot(time(20, 45)).remaining_seats, 4)
+
+        first.status = 'cancelled'
+        first.save()
+        self.assertEqual(self.slot(time(19, 30)).remaining_seats, 4)
+        self.assertEqual(self.slot(time(19, 0)).remaining_seats, 6)
+
+    def test_unbuilt_and_past_dates_get_no_rows(self):
+        """
+        Test that bookings never create rows, for future or past dates.
+        """
+        later = self.future_date + timedelta(days=1)
+        self.book(self.table1, self.booking_time, booking_date=later)
+        self.book(self.table1, self.booking_time,
+                  booking_date=date.today() - timedelta(days=3))
+
+        self.assertEqual(
+            set(SlotCapacity.objects.values_list('slot_date', flat=True)),
+            {self.future_date})
+
+    def test_edit_and_cancel_update_slots(self):
+        """
+        Test that moving and cancelling a booking frees its old slots.
+        """
+        booking = self.book(self.table1, self.booking_time)
+
+        booking.booking_time = time(12, 0)
+        booking.save()
+        self.assertEqual(self.slot(self.booking_time).remaining_seats, 6)
+        self.assertEqual(self.slot(time(12, 0)).remaining_seats, 4)
+
+        booking.status = 'cancelled'
+        booking.save()
+        self.assertEqual(self.slot(time(12, 0)).remaining_seats, 6)
+
+    def test_table_changes_drop_upcoming_slots(self):
+        """
+        Test that adding a table drops the stored rows from today on once
+        it commits, and a rebuild counts the new table.
+        """
+        self.book(self.table1, self.booking_time)
+        with self.captureOnCommitCallbacks(execute=True):
+            Table.objects.create(number=3, capacity=6)
+        self.assertFalse(SlotCapacity.objects.exists())
+
+        with transaction.atomic():
+            rebuild(self.future_date, self.future_date)
+        slot = self.slot(self.booking_time)
+        self.assertEqual(slot.remaining_seats, 10)
+        self.assertEqual(slot.remaining_tables, {'4': 1, '6': 1})
+
+    def test_grid_reads_stored_slots(self):
+        """
+        Test that the availability grid answers from the stored rows.
+        """
+        self.book(self.table2, self.booking_time)
+        occupancy_index.clear()
+
+        # The stored rows, and the table list showing no combination
+        # could fill the slot left at zero
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('availability_grid'), {
+                'check_date': self.future_date.isoformat(),
+                'num_guests': 3,
+            })
+        slots = {
+            slot['time']: slot['free_tables']
+            for slot in response.json()['slots']
+        }
+        self.assertEqual(slots['19:00'], 0)
+        self.assertEqual(slots['20:00'], 1)
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            'needs PostgreSQL (set TEST_DATABASE_URL)')
+class SlotCapacityLockingTest(TransactionTestCase):
+    """
+    Tests for the locks taken while applying booking changes.
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='slotuser', password='password123')
+        self.table = Table.objects.create(number=1, capacity=4)
+        self.future_date = date.today() + timedelta(days=7)
+        with transaction.atomic():
+            rebuild(self.future_date, self.future_date)
+
+    def test_uncommitted_change_leaves_the_table_allocatable(self):
+        """
+        Test that a booking being saved does not hide its table from the
+        allocator for another time.
+        """
+        result = {}
+
+        def allocate():
+            try:
+                result['table'] = allocate_table(Booking(
+                    user=self.user, booking_date=self.future_date,
+                    booking_time=time(19, 0), number_of_guests=2,
+                    status='confirmed'))
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            Booking.objects.create(
+                user=self.user, table=self.table,
+                booking_date=self.future_date, booking_time=time(12, 0),
+                number_of_guests=2, status='confirmed')
+            thread = threading.Thread(target=allocate)
+            thread.start()
+            thread.join(5)
+
+        self.assertEqual(result['table'], self.table)
+
+    def test_concurrent_changes_to_one_table_add_up(self):
+        """
+        Test that two bookings saved at once on the same table leave the
+        slots they share as a rebuild would.
+        """
+        def book_later():
+            try:
+                Booking.objects.create(
+                    user=self.user, table=self.table,
+                    booking_date=self.future_date,
+                    booking_time=time(20, 0), number_of_guests=2,
+                    status='confirmed')
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            Booking.objects.create(
+                user=self.user, table=self.table,
+                booking_date=self.future_date, booking_time=time(19, 0),
+                number_of_guests=2, status='confirmed')
+            thread = threading.Thread(target=book_later)
+            thread.start()
+            thread.join(0.5)
+            # Waits for the slots this transaction holds
+            self.assertTrue(thread.is_alive())
+        thread.join(5)
+
+        expected = slot_values(load_day(self.future_date), [self.table])
+        for row in SlotCapacity.objects.filter(slot_date=self.future_date):
+            self.assertEqual(
+                (row.remaining_seats, row.remaining_tables),
+                expected[row.slot_time])
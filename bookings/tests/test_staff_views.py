@@ -1,16 +1,25 @@
 # bookings/tests/test_staff_views.py
 # Standard library imports
 from datetime import time, timedelta
+from unittest import mock
 import uuid
 
 # Django imports (third-party)
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth.models import User
 
 # Local application imports
-from bookings.models import Table, Booking
+from bookings.bulk_status import apply_status
+from bookings.live_updates import change_notifier
+from bookings.models import Table, Booking, WaitlistEntry
+from bookings.pagination import KeysetPaginator
+from bookings.queries import staff_bookings
+from bookings.views import STAFF_BOOKING_LIST_KEYS
+from bookings.tests.helpers import book
 
 
 def generate_unique_username(base='testuser'):
@@ -143,9 +152,14 @@ class StaffViewsTest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed(response, 'bookings/staff_booking_list.html')
         self.assertIn('bookings', response.context)
-        self.assertEqual(
-            response.context['bookings'].paginator.count,
-            Booking.objects.count())
+        # Exact outside PostgreSQL, where the planner estimates it
+        if connection.vendor != 'postgresql':
+            self.assertEqual(
+                response.context['estimated_total'], Booking.objects.count())
+        self.assertContains(
+            response,
+            f"All matching bookings (about "
+            f"{response.context['estimated_total']})")
 
         self.client.logout()
         self.client.login(username='normaluser', password='password123')
@@ -239,6 +253,72 @@ class StaffViewsTest(TestCase):
         self.assertContains(
             response, "Booking status updated successfully!", html=False)
 
+    def test_staff_booking_detail_POST_reactivate_taken_slot(self):
+        """
+        Test that a cancelled booking whose slot was booked again cannot
+        be re-activated, and the form says why.
+        """
+        Booking.objects.create(
+            user=self.normal_user, table=self.table1,
+            booking_date=self.booking_future_cancelled.booking_date,
+            booking_time=self.booking_future_cancelled.booking_time,
+            number_of_guests=2, status='confirmed'
+        )
+        self.client.login(username='staffuser', password='password123')
+
+        response = self.client.post(
+            reverse('staff_booking_detail', args=[
+                    self.booking_future_cancelled.pk]),
+            data={'status': 'confirmed', 'notes': ''})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('status', response.context['form'].errors)
+        self.assertContains(response, "Table(s) 10 have been booked")
+        self.booking_future_cancelled.refresh_from_db()
+        self.assertEqual(self.booking_future_cancelled.status, 'cancelled')
+
+    def test_staff_booking_detail_POST_reactivate_race(self):
+        """
+        Test that a slot taken after the check fails the form instead of
+        the request.
+        """
+        Booking.objects.create(
+            user=self.normal_user, table=self.table1,
+            booking_date=self.booking_future_cancelled.booking_date,
+            booking_time=self.booking_future_cancelled.booking_time,
+            number_of_guests=2, status='confirmed'
+        )
+        self.client.login(username='staffuser', password='password123')
+
+        # The check still sees the table free
+        with mock.patch('bookings.forms.find_available_tables',
+                        return_value=Table.objects.all()):
+            response = self.client.post(
+                reverse('staff_booking_detail', args=[
+                        self.booking_future_cancelled.pk]),
+                data={'status': 'confirmed', 'notes': ''})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "has just been booked")
+        self.booking_future_cancelled.refresh_from_db()
+        self.assertEqual(self.booking_future_cancelled.status, 'cancelled')
+
+    def test_staff_booking_detail_POST_reactivate_free_slot(self):
+        """
+        Test that a cancelled booking whose slot is still free can be
+        re-activated.
+        """
+        self.client.login(username='staffuser', password='password123')
+
+        response = self.client.post(
+            reverse('staff_booking_detail', args=[
+                    self.booking_future_cancelled.pk]),
+            data={'status': 'pending', 'notes': ''})
+
+        self.assertRedirects(response, reverse('staff_booking_list'))
+        self.booking_future_cancelled.refresh_from_db()
+        self.assertEqual(self.booking_future_cancelled.status, 'pending')
+
     def test_staff_table_list_access(self):
         """
         Test access to staff table list for staff and non-staff.
@@ -396,3 +476,280 @@ class StaffViewsTest(TestCase):
 
         # Clean up the specific booking created by this test
         active_booking_for_table1.delete()
+
+
+class StaffBookingListPaginationTest(TestCase):
+    """
+    Tests for the keyset pagination of the staff booking list.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff_user = User.objects.create_user(
+            username='staffuser', password='password123', is_staff=True)
+        cls.user = User.objects.create_user(
+            username='pageuser', password='password123')
+        cls.tables = [
+            Table.objects.create(number=number, capacity=4)
+            for number in range(1, 4)
+        ]
+        start = timezone.now().date()
+        # 25 bookings over a few days, several sharing a date and time
+        cls.bookings = [
+            Booking.objects.create(
+                user=cls.user,
+                table=cls.tables[index % 3],
+                booking_date=start + timedelta(days=index // 9),
+                booking_time=time(12 + (index // 3) % 3, 0),
+                number_of_guests=2,
+            )
+            for index in range(25)
+        ]
+        cls.newest_first = sorted(
+            cls.bookings,
+            key=lambda booking: (
+                booking.booking_date, booking.booking_time, booking.id),
+            reverse=True)
+
+    def setUp(self):
+        self.client.login(username='staffuser', password='password123')
+
+    def get_page(self, **params):
+        return self.client.get(reverse('staff_booking_list'), params)
+
+    def follow(self, query):
+        return self.client.get(f"{reverse('staff_booking_list')}?{query}")
+
+    def test_pages_walk_every_booking_once(self):
+        """
+        Test that following the Next links lists every booking once,
+        newest first, and that Previous walks back the same pages.
+        """
+        response = self.get_page()
+        pages = [list(response.context['bookings'])]
+        self.assertIsNone(response.context['previous_page_query'])
+        while response.context['next_page_query']:
+            response = self.follow(response.context['next_page_query'])
+            pages.append(list(response.context['bookings']))
+
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        self.assertEqual(
+            [booking for page in pages for booking in page],
+            self.newest_first)
+
+        # And back again from the last page
+        for page in reversed(pages[:-1]):
+            response = self.follow(response.context['previous_page_query'])
+            self.assertEqual(list(response.context['bookings']), page)
+        self.assertIsNone(response.context['previous_page_query'])
+
+    def test_links_keep_filters(self):
+        """
+        Test that page links carry the active filters.
+        """
+        response = self.get_page(q='pageuser', status='pending')
+        query = response.context['next_page_query']
+        self.assertIn('q=pageuser', query)
+        self.assertIn('status=pending', query)
+        self.assertIn('after=', query)
+
+    def test_invalid_cursor_shows_first_page(self):
+        """
+        Test that a malformed cursor falls back to the first page.
+        """
+        response = self.get_page(after='not-a-cursor')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(response.context['bookings']), self.newest_first[:10])
+
+    def test_page_is_one_query(self):
+        """
+        Test that a page, including each booking's user and table, is
+        read with a single query.
+        """
+        paginator = KeysetPaginator(
+            staff_bookings(), STAFF_BOOKING_LIST_KEYS, 10)
+        cursor = paginator.page().next_cursor
+        with self.assertNumQueries(1):
+            page = paginator.page(after=cursor)
+            labels = [
+                (booking.user.username, booking.table.number)
+                for booking in page
+            ]
+        self.assertEqual(len(labels), 10)
+
+
+class StaffBookingBulkStatusTest(TestCase):
+    """
+    Tests for the bulk status actions of the staff booking list.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff_user = User.objects.create_user(
+            username='staffuser', password='password123', is_staff=True)
+        cls.user = User.objects.create_user(
+            username='bulkuser', password='password123')
+        cls.tables = [
+            Table.objects.create(number=number, capacity=4)
+            for number in range(1, 4)
+        ]
+        cls.day = timezone.now().date() + timedelta(days=3)
+
+    def setUp(self):
+        self.client.login(username='staffuser', password='password123')
+        self.pending = self.book(self.tables[0], time(18, 0), 'pending')
+        self.confirmed = self.book(self.tables[1], time(18, 0), 'confirmed')
+        self.cancelled = self.book(self.tables[2], time(18, 0), 'cancelled')
+
+    def book(self, table, booking_time, status, **fields):
+        return book(self.user, table, self.day, booking_time, status=status,
+                    **fields)
+
+    def bulk(self, new_status, bookings=(), **data):
+        return self.client.post(reverse('staff_booking_bulk_status'), {
+            'new_status': new_status,
+            'bookings': [booking.pk for booking in bookings],
+            **data,
+        })
+
+    def booking_updates(self, queries):
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "bookings_booking"')
+        ]
+
+    def test_selected_bookings_move_in_one_update(self):
+        """
+        Test that the bookings are moved with a single UPDATE that bumps
+        updated_at.
+        """
+        other = self.book(self.tables[2], time(20, 0), 'pending')
+        before = self.pending.updated_at
+
+        with CaptureQueriesContext(connection) as queries:
+            moved = apply_status(
+                Booking.objects.filter(pk__in=[self.pending.pk, other.pk]),
+                'confirmed')
+
+        self.assertEqual(moved, 2)
+        self.assertEqual(len(self.booking_updates(queries)), 1)
+        self.pending.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.pending.status, 'confirmed')
+        self.assertEqual(other.status, 'confirmed')
+        self.assertGreater(self.pending.updated_at, before)
+
+    def test_bulk_action_returns_to_the_list(self):
+        """
+        Test that staff return to the list page they came from with a
+        summary of the change.
+        """
+        response = self.bulk(
+            'confirmed', [self.pending], list_query='status=pending')
+
+        self.assertRedirects(
+            response, f"{reverse('staff_booking_list')}?status=pending")
+        messages = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn('1 booking marked confirmed.', messages)
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.status, 'confirmed')
+
+    def test_invalid_transition_changes_nothing(self):
+        """
+        Test that selecting a booking that cannot make the move is
+        refused without changing any booking.
+        """
+        response = self.bulk('confirmed', [self.pending, self.cancelled])
+
+        self.assertRedirects(response, reverse('staff_booking_list'))
+        messages = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn(
+            f'These bookings cannot be marked confirmed: '
+            f'#{self.cancelled.pk}.', messages)
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.status, 'pending')
+
+    def test_nothing_selected_is_refused(self):
+        """
+        Test that an action without bookings is refused.
+        """
+        response = self.bulk('completed')
+        messages = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn('Select at least one booking.', messages)
+
+    def test_all_matching_applies_to_the_filtered_bookings(self):
+        """
+        Test that all bookings matching the list filters that can make
+        the move are moved, and the rest left alone.
+        """
+        elsewhere = Booking.objects.create(
+            user=self.user,
+            table=self.tables[1],
+            booking_date=self.day + timedelta(days=1),
+            booking_time=time(18, 0),
+            number_of_guests=2,
+            status='confirmed',
+        )
+
+        response = self.bulk(
+            'completed', all_matching='on', date=self.day.isoformat())
+
+        messages = [str(m) for m in response.wsgi_request._messages]
+        self.assertIn('1 matching booking marked completed.', messages)
+        self.confirmed.refresh_from_db()
+        self.pending.refresh_from_db()
+        elsewhere.refresh_from_db()
+        self.assertEqual(self.confirmed.status, 'completed')
+        self.assertEqual(self.pending.status, 'pending')
+        self.assertEqual(elsewhere.status, 'confirmed')
+
+    def test_cancelling_releases_slots_and_tables_of_combinations(self):
+        """
+        Test that bulk cancelling frees the slot for availability, moves a
+        combination's extra tables and offers the slot to the waitlist.
+        """
+        extra = self.book(self.tables[2], time(18, 0), 'confirmed',
+                          combined_with=self.confirmed, number_of_guests=0)
+        entry = WaitlistEntry.objects.create(
+            user=self.staff_user,
+            booking_date=self.day,
+            booking_time=time(18, 0),
+            number_of_guests=2,
+        )
+
+        self.bulk('cancelled', [self.pending, self.confirmed])
+
+        extra.refresh_from_db()
+        entry.refresh_from_db()
+        self.assertEqual(extra.status, 'cancelled')
+        self.assertEqual(entry.status, 'promoted')
+        self.assertEqual(entry.booking.status, 'confirmed')
+
+    def test_moved_bookings_are_published_as_changes(self):
+        """
+        Test that one change per moved booking is sent to the live
+        dashboards, in one batch.
+        """
+        with mock.patch.object(change_notifier, 'publish_many') as publish:
+            self.bulk('cancelled', [self.pending, self.confirmed])
+
+        changes = publish.call_args.args[0]
+        self.assertEqual(
+            sorted(change['id'] for change in changes),
+            sorted([self.pending.pk, self.confirmed.pk]))
+        self.assertTrue(all(change['status'] == 'cancelled'
+                            for change in changes))
+
+    def test_bulk_status_is_staff_only(self):
+        """
+        Test that non-staff users cannot use bulk actions.
+        """
+        self.client.login(username='bulkuser', password='password123')
+        response = self.bulk('cancelled', [self.pending])
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response['Location'].startswith(
+            reverse('admin:login')))
+        self.pending.refresh_from_db()
+        self.assertEqual(self.pending.status, 'pending')
@@ -6,7 +6,8 @@ from datetime import date, time, timedelta, datetime
 from unittest.mock import patch
 
 # Django imports (third-party)
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.utils import timezone
 from django.contrib.auth import get_user_model
@@ -212,6 +213,34 @@ class AuthenticatedViewsTest(TestCase):
         self.assertEqual(Booking.objects.count(),
                          initial_booking_count)  # No new booking
 
+    def test_make_booking_POST_full_time_offers_alternatives(self):
+        """
+        Test that a full time offers the nearest free times that day.
+        """
+        for table, booking_time in ((self.table2, self.booking_time),
+                                    (self.table2, time(18, 0))):
+            Booking.objects.create(
+                user=self.user,
+                table=table,
+                booking_date=self.future_date,
+                booking_time=booking_time,
+                number_of_guests=4,
+                status='confirmed'
+            )
+
+        response = self.client.post(reverse('make_booking'), {
+            'booking_date': self.future_date.isoformat(),
+            'booking_time': self.booking_time.strftime('%H:%M'),
+            'number_of_guests': 3,
+        })
+        self.assertEqual(response.status_code, 200)
+        # Start times from 17:15 to 19:45 clash with the two bookings
+        self.assertEqual(
+            response.context['alternatives'],
+            [(time(20, 0), self.table2), (time(20, 15), self.table2),
+             (time(20, 30), self.table2)])
+        self.assertContains(response, "Book 20:00 (Table 2)")
+
     def test_my_bookings_view_display(self):
         """
         Test that a user's bookings are displayed correctly.
@@ -498,3 +527,138 @@ class AuthenticatedViewsTest(TestCase):
             response,
             "You cannot check availability for a past date and time."
         )
+
+
+class AvailabilityGridViewTest(TestCase):
+    """
+    Tests for the whole-day availability grid JSON endpoint.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='griduser', password='password123')
+        cls.table1 = Table.objects.create(number=1, capacity=2)
+        cls.table2 = Table.objects.create(number=2, capacity=4)
+        cls.future_date = date.today() + timedelta(days=7)
+
+    def test_grid_counts_free_tables_per_slot(self):
+        """
+        Test that each slot reports the tables free around it.
+        """
+        Booking.objects.create(
+            user=self.user,
+            table=self.table1,
+            booking_date=self.future_date,
+            booking_time=time(19, 0),
+            number_of_guests=2,
+            status='confirmed'
+        )
+        response = self.client.get(reverse('availability_grid'), {
+            'check_date': self.future_date.isoformat(),
+            'num_guests': 2,
+        })
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['date'], self.future_date.isoformat())
+        slots = {slot['time']: slot['free_tables'] for slot in data['slots']}
+        self.assertEqual(slots['09:00'], 2)
+        self.assertEqual(slots['22:00'], 2)
+        self.assertEqual(slots['18:00'], 2)
+        self.assertEqual(slots['18:15'], 1)
+        self.assertEqual(slots['19:45'], 1)
+        self.assertEqual(slots['20:00'], 2)
+
+    def test_grid_filters_tables_by_party_size(self):
+        """
+        Test that tables too small for the party are never counted.
+        """
+        response = self.client.get(reverse('availability_grid'), {
+            'check_date': self.future_date.isoformat(),
+            'num_guests': 3,
+        })
+        self.assertTrue(
+            all(slot['free_tables'] == 1 for slot in response.json()['slots']))
+
+    def test_grid_rejects_past_date(self):
+        """
+        Test that a past date returns the form errors with status 400.
+        """
+        response = self.client.get(reverse('availability_grid'), {
+            'check_date': (date.today() - timedelta(days=1)).isoformat(),
+            'num_guests': 2,
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('errors', response.json())
+
+
+class AvailabilityCalendarViewTest(TestCase):
+    """
+    Tests for the multi-day availability calendar JSON endpoint.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='calendaruser', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=4)
+        cls.start_date = date.today() + timedelta(days=7)
+
+    def setUp(self):
+        cache.clear()
+
+    def fully_book(self, booking_date):
+        """Book the only table for every hour of service."""
+        for hour in range(9, 23):
+            Booking.objects.create(
+                user=self.user,
+                table=self.table,
+                booking_date=booking_date,
+                booking_time=time(hour, 0),
+                number_of_guests=2,
+                status='confirmed'
+            )
+
+    def get_calendar(self, **params):
+        params.setdefault('check_date', self.start_date.isoformat())
+        params.setdefault('num_guests', 2)
+        return self.client.get(reverse('availability_calendar'), params)
+
+    def test_calendar_summarises_each_day(self):
+        """
+        Test that every day in the range is summarised in one request.
+        """
+        self.fully_book(self.start_date + timedelta(days=1))
+
+        # The tables and the range's bookings
+        with self.assertNumQueries(2):
+            response = self.get_calendar(days=3)
+
+        self.assertEqual(response.status_code, 200)
+        calendar = response.json()['calendar']
+        self.assertEqual(
+            [day['date'] for day in calendar],
+            [(self.start_date + timedelta(days=offset)).isoformat()
+             for offset in range(3)])
+        self.assertEqual(
+            [day['available'] for day in calendar], [True, False, True])
+        self.assertEqual(calendar[0]['free_slots'], calendar[0]['total_slots'])
+
+    def test_calendar_rejects_invalid_range(self):
+        """
+        Test that ranges beyond the configured maximum are rejected.
+        """
+        response = self.get_calendar(days=1000)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('days', response.json()['errors'])
+
+    @override_settings(BOOKINGS_AVAILABILITY_CACHE_TTL=60)
+    def test_calendar_is_cached_per_range_and_party_size(self):
+        """
+        Test that repeat requests are served from the cache.
+        """
+        self.get_calendar(days=5)
+        # No query runs on a cache hit
+        with self.assertNumQueries(0):
+            response = self.get_calendar(days=5)
+        self.assertEqual(len(response.json()['calendar']), 5)
+        with self.assertNumQueries(2):
+            self.get_calendar(days=5, num_guests=3)
@@ -0,0 +1,168 @@
+# bookings/tests/test_waitlist.py
+# Standard library imports
+from datetime import date, time, timedelta
+
+# Django imports (third-party)
+from django.test import TestCase
+from django.urls import reverse
+from django.contrib.auth import get_user_model
+
+# Local application imports
+from bookings.models import Table, Booking, WaitlistEntry
+
+User = get_user_model()
+
+
+class WaitlistPromotionTest(TestCase):
+    """
+    Tests for promoting waitlist entries when tables are released.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='waitlistuser', password='password123')
+        cls.other_user = User.objects.create_user(
+            username='waitinguser', password='password123')
+        cls.table = Table.objects.create(number=1, capacity=4)
+        cls.future_date = date.today() + timedelta(days=7)
+        cls.booking_time = time(19, 0)
+
+    def setUp(self):
+        self.booking = Booking.objects.create(
+            user=self.user,
+            table=self.table,
+            booking_date=self.future_date,
+            booking_time=self.booking_time,
+            number_of_guests=2,
+            status='confirmed'
+        )
+
+    def wait(self, user, booking_time=None, number_of_guests=2):
+        return WaitlistEntry.objects.create(
+            user=user,
+            booking_date=self.future_date,
+            booking_time=booking_time or self.booking_time,
+            number_of_guests=number_of_guests
+        )
+
+    def test_cancellation_promotes_first_waiting_entry(self):
+        """
+        Test that the earliest fitting entry is booked on cancellation.
+        """
+        first = self.wait(self.other_user, booking_time=time(19, 30))
+        second = self.wait(self.user)
+
+        self.booking.status = 'cancelled'
+        self.booking.save()
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.status, 'promoted')
+        self.assertEqual(first.booking.table, self.table)
+        self.assertEqual(first.booking.user, self.other_user)
+        self.assertEqual(first.booking.status, 'confirmed')
+        self.assertEqual(second.status, 'waiting')
+
+    def test_entries_that_do_not_fit_keep_waiting(self):
+        """
+        Test that parties too large or at other times are not promoted.
+        """
+        too_large = self.wait(self.other_user, number_of_guests=6)
+        too_late = self.wait(self.other_user, booking_time=time(20, 0))
+
+        self.booking.status = 'cancelled'
+        self.booking.save()
+
+        too_large.refresh_from_db()
+        too_late.refresh_from_db()
+        self.assertEqual(too_large.status, 'waiting')
+        self.assertEqual(too_late.status, 'waiting')
+
+    def test_freed_table_promotes_a_party_needing_a_combination(self):
+        """
+        Test that freeing a table of a combination group can seat a party
+        too large for that table alone.
+        """
+        patio = [Table.objects.create(
+            number=number, capacity=2, combination_group='patio')
+            for number in (2, 3)]
+        patio_booking = Booking.objects.create(
+            user=self.user,
+            table=patio[0],
+            booking_date=self.future_date,
+            booking_time=self.booking_time,
+            number_of_guests=2,
+            status='confirmed'
+        )
+        entry = self.wait(self.other_user, number_of_guests=4)
+
+        patio_booking.status = 'cancelled'
+        patio_booking.save()
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'promoted')
+        self.assertEqual(
+            {entry.booking.table, *(extra.table for extra
+                                    in entry.booking.combined_tables.all())},
+            set(patio))
+
+    def test_moving_a_booking_releases_its_old_slot(self):
+        """
+        Test that editing a booking to another time promotes the queue.
+        """
+        entry = self.wait(self.other_user)
+
+        self.booking.booking_time = time(12, 0)
+        self.booking.save()
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'promoted')
+
+    def test_join_and_leave_waitlist(self):
+        """
+        Test that users can join the waitlist once and leave it again.
+        """
+        self.client.login(username='waitinguser', password='password123')
+        data = {
+            'booking_date': self.future_date.isoformat(),
+            'booking_time': self.booking_time.strftime('%H:%M'),
+            'number_of_guests': 2,
+        }
+        response = self.client.post(reverse('join_waitlist'), data)
+        self.assertRedirects(response, reverse('my_bookings'))
+        self.client.post(reverse('join_waitlist'), data)
+        entry = WaitlistEntry.objects.get(user=self.other_user)
+
+        response = self.client.get(reverse('my_bookings'))
+        self.assertEqual(
+            list(response.context['waitlist_entries']), [entry])
+
+        self.client.post(reverse('leave_waitlist', args=[entry.id]))
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, 'cancelled')
+
+    def test_join_waitlist_sends_free_times_to_booking(self):
+        """
+        Test that a time with a free table is not queued for.
+        """
+        self.client.login(username='waitinguser', password='password123')
+        response = self.client.post(reverse('join_waitlist'), {
+            'booking_date': self.future_date.isoformat(),
+            'booking_time': '12:00',
+            'number_of_guests': 2,
+        })
+        self.assertRedirects(response, reverse('make_booking'))
+        self.assertFalse(WaitlistEntry.objects.exists())
+
+    def test_full_time_offers_waitlist(self):
+        """
+        Test that make_booking offers the waitlist when nothing fits.
+        """
+        self.client.login(username='waitinguser', password='password123')
+        response = self.client.post(reverse('make_booking'), {
+            'booking_date': self.future_date.isoformat(),
+            'booking_time': self.booking_time.strftime('%H:%M'),
+            'number_of_guests': 2,
+        })
+        self.assertTrue(response.context['offer_waitlist'])
+        self.assertContains(response, reverse('join_waitlist'))
@@ -1,12 +1,16 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 from .views import register
 
+# Async versions of the read-heavy views under ASGI, sync ones under WSGI
+read_views = async_views if settings.BOOKINGS_ASYNC_VIEWS else views
+
 urlpatterns = [
     # Public-facing views
     path('', views.home_view, name='home'),
     path('book/', views.make_booking, name='make_booking'),
-    path('my-bookings/', views.my_bookings, name='my_bookings'),
+    path('my-bookings/', read_views.my_bookings, name='my_bookings'),
     path(
         'edit-booking/<int:booking_id>/',
         views.edit_booking,
@@ -17,11 +21,27 @@ urlpatterns = [
         views.cancel_booking,
         name='cancel_booking'
     ),
+    path('waitlist/join/', views.join_waitlist, name='join_waitlist'),
+    path(
+        'waitlist/<int:entry_id>/leave/',
+        views.leave_waitlist,
+        name='leave_waitlist'
+    ),
     path(
         'check-availability/',
-        views.check_availability,
+        read_views.check_availability,
         name='check_availability'
     ),
+    path(
+        'check-availability/grid/',
+        read_views.availability_grid,
+        name='availability_grid'
+    ),
+    path(
+        'check-availability/calendar/',
+        read_views.availability_calendar,
+        name='availability_calendar'
+    ),
     path(
         'register/',
         register,
@@ -30,11 +50,22 @@ urlpatterns = [
 
     # Staff Dashboard and management views
     path('staff/', views.staff_dashboard, name='staff_dashboard'),
+    path('staff/run-sheet/', views.staff_run_sheet, name='staff_run_sheet'),
     path(
         'staff/bookings/',
         views.staff_booking_list,
         name='staff_booking_list'
     ),
+    path(
+        'staff/bookings/bulk-status/',
+        views.staff_booking_bulk_status,
+        name='staff_booking_bulk_status'
+    ),
+    path(
+        'staff/bookings/export/',
+        read_views.staff_booking_export,
+        name='staff_booking_export'
+    ),
     path(
         'staff/bookings/<int:booking_id>/',
         views.staff_booking_detail,
@@ -52,3 +83,12 @@ urlpatterns = [
         name='staff_table_delete'
     ),
 ]
+
+# The live dashboard stream holds its connection open for minutes, which
+# only an async server can afford
+if settings.BOOKINGS_ASYNC_VIEWS:
+    urlpatterns.append(path(
+        'staff/stream/',
+        async_views.staff_dashboard_stream,
+        name='staff_dashboard_stream'
+    ))
@@ -1,27 +1,73 @@
 # Standard library imports
-from datetime import datetime, timedelta, time
+from datetime import datetime, timedelta
 
 # Django imports
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth import authenticate, login
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db import transaction
-from django.db.models import Q
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
+from django.urls import reverse
 from django.utils import timezone
+from django.views.decorators.http import require_GET, require_POST
 
 # Local application imports
-from .models import Booking, Table
+from . import availability_cache, slot_capacity
+from .bulk_status import apply_status
+from .conditional import (
+    conditional_view,
+    my_bookings_validators,
+    payload_conditional_view,
+)
+from .dashboard import dashboard_stats
+from .export import export_response
+from .availability import (
+    OPENING_TIME,
+    CLOSING_TIME,
+    allocate_tables,
+    find_seating,
+)
+from .models import Booking, Table, WaitlistEntry
+from .pagination import KeysetPaginator, estimated_count
+from .occupancy import (
+    current_slot_key,
+    free_table_counts,
+    load_days,
+    occupancy_index,
+)
+from .run_sheet import RunSheetError, get_run_sheet
+from .queries import (
+    active_bookings_for_table,
+    staff_bookings,
+    user_booking_history,
+    user_upcoming_bookings,
+    user_waitlist_entries,
+)
 from .forms import (
     BookingForm,
+    BookingBulkStatusForm,
+    BookingExportForm,
+    AvailabilityCalendarForm,
     AvailabilityForm,
+    AvailabilityGridForm,
     BookingStatusUpdateForm,
     TableForm,
     CustomUserCreationForm,
+    WaitlistForm,
 )
 
+# Staff booking list page size, and the keys it is paginated on (newest
+# first), matching the booking_list_order_idx index
+STAFF_BOOKINGS_PER_PAGE = 10
+STAFF_BOOKING_LIST_KEYS = ('booking_date', 'booking_time', 'pk')
+
+# Seconds the run sheet page waits before asking again for a PDF that is
+# still being rendered
+RUN_SHEET_RETRY_SECONDS = 2
+
 
 def home_view(request):
     """Render the homepage."""
@@ -68,30 +114,48 @@ def register(request):
     return render(request, 'registration/register.html', {'form': form})
 
 
+def tables_label(tables):
+    """
+    Describe the tables of a booking for messages, e.g. "Table 3" or
+    "Tables 5 + 6" for a combination.
+    """
+    if len(tables) == 1:
+        return f"Table {tables[0].number}"
+    return "Tables " + " + ".join(str(table.number) for table in tables)
+
+
+def seating_message(tables, num_guests):
+    """
+    Describe what ``check_availability`` found: free tables that seat the
+    party, or a combination of tables that seats it together.
+    """
+    if tables[0].capacity < num_guests:
+        return f"{tables_label(tables)} can be combined for your party."
+    return f"Found {len(tables)} table(s) available."
+
+
 @login_required
 def make_booking(request):
     """
     Handle booking creation for authenticated users.
     Validates time slot and checks table availability by guest count and time,
-    and saves the booking if a suitable table is available.
+    and saves the booking if a suitable table is available. When the time
+    is full, the nearest free times that day are offered as alternatives.
     """
+    alternatives = []
+    offer_waitlist = False
     if request.method == 'POST':
         form = BookingForm(request.POST)
         if form.is_valid():
             booking_date = form.cleaned_data['booking_date']
             booking_time = form.cleaned_data['booking_time']
-            number_of_guests = form.cleaned_data['number_of_guests']
 
             # Combine date and time, then make it timezone-aware
             booking_datetime = datetime.combine(booking_date, booking_time)
             booking_datetime = timezone.make_aware(booking_datetime)
 
-            # Define allowed time range
-            opening_time = time(9, 0)   # 9:00 AM
-            closing_time = time(22, 0)  # 10:00 PM
-
             # Check if booking time is outside of allowed interval
-            if not (opening_time <= booking_time <= closing_time):
+            if not (OPENING_TIME <= booking_time <= CLOSING_TIME):
                 messages.warning(
                     request,
                     "Bookings can only be made between 9:00 AM and 10:00 PM.")
@@ -109,95 +173,114 @@ def make_booking(request):
                     {'form': form}
                 )
 
-            # Find tables booked at the exact time
-            booked_tables_ids = Booking.objects.filter(
-                booking_date=booking_date,
-                booking_time=booking_time
-            ).values_list('table__id', flat=True)
-
-            # Start with tables that match capacity
-            # and aren't booked at that exact time
-            available_tables = Table.objects.filter(
-                capacity__gte=number_of_guests
-            ).exclude(id__in=booked_tables_ids)
-
-            # Further exclude tables booked within 1 hour window
-            one_hour_before = (datetime.combine(
-                booking_date, booking_time) - timedelta(hours=1)).time()
-            one_hour_after = (datetime.combine(
-                booking_date, booking_time) + timedelta(hours=1)).time()
-
-            conflicting_bookings = Booking.objects.filter(
-                booking_date=booking_date,
-                table__in=available_tables,
-                booking_time__range=(one_hour_before, one_hour_after)
-            )
+            booking = form.save(commit=False)
+            booking.user = request.user
+            booking.status = 'confirmed'
 
-            conflicting_table_ids = conflicting_bookings.values_list(
-                'table__id', flat=True)
-            available_tables = available_tables.exclude(
-                id__in=conflicting_table_ids).order_by('capacity')
-
-            if available_tables.exists():
-                selected_table = available_tables.first()
-                try:
-                    with transaction.atomic():
-                        booking = form.save(commit=False)
-                        booking.user = request.user
-                        booking.table = selected_table
-                        booking.status = 'confirmed'
-                        booking.save()
-                        messages.success(
-                            request,
-                            f"Your booking for Table {selected_table.number} "
-                            "has been confirmed!")
-                        return redirect('my_bookings')
-                except Exception as e:
-                    messages.error(
-                        request, f"An error occurred during booking: {e}")
+            try:
+                # Locks and assigns the smallest free table that fits, or
+                # the cheapest combination of tables for a large party
+                selected_tables = allocate_tables(booking)
+            except Exception as e:
+                messages.error(
+                    request, f"An error occurred during booking: {e}")
             else:
+                if selected_tables is not None:
+                    messages.success(
+                        request,
+                        f"Your booking for {tables_label(selected_tables)} "
+                        "has been confirmed!")
+                    return redirect('my_bookings')
                 messages.warning(
                     request,
                     "No tables available for your requested date, time, "
                     "and number of guests.")
+                # Offer the nearest free times that day or the waitlist
+                alternatives = occupancy_index.nearest_free_slots(
+                    booking_date, booking_time,
+                    form.cleaned_data['number_of_guests'])
+                offer_waitlist = True
         else:
             messages.error(request, "Please correct the errors in the form.")
     else:
         form = BookingForm()
-    return render(request, 'bookings/make_booking.html', {'form': form})
+    return render(request, 'bookings/make_booking.html', {
+        'form': form,
+        'alternatives': alternatives,
+        'offer_waitlist': offer_waitlist,
+    })
+
+
+@login_required
+@require_POST
+def join_waitlist(request):
+    """
+    Put the user on the waitlist for a full time slot. The entry is
+    booked automatically when a table frees up, so there is no need to
+    keep checking availability. A slot with a free table is sent back to
+    the booking form instead.
+    """
+    form = WaitlistForm(request.POST)
+    if not form.is_valid():
+        messages.error(request, "Please correct the errors in the form.")
+        return redirect('make_booking')
+
+    entry = form.save(commit=False)
+    if find_seating(entry.booking_date, entry.booking_time,
+                    entry.number_of_guests):
+        messages.info(
+            request, "A table is free at this time, so you can book it now.")
+        return redirect('make_booking')
+
+    entry.user = request.user
+    try:
+        with transaction.atomic():
+            entry.save()
+    except IntegrityError:
+        # A waiting entry for this user and time exists already
+        messages.info(
+            request, "You are already on the waitlist for this time.")
+        return redirect('my_bookings')
+    messages.success(
+        request,
+        "You have joined the waitlist. We will confirm your booking "
+        "automatically if a table becomes available.")
+    return redirect('my_bookings')
+
+
+@login_required
+@require_POST
+def leave_waitlist(request, entry_id):
+    """Remove one of the user's waiting entries from the waitlist."""
+    entry = get_object_or_404(
+        WaitlistEntry, id=entry_id, user=request.user, status='waiting')
+    entry.status = 'cancelled'
+    entry.save(update_fields=['status', 'updated_at'])
+    messages.success(request, "You have left the waitlist.")
+    return redirect('my_bookings')
 
 
 @login_required
+@conditional_view(my_bookings_validators)
 def my_bookings(request):
     """
     Display the current user's upcoming and past bookings.
     Upcoming: bookings from today onward (excluding cancelled/completed).
-    Past: earlier bookings or bookings today but in the past time.
-    """
-    upcoming_bookings = Booking.objects.filter(
-        user=request.user,
-        booking_date__gte=timezone.now().date()
-    ).exclude(
-        status__in=['cancelled', 'completed']
-    ).order_by(
-        'booking_date', 'booking_time'
-    )
+    Past: earlier bookings or bookings today but in the past time,
+    including archived ones.
+    Waitlist: entries still waiting for a table.
+    """
+    now = timezone.now()
+    upcoming_bookings = user_upcoming_bookings(request.user, now.date())
 
     # Past bookings: date is in the past,
     # or date is today but time is in the past
-    past_bookings = Booking.objects.filter(
-        user=request.user
-    ).filter(
-        Q(booking_date__lt=timezone.now().date()) |  # Date is in the past
-        # Or date is today and time is in the past
-        Q(booking_date=timezone.now().date(),
-          booking_time__lt=timezone.now().time())
-        # Order by most recent past booking first
-    ).order_by('-booking_date', '-booking_time')
+    past_bookings = user_booking_history(request.user, now)
 
     context = {
         'upcoming_bookings': upcoming_bookings,
         'past_bookings': past_bookings,
+        'waitlist_entries': user_waitlist_entries(request.user, now.date()),
     }
     return render(request, 'bookings/my_bookings.html', context)
 
@@ -208,7 +291,9 @@ def edit_booking(request, booking_id):
     Allow users to edit their existing bookings. Ensures booking is
     not in the past and that the updated slot has an available table.
     """
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    # Extra tables of a combination follow their party's booking
+    booking = get_object_or_404(
+        Booking, id=booking_id, user=request.user, combined_with=None)
 
     if request.method == 'POST':
         form = BookingForm(request.POST, instance=booking)
@@ -221,12 +306,8 @@ def edit_booking(request, booking_id):
             booking_datetime = datetime.combine(booking_date, booking_time)
             booking_datetime = timezone.make_aware(booking_datetime)
 
-            # Define allowed time range (same as in make_booking)
-            opening_time = time(9, 0)
-            closing_time = time(22, 0)
-
             # Check if booking time is outside of allowed interval
-            if not (opening_time <= booking_time <= closing_time):
+            if not (OPENING_TIME <= booking_time <= CLOSING_TIME):
                 messages.warning(
                     request,
                     "Bookings can only be made between 9:00 AM and 10:00 PM.")
@@ -252,59 +333,27 @@ def edit_booking(request, booking_id):
                     }
                 )
 
-            # Find tables booked at the exact time,
-            # excluding the current booking's table
-            booked_tables_ids = Booking.objects.filter(
-                booking_date=booking_date,
-                booking_time=booking_time
-            ).exclude(id=booking.id).values_list('table__id', flat=True)
-
-            # Start with tables that match capacity
-            # and aren't booked at that exact time
-            available_tables = Table.objects.filter(
-                capacity__gte=number_of_guests
-            ).exclude(id__in=booked_tables_ids)
-
-            # Further exclude tables booked within 1 hour window,
-            # excluding the current booking's table
-            one_hour_before = (datetime.combine(
-                booking_date, booking_time) - timedelta(hours=1)).time()
-            one_hour_after = (datetime.combine(
-                booking_date, booking_time) + timedelta(hours=1)).time()
-
-            conflicting_bookings = Booking.objects.filter(
-                booking_date=booking_date,
-                table__in=available_tables,
-                booking_time__range=(one_hour_before, one_hour_after)
-            ).exclude(id=booking.id)  # Exclude the current booking itself
-
-            conflicting_table_ids = conflicting_bookings.values_list(
-                'table__id', flat=True)
-            available_tables = available_tables.exclude(
-                id__in=conflicting_table_ids).order_by('capacity')
-
-            if available_tables.exists():
-                selected_table = available_tables.first()
-                try:
-                    with transaction.atomic():
-                        # Update the existing booking with new data
-                        booking.booking_date = booking_date
-                        booking.booking_time = booking_time
-                        booking.number_of_guests = number_of_guests
-                        # Assign the newly found table
-                        booking.table = selected_table
-                        booking.save()
-                        messages.success(
-                            request,
-                            f"Your booking for Table {selected_table.number} "
-                            f"has been updated successfully!"
-                        )
-                        return redirect('my_bookings')
-                except Exception as e:
-                    messages.error(
-                        request,
-                        f"An error occurred during booking update: {e}")
+            # Update the existing booking with new data
+            booking.booking_date = booking_date
+            booking.booking_time = booking_time
+            booking.number_of_guests = number_of_guests
+
+            try:
+                # Locks and assigns the smallest free table (or combination)
+                # that fits, ignoring the booking's own current tables
+                selected_tables = allocate_tables(booking)
+            except Exception as e:
+                messages.error(
+                    request,
+                    f"An error occurred during booking update: {e}")
             else:
+                if selected_tables is not None:
+                    messages.success(
+                        request,
+                        f"Your booking for {tables_label(selected_tables)} "
+                        f"has been updated successfully!"
+                    )
+                    return redirect('my_bookings')
                 messages.warning(
                     request,
                     "No tables available for your requested date, "
@@ -329,7 +378,9 @@ def cancel_booking(request, booking_id):
     Disallows cancellation within 2 hours of
     reservation and for already finalized bookings.
     """
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    # Extra tables of a combination follow their party's booking
+    booking = get_object_or_404(
+        Booking, id=booking_id, user=request.user, combined_with=None)
 
     # Convert booking datetime to timezone-aware for comparison
     booking_datetime_naive = datetime.combine(
@@ -376,8 +427,9 @@ def cancel_booking(request, booking_id):
 def check_availability(request):
     """
     Check table availability based on date, time,
-    and number of guests. Applies a ±2 hour conflict
-    window to ensure time buffer between bookings.
+    and number of guests. Uses the same overlap rule and
+    table combinations as booking, so the answer matches
+    what can be booked.
     """
     available_tables = []
 
@@ -388,37 +440,30 @@ def check_availability(request):
             check_time = form.cleaned_data['check_time']
             num_guests = form.cleaned_data['num_guests']
 
-            # Combine date and time into a datetime object
-            requested_datetime = timezone.make_aware(
-                datetime.combine(check_date, check_time))
-            two_hours_before = (requested_datetime - timedelta(hours=2)).time()
-            two_hours_after = (requested_datetime + timedelta(hours=2)).time()
-
-            # Find conflicting bookings within ±2 hours on the same date
-            conflicting_bookings = Booking.objects.filter(
-                booking_date=check_date,
-                booking_time__range=(two_hours_before, two_hours_after),
-                status='confirmed'
-            )
-
-            conflicting_table_ids = conflicting_bookings.values_list(
-                'table_id', flat=True)
-
-            # Find available tables that meet guest
-            # count and are not conflicted
-            available_tables = Table.objects.filter(
-                capacity__gte=num_guests
-            ).exclude(id__in=conflicting_table_ids).order_by('capacity')
-
-            if not available_tables.exists():
+            if occupancy_index.enabled:
+                # Answered from the in-memory slot bitmaps, not cached on
+                # top of the index's own staleness
+                available_tables = occupancy_index.free_tables(
+                    check_date, check_time, num_guests)
+            else:
+                # With BOOKINGS_OCCUPANCY_INDEX off (always under tests,
+                # or in deployments that would rather query the database)
+                # repeat checks for the same slot are served from the
+                # cache. Evaluated once so the message and template share
+                # the answer.
+                available_tables = availability_cache.get_or_compute(
+                    [check_date],
+                    f"tables:{check_date}:{check_time:%H:%M}:{num_guests}",
+                    lambda: find_seating(check_date, check_time, num_guests))
+
+            if not available_tables:
                 messages.warning(
                     request,
-                    "No tables are available within"
-                    " 2 hours of the selected time.")
+                    "No tables are available at"
+                    " the selected time.")
             else:
                 messages.success(
-                    request,
-                    f"Found {available_tables.count()} table(s) available.")
+                    request, seating_message(available_tables, num_guests))
         else:
             messages.error(
                 request, "Please correct the errors to check availability.")
@@ -431,43 +476,161 @@ def check_availability(request):
     })
 
 
+def grid_payload(check_date, num_guests, counts):
+    """Shape the availability grid response from per-slot counts."""
+    return {
+        'date': check_date.isoformat(),
+        'num_guests': num_guests,
+        'slots': [
+            {'time': slot.strftime('%H:%M'), 'free_tables': free}
+            for slot, free in counts
+        ],
+    }
+
+
+def calendar_summary(days_occupancy, tables, num_guests):
+    """
+    Shape the availability calendar response from the occupancy of each
+    date and all tables, counting combinations like the grid does.
+    """
+    calendar = []
+    for booking_date, day in days_occupancy.items():
+        counts = free_table_counts(day, tables, booking_date, num_guests)
+        free_slots = sum(1 for _, free in counts if free)
+        calendar.append({
+            'date': booking_date.isoformat(),
+            'available': free_slots > 0,
+            'free_slots': free_slots,
+            'total_slots': len(counts),
+        })
+    return {
+        'start_date': min(days_occupancy).isoformat(),
+        'days': len(days_occupancy),
+        'num_guests': num_guests,
+        'calendar': calendar,
+    }
+
+
+@require_GET
+@payload_conditional_view
+def availability_grid(request):
+    """
+    Return free table counts for every service slot of a day as JSON.
+    Expects ``check_date`` and ``num_guests`` query parameters and answers
+    from the day's SlotCapacity rows, or from one pass over that day's
+    bookings when the rows have not been built.
+    """
+    form = AvailabilityGridForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    check_date = form.cleaned_data['check_date']
+    num_guests = form.cleaned_data['num_guests']
+
+    counts = availability_cache.get_or_compute(
+        [check_date],
+        f"grid:{check_date}:{num_guests}:{current_slot_key()}",
+        lambda: slot_capacity.free_table_counts(check_date, num_guests))
+    if counts is None:
+        # The rows are not built or cannot count the combinations that
+        # seat the party; the occupancy index answers, uncached
+        counts = occupancy_index.free_table_counts(check_date, num_guests)
+
+    return JsonResponse(grid_payload(check_date, num_guests, counts))
+
+
+@require_GET
+@payload_conditional_view
+def availability_calendar(request):
+    """
+    Return a per-day availability summary for a range of dates as JSON.
+    Expects ``check_date``, ``num_guests`` and optionally ``days`` query
+    parameters. All days are computed from one Booking query and the
+    response is cached per date range and party size until a booking in
+    the range changes.
+    """
+    form = AvailabilityCalendarForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+
+    start_date = form.cleaned_data['check_date']
+    num_guests = form.cleaned_data['num_guests']
+    days = form.cleaned_data['days']
+
+    end_date = start_date + timedelta(days=days - 1)
+
+    def summarise():
+        tables = list(Table.objects.all())
+        return calendar_summary(
+            load_days(start_date, end_date), tables, num_guests)
+
+    # Cached per range and party size until a booking in the range changes
+    data = availability_cache.get_or_compute(
+        [start_date + timedelta(days=offset) for offset in range(days)],
+        f"calendar:{start_date}:{days}:{num_guests}:{current_slot_key()}",
+        summarise)
+
+    return JsonResponse(data)
+
+
+@staff_member_required
 def staff_dashboard(request):
     """
     Display key statistics for staff including:
     - Count of upcoming active bookings.
     - Confirmed bookings for today.
     - Total number of tables.
+    - Today's covers per hour and seat utilization.
+    All are read with one query (see ``dashboard.compute_stats``) and
+    cached briefly. Under ASGI the page keeps itself current from the
+    live stream.
     """
-    if not request.user.is_staff:
-        # Redirect or show permission denied as appropriate
-        return redirect('login')  # or use permission decorators
-
     today = timezone.now().date()
 
-    # Filter bookings with status 'pending' or 'confirmed' and date >= today
-    upcoming_bookings = Booking.objects.filter(
-        booking_date__gte=today,
-        status__in=['pending', 'confirmed']
-    )
-
-    # Count the number of upcoming active bookings
-    upcoming_active_bookings_count = upcoming_bookings.count()
+    context = dashboard_stats(today)
+    context['today'] = today
+    context['live_updates'] = settings.BOOKINGS_ASYNC_VIEWS
 
-    # Count bookings confirmed for today (optional, based on your context)
-    confirmed_today_count = Booking.objects.filter(
-        booking_date=today,
-        status='confirmed'
-    ).count()
+    return render(request, 'bookings/staff_dashboard.html', context)
 
-    total_tables = Table.objects.count()
 
-    context = {
-        'upcoming_active_bookings_count': upcoming_active_bookings_count,
-        'confirmed_today_count': confirmed_today_count,
-        'total_tables': total_tables,
-    }
+@staff_member_required
+@require_GET
+def staff_run_sheet(request):
+    """
+    Staff view to download the PDF run sheet of a service day (``date``,
+    today by default). The PDF is rendered in the background; until it is
+    ready a page that retries is shown, with status 202.
+    """
+    day = timezone.now().date()
+    date_param = request.GET.get('date')
+    if date_param:
+        try:
+            day = datetime.strptime(date_param, '%Y-%m-%d').date()
+        except ValueError:
+            messages.error(
+                request, "Invalid date format. Please use YYYY-MM-DD.")
+            return redirect('staff_dashboard')
 
-    return render(request, 'bookings/staff_dashboard.html', context)
+    try:
+        path = get_run_sheet(day)
+    except RunSheetError:
+        messages.error(
+            request,
+            "The run sheet could not be generated. Please try again.")
+        return redirect('staff_dashboard')
+
+    if path is None:
+        return render(request, 'bookings/staff_run_sheet_pending.html', {
+            'day': day,
+            'retry_seconds': RUN_SHEET_RETRY_SECONDS,
+        }, status=202)
+
+    return FileResponse(
+        open(path, 'rb'),
+        filename=f"run-sheet-{day:%Y-%m-%d}.pdf",
+        content_type='application/pdf',
+    )
 
 
 @staff_member_required
@@ -475,33 +638,17 @@ def staff_booking_list(request):
     """
     Staff view to list all bookings with search and filter functionality.
     Supports filtering by status, booking date, and keyword
-    search (username/table/notes). Includes pagination.
+    search (username/table/notes). Pages are keyset paginated on
+    (date, time, id) and the total shown is an estimate.
     """
 
-    bookings_list = Booking.objects.all().order_by(
-        '-booking_date', '-booking_time')  # Get all bookings
-
     query = request.GET.get('q')  # Search query
 
     status_filter = request.GET.get('status')  # Status filter
 
     date_filter = request.GET.get('date')  # Date filter
 
-    if query:
-
-        bookings_list = bookings_list.filter(
-
-            Q(user__username__icontains=query) |
-
-            Q(table__number__icontains=query) |
-
-            Q(notes__icontains=query)
-
-        )
-
-    if status_filter:
-
-        bookings_list = bookings_list.filter(status=status_filter)
+    parsed_date = None
 
     if date_filter:
 
@@ -509,8 +656,6 @@ def staff_booking_list(request):
 
             parsed_date = datetime.strptime(date_filter, '%Y-%m-%d').date()
 
-            bookings_list = bookings_list.filter(booking_date=parsed_date)
-
         except ValueError:
 
             messages.error(
@@ -518,22 +663,24 @@ def staff_booking_list(request):
             # Reset date_filter to avoid pre-filling invalid value
             date_filter = None
 
-    # Implement pagination
-    paginator = Paginator(bookings_list, 10)  # Show 10 bookings per page
+    bookings_list = staff_bookings(query, status_filter, parsed_date)
 
-    page = request.GET.get('page')
+    # Keyset pagination: pages continue from a cursor instead of an offset
+    paginator = KeysetPaginator(
+        bookings_list, STAFF_BOOKING_LIST_KEYS, STAFF_BOOKINGS_PER_PAGE)
 
-    try:
-
-        bookings = paginator.page(page)
-
-    except PageNotAnInteger:
-
-        bookings = paginator.page(1)
+    bookings = paginator.page(
+        after=request.GET.get('after'), before=request.GET.get('before'))
 
-    except EmptyPage:
+    # Page links keep the filters and swap the cursor
+    filters = request.GET.copy()
+    for cursor in ('after', 'before'):
+        filters.pop(cursor, None)
 
-        bookings = paginator.page(paginator.num_pages)
+    def page_query(**cursor):
+        params = filters.copy()
+        params.update(cursor)
+        return params.urlencode()
 
     context = {
 
@@ -545,6 +692,24 @@ def staff_booking_list(request):
 
         'date_filter': date_filter,
 
+        'estimated_total': estimated_count(bookings_list),
+
+        'first_page_query': page_query(),
+
+        # Export links carry the filters of the list
+        'export_query': filters.urlencode(),
+
+        # Bulk actions return to this page
+        'list_query': request.GET.urlencode(),
+
+        'next_page_query': (
+            page_query(after=bookings.next_cursor)
+            if bookings.has_next else None),
+
+        'previous_page_query': (
+            page_query(before=bookings.previous_cursor)
+            if bookings.has_previous else None),
+
         # Pass choices to template for dropdown
         'status_choices': Booking.BOOKING_STATUS_CHOICES,
 
@@ -553,6 +718,55 @@ def staff_booking_list(request):
     return render(request, 'bookings/staff_booking_list.html', context)
 
 
+@staff_member_required
+@require_POST
+def staff_booking_bulk_status(request):
+    """
+    Staff view to move many bookings to a new status in one request: the
+    bookings selected on the list, or all bookings matching its filters
+    (``all_matching``) that can make the move. Returns to the list with
+    the number of bookings actually moved.
+    """
+    form = BookingBulkStatusForm(request.POST)
+    if form.is_valid():
+        data = form.cleaned_data
+        if data['all_matching']:
+            bookings = staff_bookings(
+                data['q'], data['status'], data['date'])
+        else:
+            bookings = Booking.objects.filter(
+                pk__in=[booking.pk for booking in data['bookings']])
+        # The exact number moved; the list only shows an estimate
+        moved = apply_status(bookings, data['new_status'])
+        matching = 'matching ' if data['all_matching'] else ''
+        messages.success(
+            request,
+            f"{moved} {matching}booking{'s' if moved != 1 else ''} marked "
+            f"{data['new_status']}.")
+    else:
+        for errors in form.errors.values():
+            for error in errors:
+                messages.error(request, error)
+
+    list_url = reverse('staff_booking_list')
+    list_query = request.POST.get('list_query')
+    return redirect(f"{list_url}?{list_query}" if list_query else list_url)
+
+
+@staff_member_required
+@require_GET
+def staff_booking_export(request):
+    """
+    Staff view to download the bookings matching the booking list filters,
+    or a date range (date_from/date_to), as CSV or JSON. Rows are streamed
+    as they are read, so large exports run in constant memory.
+    """
+    form = BookingExportForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
+    return export_response(form.cleaned_data)
+
+
 @staff_member_required
 def staff_booking_detail(request, booking_id):
     """
@@ -569,13 +783,21 @@ def staff_booking_detail(request, booking_id):
 
         if form.is_valid():
 
-            form.save()
-
-            messages.success(request, "Booking status updated successfully!")
+            try:
+                form.save()
+            except IntegrityError:
+                # The slot was taken between the check and the save
+                booking.refresh_from_db()
+                form.add_error(
+                    'status', "This booking's table has just been booked "
+                    "for this time; it cannot be re-activated.")
+            else:
+                messages.success(
+                    request, "Booking status updated successfully!")
 
-            return redirect('staff_booking_list')
+                return redirect('staff_booking_list')
 
-        else:
+        if form.errors:
 
             messages.error(
                 request, "Error updating booking status."
@@ -684,11 +906,7 @@ def staff_table_delete(request, table_id):
 
     if request.method == 'POST':
         # Check for active bookings
-        active_bookings = Booking.objects.filter(
-            table=table,
-            # or your actual active statuses
-            status__in=['confirmed', 'pending']
-        )
+        active_bookings = active_bookings_for_table(table)
 
         if active_bookings.exists():
             # Do NOT delete; set error message
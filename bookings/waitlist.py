@@ -0,0 +1,90 @@
+# Standard library imports
+from datetime import datetime
+
+# Django imports
+from django.utils import timezone
+
+# Local application imports
+from .availability import allocate_tables
+from .combinations import COMBINATION_MAX_TABLES
+from .models import Booking, Table, WaitlistEntry
+
+# Waiting entries tried per freed slot before giving up
+PROMOTION_CANDIDATES = 10
+
+
+def largest_party_for(table):
+    """
+    Return the largest party a freed table can help seat: its capacity
+    or, for a table in a combination group, the seats of the group's
+    largest tables that ``cheapest_combination`` may push together.
+    """
+    if not table.combination_group:
+        return table.capacity
+    capacities = Table.objects.filter(
+        combination_group=table.combination_group
+    ).order_by('-capacity').values_list(
+        'capacity', flat=True)[:COMBINATION_MAX_TABLES]
+    return max(table.capacity, sum(capacities))
+
+
+def waiting_entries_for(table, booking_date, booking_time):
+    """
+    Return the waiting entries a table freed at the given date and time
+    could help seat: same date, a period overlapping the freed one and a
+    party no larger than ``largest_party_for`` the table, in order of
+    arrival. Whether an entry now fits, alone or at a combination, is
+    left to the allocator.
+    """
+    freed_start = datetime.combine(booking_date, booking_time)
+    earliest = freed_start - Booking.DURATION
+    latest = freed_start + Booking.DURATION
+
+    entries = WaitlistEntry.objects.filter(
+        status='waiting',
+        booking_date=booking_date,
+        number_of_guests__lte=largest_party_for(table),
+    )
+    # Bounds that fall on another day do not narrow the same-day range
+    if earliest.date() == booking_date:
+        entries = entries.filter(booking_time__gt=earliest.time())
+    if latest.date() == booking_date:
+        entries = entries.filter(booking_time__lt=latest.time())
+    return entries.order_by('created_at')
+
+
+def promote_waitlist(table_id, booking_date, booking_time):
+    """
+    Offer a table freed at the given date and time to the waitlist.
+
+    The earliest waiting entry that can now be seated is booked through
+    the usual allocator and marked promoted. Runs inside the transaction
+    that freed the table, so the cancellation and the promotion commit
+    together. Returns the new booking, or None.
+    """
+    starts_at, _ = Booking.time_range(booking_date, booking_time)
+    if starts_at <= timezone.now():
+        return None
+    table = Table.objects.filter(pk=table_id).first()
+    if table is None:
+        return None
+
+    entries = waiting_entries_for(
+        table, booking_date, booking_time
+    ).select_for_update(skip_locked=True)[:PROMOTION_CANDIDATES]
+    for entry in entries:
+        booking = Booking(
+            user_id=entry.user_id,
+            booking_date=entry.booking_date,
+            booking_time=entry.booking_time,
+            number_of_guests=entry.number_of_guests,
+            notes=entry.notes,
+            status='confirmed',
+        )
+        if allocate_tables(booking) is None:
+            continue
+        entry.status = 'promoted'
+        entry.booking = booking
+        entry.save(update_fields=['status', 'booking', 'updated_at'])
+        return booking
+    return None
@@ -16,5 +16,7 @@ os.environ.setdefault(
     'DJANGO_SETTINGS_MODULE',
     'restaurant_booking_project.settings'
 )
+# Serve the async availability and booking list views under ASGI
+os.environ.setdefault('BOOKINGS_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -21,6 +21,9 @@ from django.contrib.messages import constants as messages
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# True when running the Django test runner
+TESTING = 'test' in sys.argv
+
 # Load environment variables from .env file
 load_dotenv(os.path.join(BASE_DIR, '.env'))
 
@@ -123,8 +126,13 @@ WSGI_APPLICATION = 'restaurant_booking_project.wsgi.application'
 # --- Database Configuration ---
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-# 👇 Force SQLite when running tests
-if 'test' in sys.argv:
+# 👇 Force SQLite when running tests, unless TEST_DATABASE_URL points the
+# suite at PostgreSQL (which the partitioning tests need)
+TEST_DATABASE_URL = os.environ.get('TEST_DATABASE_URL')
+
+if TESTING and TEST_DATABASE_URL:
+    DATABASES = {'default': dj_database_url.parse(TEST_DATABASE_URL)}
+elif TESTING:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
@@ -151,6 +159,20 @@ else:
             }
         }
 
+# --- Cache Configuration ---
+# Availability answers and dashboard statistics are cached. With REDIS_URL
+# all web workers share one cache, so a booking made through any of them
+# drops every cached copy; without it each process keeps its own
+# (LocMemCache) and only short TTLs bound other workers' copies.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL and not TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 
@@ -223,6 +245,41 @@ MESSAGE_TAGS = {
     messages.ERROR: 'alert-danger',
 }
 
+# --- Booking Availability ---
+# Per-process in-memory occupancy index used by availability checks.
+# Loaded days and the table list are refreshed after BOOKINGS_OCCUPANCY_TTL
+# seconds so that bookings and tables changed through other worker
+# processes become visible. Disabled
+# under tests, where rolled back transactions never reach the signals.
+# With the index off, check_availability answers from the database through
+# the availability cache below.
+BOOKINGS_OCCUPANCY_INDEX = not TESTING
+BOOKINGS_OCCUPANCY_TTL = 60
+# Seconds availability answers stay in the cache (0 disables caching).
+# Entries are also dropped once a booking change on their date commits,
+# but only in the committing worker's cache unless REDIS_URL is set, so
+# per-process caches keep answers briefly.
+if TESTING:
+    BOOKINGS_AVAILABILITY_CACHE_TTL = 0
+else:
+    BOOKINGS_AVAILABILITY_CACHE_TTL = 300 if REDIS_URL else 10
+# Seconds the staff dashboard statistics stay cached (0 disables caching).
+# Booking changes drop them sooner; this bounds other workers' copies.
+BOOKINGS_DASHBOARD_CACHE_TTL = 0 if TESTING else 30
+# Where rendered run sheet PDFs are kept, and how many processes (per web
+# worker) render them. Not under MEDIA_ROOT: the sheets list guest names.
+BOOKINGS_RUN_SHEET_DIR = BASE_DIR / 'run_sheets'
+BOOKINGS_RUN_SHEET_WORKERS = 1
+# Bookings dated more than this many days ago are moved to BookingArchive
+# by the archive_bookings command
+BOOKINGS_ARCHIVE_AFTER_DAYS = 365
+# Longest date range the availability calendar will compute at once
+BOOKINGS_CALENDAR_MAX_DAYS = 90
+# Serve the availability and booking list views from bookings.async_views.
+# asgi.py turns this on, so WSGI workers keep the sync views.
+BOOKINGS_ASYNC_VIEWS = (
+    os.environ.get('BOOKINGS_ASYNC_VIEWS', 'False').lower() == 'true')
+
 # Custom settings for authentication redirects
 LOGIN_REDIRECT_URL = 'home'  # Redirect to home page after login
 LOGOUT_REDIRECT_URL = 'home'  # Redirect to home page after logout